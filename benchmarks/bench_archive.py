@@ -0,0 +1,90 @@
+"""Benchmark of ingesting telemetry files into a very large directory,
+before and after archiving it.
+
+Fills a temporary telemetry directory with one-row DAT files, as a season of
+real-mode operation without archiving leaves it, and times the backlog scan
+and ingesting a batch of new files. The old files are then moved into
+per-night bundles with `archive_files` and the measurements repeated.
+
+Run with ``python benchmarks/bench_archive.py [--files N] [--new-files N]``.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from lsst.ts.dsm import archive_files, utils
+
+ROW = (
+    "2019-08-08T22:26:52.451723,2019-08-08T22:26:51.451723,"
+    "2019-08-08T22:26:52.451723,0.5,0.5,215.0,321.0,2050.0,1050.0,6.5\n"
+)
+
+
+def write_files(directory, prefix, num_files, start):
+    filenames = []
+    for i in range(num_files):
+        filename = os.path.join(directory, f"{prefix}_{i:08d}.dat")
+        with open(filename, "w") as ofile:
+            ofile.write(ROW)
+        os.utime(filename, (start + i, start + i))
+        filenames.append(filename)
+    return filenames
+
+
+def measure(directory, num_new_files, label):
+    """Time the backlog scan and ingesting new files."""
+    start = time.perf_counter()
+    utils.scan_telemetry_directory(directory)
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_files = write_files(directory, f"dsm_new_{label}", num_new_files, time.time())
+    for filename in new_files:
+        utils.read_telemetry_data(filename)
+    ingest_time = time.perf_counter() - start
+    for filename in new_files:
+        os.remove(filename)
+
+    print(
+        f"{label:<16}{len(os.listdir(directory)):>10}"
+        f"{scan_time:>10.3f}{num_new_files / ingest_time:>14.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200000, help="Old files.")
+    parser.add_argument("--new-files", type=int, default=2000, help="New files.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        telemetry_dir = os.path.join(root_dir, "telemetry")
+        archive_dir = os.path.join(root_dir, "archive")
+        os.mkdir(telemetry_dir)
+        os.mkdir(archive_dir)
+        # Spread the old files over about 30 nights.
+        spacing = 30 * 86400 / args.files
+        old_files = write_files(telemetry_dir, "dsm", args.files, 0)
+        for i, filename in enumerate(old_files):
+            mtime = time.time() - 31 * 86400 + i * spacing
+            os.utime(filename, (mtime, mtime))
+
+        print(f"{'':<16}{'entries':>10}{'scan (s)':>10}{'ingest (f/s)':>14}")
+        measure(telemetry_dir, args.new_files, "before")
+
+        start = time.perf_counter()
+        archived, errors = archive_files(archive_dir, "dsm1", old_files)
+        archive_time = time.perf_counter() - start
+        assert not errors
+
+        measure(telemetry_dir, args.new_files, "after")
+        print(
+            f"archived {len(archived)} files into {len(os.listdir(archive_dir))} "
+            f"bundles in {archive_time:.1f} s ({len(archived) / archive_time:.0f} files/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
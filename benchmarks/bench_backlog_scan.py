@@ -0,0 +1,63 @@
+"""Benchmark for the startup backlog scan of the telemetry directory.
+
+Fills a temporary directory with one-row DAT files, as the DSM UI leaves them
+while the CSC is not enabled, and times `utils.scan_telemetry_directory`
+followed by reading the backlog in order with `utils.read_telemetry_data`.
+
+Run with ``python benchmarks/bench_backlog_scan.py [--files N]``.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from lsst.ts.dsm import utils
+
+ROW = (
+    "2019-08-08T22:26:52.451723,2019-08-08T22:26:51.451723,"
+    "2019-08-08T22:26:52.451723,0.5,0.5,215.0,321.0,2050.0,1050.0,6.5\n"
+)
+
+
+def make_backlog(output_dir, num_files):
+    """Write the backlog files with increasing modification times."""
+    start = time.time() - num_files
+    utils.create_telemetry_config(output_dir, 1)
+    for i in range(num_files):
+        filename = os.path.join(output_dir, f"dsm_{i:08d}.dat")
+        with open(filename, "w") as ofile:
+            ofile.write(ROW)
+        os.utime(filename, (start + i, start + i))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=30000, help="Backlog files.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        make_backlog(output_dir, args.files)
+
+        start = time.perf_counter()
+        config_files, data_files = utils.scan_telemetry_directory(output_dir)
+        scan_time = time.perf_counter() - start
+        assert len(data_files) == args.files
+
+        start = time.perf_counter()
+        num_rows = 0
+        for data_file in data_files:
+            data = utils.read_telemetry_data(data_file)
+            num_rows += len(data.records)
+        read_time = time.perf_counter() - start
+
+    print(f"backlog files: {args.files}")
+    print(f"scan:  {scan_time:.3f} s ({1e6 * scan_time / args.files:.1f} us per file)")
+    print(
+        f"read:  {read_time:.3f} s ({args.files / read_time:.0f} files/s, "
+        f"{num_rows} rows)"
+    )
+
+
+if __name__ == "__main__":
+    main()
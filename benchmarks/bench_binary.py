@@ -0,0 +1,61 @@
+"""Benchmark of reading binary telemetry files against DAT files.
+
+Writes the same simulated rows as a DAT file with `create_telemetry_data`
+and as a binary telemetry file with `write_binary_telemetry_data`, then
+times reading each the way the CSC does: `read_telemetry_data` parses text
+and converts ISO timestamps, `read_binary_telemetry_data` memory-maps the
+records.
+
+Run with ``python benchmarks/bench_binary.py [--rows N] [--repeat N]``.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from lsst.ts.dsm import utils
+
+
+def best_time(func, filename, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = func(filename)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="Rows per file.")
+    parser.add_argument("--repeat", type=int, default=5, help="Best of N reads.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        rng = np.random.default_rng(47)
+        text_file = utils.create_telemetry_data(output_dir, 60, args.rows, rng=rng)
+        records = utils.read_telemetry_data(text_file).records
+        binary_file = os.path.join(output_dir, "dsm_bench.dsmb")
+        utils.write_binary_telemetry_data(binary_file, records)
+
+        print(f"{'':<8}{'size (MiB)':>12}{'read (ms)':>11}{'rows/s':>14}")
+        results = dict()
+        for label, func, filename in (
+            ("dat", utils.read_telemetry_data, text_file),
+            ("binary", utils.read_binary_telemetry_data, binary_file),
+        ):
+            elapsed, data = best_time(func, filename, args.repeat)
+            assert len(data.records) == args.rows, f"{label}: {len(data.records)} rows"
+            results[label] = data.records
+            print(
+                f"{label:<8}{os.path.getsize(filename) / 2**20:>12.1f}"
+                f"{1000 * elapsed:>11.1f}{args.rows / elapsed:>14.0f}"
+            )
+        np.testing.assert_array_equal(results["dat"], results["binary"])
+
+
+if __name__ == "__main__":
+    main()
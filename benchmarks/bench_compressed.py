@@ -0,0 +1,94 @@
+"""Benchmark of reading compressed telemetry files against plain DAT files.
+
+Writes one large DAT file of realistic rows, plus gzip and Zstandard copies,
+and times parsing each with the functions the CSC uses: `read_telemetry_data`
+for the plain file and `iter_compressed_telemetry_data` for the compressed
+ones. Reports the bytes read from disk, the wall time, the row rate and the
+peak memory of the parsed chunks.
+
+Run with ``python benchmarks/bench_compressed.py [--rows N] [--repeat N]``.
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from lsst.ts.dsm import utils
+
+
+def write_rows(filename, num_rows):
+    rng = np.random.default_rng(47)
+    with open(filename, "w") as ofile:
+        for i in range(num_rows):
+            rms = rng.uniform(0.2, 0.8)
+            ofile.write(
+                f"2019-08-08T22:26:{i % 60:02d}.451723,"
+                f"2019-08-08T22:26:{i % 60:02d}.443390,"
+                f"2019-08-08T22:26:{i % 60:02d}.451723,"
+                f"{rms:.6f},{rms:.6f},{rng.uniform(215, 216):.3f},"
+                f"{rng.uniform(320, 322):.3f},{rng.uniform(2000, 2100):.1f},"
+                f"{rng.uniform(1000, 1100):.1f},{rng.uniform(6, 7):.3f}\n"
+            )
+
+
+def read_plain(filename):
+    data = utils.read_telemetry_data(filename)
+    return len(data.records), data.records.nbytes
+
+
+def read_compressed(filename):
+    num_rows = 0
+    max_bytes = 0
+    for data in utils.iter_compressed_telemetry_data(filename):
+        num_rows += len(data.records)
+        max_bytes = max(max_bytes, data.records.nbytes)
+    return num_rows, max_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Rows in the file.")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N reads.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        plain = os.path.join(root_dir, "dsm_bench.dat")
+        write_rows(plain, args.rows)
+        cases = [("plain", plain, read_plain)]
+
+        gz = plain + ".gz"
+        with open(plain, "rb") as infile, gzip.open(gz, "wb", compresslevel=6) as ofile:
+            shutil.copyfileobj(infile, ofile)
+        cases.append(("gzip", gz, read_compressed))
+        if utils.zstandard is not None:
+            zst = plain + ".zst"
+            with open(plain, "rb") as infile, open(zst, "wb") as ofile:
+                utils.zstandard.ZstdCompressor(level=3).copy_stream(infile, ofile)
+            cases.append(("zstd", zst, read_compressed))
+        else:
+            print("zstandard is not installed; skipping .dat.zst.")
+
+        print(
+            f"{'':<8}{'size (MiB)':>12}{'read (s)':>10}{'rows/s':>12}"
+            f"{'records (MiB)':>15}"
+        )
+        for label, filename, read in cases:
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                num_rows, records_bytes = read(filename)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            assert num_rows == args.rows, f"{label}: read {num_rows} rows"
+            print(
+                f"{label:<8}{os.path.getsize(filename) / 2**20:>12.1f}{best:>10.3f}"
+                f"{num_rows / best:>12.0f}{records_bytes / 2**20:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# This file is part of ts_dsm.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Micro-benchmark for the UTC to TAI conversion of DAT file timestamps.
+
+Each DAT row carries three ISO timestamps (current, first and last
+measurement), where the last measurement normally repeats the current one.
+This compares converting them with a fresh `astropy.time.Time` per field
+against `utils.convert_time` and `utils.convert_times`.
+
+Run with ``python benchmarks/bench_convert_time.py [--rows N]``.
+"""
+
+import argparse
+import time
+
+import numpy as np
+from astropy.time import Time, TimeDelta
+from lsst.ts import utils as tsUtils
+from lsst.ts.dsm import utils
+
+
+def make_rows(num_rows, fps=120):
+    """Make timestamp triplets as the DSM UI writes them."""
+    start = Time("2016-12-31T23:59:50", scale="utc")
+    current = start + TimeDelta(np.arange(num_rows) / fps, format="sec")
+    first = current - TimeDelta(1.0, format="sec")
+    return [(c, f, c) for c, f in zip(current.isot, first.isot)]
+
+
+def per_field_astropy(rows):
+    for row in rows:
+        for field in row:
+            tsUtils.tai_from_utc(Time(field, scale="utc"))
+
+
+def per_field_convert_time(rows):
+    utils.convert_time.cache_clear()
+    for row in rows:
+        for field in row:
+            utils.convert_time(field)
+
+
+def batch_convert_times(rows):
+    columns = np.array(rows).T
+    for column in columns:
+        utils.convert_times(column)
+
+
+def run(func, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000, help="Rows per pass.")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes per case.")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    baseline = run(per_field_astropy, rows, args.repeat)
+    print(f"{'case':<24}{'total [s]':>12}{'per row [us]':>16}{'speedup':>10}")
+    for name, func in (
+        ("astropy Time per field", per_field_astropy),
+        ("convert_time", per_field_convert_time),
+        ("convert_times", batch_convert_times),
+    ):
+        elapsed = (
+            baseline if func is per_field_astropy else run(func, rows, args.repeat)
+        )
+        print(
+            f"{name:<24}{elapsed:>12.4f}{1e6 * elapsed / len(rows):>16.2f}"
+            f"{baseline / elapsed:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
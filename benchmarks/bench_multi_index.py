@@ -0,0 +1,84 @@
+"""Benchmark of running several DSM CSCs in one process.
+
+Starts ``--indices`` simulated CSCs, first as separate ``run_dsm`` processes
+and then as one ``run_dsm_group`` process, and reports the time until every
+CSC has published its summary state and the total resident memory of the
+processes once they are up.
+
+Run with ``python benchmarks/bench_multi_index.py [--indices N]``. It needs
+a working SAL environment, like the unit tests.
+"""
+
+import argparse
+import asyncio
+import time
+
+from lsst.ts import salobj
+
+STARTUP_TIMEOUT = 120
+
+
+def get_rss(pid):
+    """Get the resident memory of a process in MiB (Linux only)."""
+    with open(f"/proc/{pid}/status") as infile:
+        for line in infile:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0
+
+
+async def run_case(domain, commands, indices):
+    """Start the processes and measure startup time and memory."""
+    remotes = [
+        salobj.Remote(domain=domain, name="DSM", index=index, include=["summaryState"])
+        for index in indices
+    ]
+    await asyncio.gather(*[remote.start_task for remote in remotes])
+
+    start = time.monotonic()
+    processes = [await asyncio.create_subprocess_exec(*command) for command in commands]
+    try:
+        await asyncio.gather(
+            *[
+                remote.evt_summaryState.next(flush=False, timeout=STARTUP_TIMEOUT)
+                for remote in remotes
+            ]
+        )
+        startup_time = time.monotonic() - start
+        rss = sum(get_rss(process.pid) for process in processes)
+    finally:
+        for process in processes:
+            process.terminate()
+        await asyncio.gather(*[process.wait() for process in processes])
+        await asyncio.gather(*[remote.close() for remote in remotes])
+    return startup_time, rss
+
+
+async def amain(num_indices):
+    salobj.set_test_topic_subname()
+    indices = list(range(1, num_indices + 1))
+    cases = {
+        "separate processes": [
+            ["run_dsm", "--simulate", "1", str(index)] for index in indices
+        ],
+        "run_dsm_group": [
+            ["run_dsm_group", "--simulate", "1"] + [str(index) for index in indices]
+        ],
+    }
+    async with salobj.Domain() as domain:
+        print(f"indices: {num_indices}")
+        print(f"{'case':<20} {'startup (s)':>12} {'RSS (MiB)':>10}")
+        for name, commands in cases.items():
+            startup_time, rss = await run_case(domain, commands, indices)
+            print(f"{name:<20} {startup_time:>12.2f} {rss:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--indices", type=int, default=4, help="Number of CSCs.")
+    args = parser.parse_args()
+    asyncio.run(amain(args.indices))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark of draining a burst of telemetry files with different numbers
+of parse workers.
+
+Writes a burst of DAT files, as the DSM UI leaves them after a buffer flush
+or while the CSC was down, and times a real-mode CSC publishing all of them
+from its backlog scan for each ``$DSM_PARSE_WORKERS``. As in
+``bench_throughput.py`` the SAL topics are replaced by a local stand-in, so
+no SAL or Kafka connection is needed; ``--write-time`` sets how long each
+simulated write takes. Also checks that the rows were published in time
+order.
+
+Run with ``python benchmarks/bench_parallel_files.py [--files N]
+[--rows-per-file N] [--workers N [N ...]] [--write-time S]``.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+from local_csc import make_local_csc
+from lsst.ts import salobj
+from lsst.ts.dsm import TelemetryWatcher, utils
+
+# Seconds to wait for the CSC to publish the burst.
+DRAIN_TIMEOUT = 300
+
+
+def write_burst(directory, args):
+    """Write the burst of files, one second of data each, oldest first."""
+    rng = np.random.default_rng(47)
+    end_time = time.time() - args.files
+    for i in range(args.files):
+        filename = utils.create_telemetry_data(
+            directory, 1, args.rows_per_file, rng=rng, end_time=end_time + i
+        )
+        # The backlog scan orders files by modification time.
+        os.utime(filename, (end_time + i, end_time + i))
+
+
+async def drain(num_workers, args, root_dir):
+    directory = os.path.join(root_dir, f"workers{num_workers}")
+    os.mkdir(directory)
+    write_burst(directory, args)
+    os.environ["DSM_TELEMETRY_DIR"] = directory
+    os.environ["DSM_PARSE_WORKERS"] = str(num_workers)
+
+    telemetry_watcher = TelemetryWatcher()
+    csc = make_local_csc(1, telemetry_watcher, args.write_time)
+    topic = csc.tel_domeSeeing
+    num_rows = args.files * args.rows_per_file
+    start = time.monotonic()
+    csc._summary_state = salobj.State.ENABLED
+    await csc.handle_summary_state()
+    while topic.num_writes < num_rows and time.monotonic() < start + DRAIN_TIMEOUT:
+        await asyncio.sleep(0.005)
+    elapsed = time.monotonic() - start
+
+    csc._summary_state = salobj.State.STANDBY
+    await csc.handle_summary_state()
+    csc.parse_executor.shutdown(wait=False, cancel_futures=True)
+    csc.ingest_journal.close()
+    telemetry_watcher.close()
+    return elapsed, topic.num_writes, topic.num_out_of_order
+
+
+async def run(args, root_dir):
+    print(
+        f"{args.files} files of {args.rows_per_file} rows, "
+        f"{args.write_time * 1e6:.0f} us per write"
+    )
+    print(f"{'workers':>8}{'drain (s)':>11}{'rows/s':>11}{'speedup':>9}{'order':>7}")
+    baseline = None
+    for num_workers in args.workers:
+        elapsed, num_rows, num_out_of_order = await drain(num_workers, args, root_dir)
+        if baseline is None:
+            baseline = elapsed
+        order = "ok" if num_out_of_order == 0 else f"{num_out_of_order} bad"
+        print(
+            f"{num_workers:>8}{elapsed:>11.3f}{num_rows / elapsed:>11.0f}"
+            f"{baseline / elapsed:>9.2f}{order:>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100, help="Files in the burst.")
+    parser.add_argument(
+        "--rows-per-file", type=int, default=1200, help="Rows per file."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8],
+        help="Numbers of parse workers to compare.",
+    )
+    parser.add_argument(
+        "--write-time",
+        type=float,
+        default=0.0,
+        help="Simulated duration of one SAL write (seconds).",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        asyncio.run(run(args, root_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark for parsing DSM UI telemetry (DAT) files.
+
+Compares the row-by-row ``csv.reader`` loop, with a `utils.convert_time` and
+``float`` call per field, against the columnar `utils.read_telemetry_data`.
+
+Run with ``python benchmarks/bench_parse_dat.py [--rows N] [--bad-fraction F]``.
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+import numpy as np
+from astropy.time import Time, TimeDelta
+from lsst.ts.dsm import utils
+
+
+def write_dat_file(filename, num_rows, bad_fraction, fps=120):
+    """Write a DAT file with a fraction of malformed rows."""
+    rng = np.random.default_rng(47)
+    start = Time("2016-12-31T23:00:00", scale="utc")
+    current = (start + TimeDelta(np.arange(num_rows) / fps, format="sec")).isot
+    first = (start + TimeDelta(np.arange(num_rows) / fps - 1, format="sec")).isot
+    values = rng.random((num_rows, 7)) + [0, 0, 214, 320, 2000, 1000, 6]
+    bad_rows = set(np.flatnonzero(rng.random(num_rows) < bad_fraction).tolist())
+    with open(filename, "w") as ofile:
+        writer = csv.writer(ofile)
+        for i in range(num_rows):
+            row = [current[i], first[i], current[i], *values[i].tolist()]
+            writer.writerow(row[:-2] if i in bad_rows else row)
+
+
+def row_by_row(filename):
+    """Parse the file the way the CSC did before the columnar parser."""
+    records = []
+    with open(filename, "r") as infile:
+        for row in csv.reader(infile):
+            try:
+                records.append(
+                    dict(
+                        timestampCurrent=utils.convert_time(row[0]),
+                        timestampFirstMeasurement=utils.convert_time(row[1]),
+                        timestampLastMeasurement=utils.convert_time(row[2]),
+                        rmsX=float(row[3]),
+                        rmsY=float(row[4]),
+                        centroidX=float(row[5]),
+                        centroidY=float(row[6]),
+                        flux=float(row[7]),
+                        maxADC=float(row[8]),
+                        fwhm=float(row[9]),
+                    )
+                )
+            except IndexError:
+                pass
+    return len(records)
+
+
+def columnar(filename):
+    return len(utils.read_telemetry_data(filename).records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="Rows per file.")
+    parser.add_argument(
+        "--bad-fraction", type=float, default=0.0, help="Fraction of malformed rows."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        filename = os.path.join(output_dir, "dsm_bench.dat")
+        write_dat_file(filename, args.rows, args.bad_fraction)
+        print(f"{args.rows} rows, {os.path.getsize(filename) / 1e6:.1f} MB")
+
+        results = dict()
+        for name, func in (("row by row", row_by_row), ("columnar", columnar)):
+            utils.convert_time.cache_clear()
+            start = time.perf_counter()
+            num_records = func(filename)
+            results[name] = time.perf_counter() - start
+            print(
+                f"{name:<12}{results[name]:>8.3f} s"
+                f"{args.rows / results[name]:>12.0f} rows/s{num_records:>10} valid"
+            )
+    print(f"speedup: {results['row by row'] / results['columnar']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
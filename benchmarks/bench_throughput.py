@@ -0,0 +1,185 @@
+"""Throughput benchmark of the DSM CSC telemetry pipeline.
+
+A producer process plays the part of one DSM UI per index, writing DAT files
+with `utils.create_telemetry_data` at a fixed rate. The CSCs run their real
+telemetry pipeline (inotify, ingest queue, parsing, journal) in this process,
+but their SAL topics are replaced by a local stand-in, so no SAL or Kafka
+connection is needed.
+
+Reports the sustained row rate, the pipeline latency percentiles from
+`PipelineMetrics`, the CPU use and the peak RSS of the CSC process. The
+results are printed as JSON and optionally written to a file, to compare
+releases.
+
+Run with ``python benchmarks/bench_throughput.py [--rows-per-file N]
+[--files-per-second F] [--indices N] [--bad-fraction F] [--duration S]
+[--binary] [--output FILE]``.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+from local_csc import make_local_csc
+from lsst.ts import salobj
+from lsst.ts.dsm import TelemetryWatcher, __version__, utils
+
+# Seconds to wait for the CSCs to publish the last files.
+DRAIN_TIMEOUT = 60
+
+
+def produce(directories, args, start_time):
+    """Write telemetry files at a fixed rate until the duration is over."""
+    rng = np.random.default_rng(47)
+    period = 1 / args.files_per_second
+    for directory in directories:
+        utils.create_telemetry_config(directory, period)
+    num_files = int(args.duration * args.files_per_second)
+    for i in range(num_files):
+        # Scheduled from the start time, so delays do not accumulate.
+        delay = start_time + i * period - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        for directory in directories:
+            utils.create_telemetry_data(
+                directory,
+                period,
+                args.rows_per_file,
+                args.bad_fraction,
+                rng,
+                binary=args.binary,
+            )
+
+
+def get_cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def run(args, root_dir):
+    indices = list(range(1, args.indices + 1))
+    directories = [os.path.join(root_dir, f"dsm{index}") for index in indices]
+    for directory in directories:
+        os.mkdir(directory)
+    os.environ["DSM_TELEMETRY_DIR"] = os.path.join(root_dir, "dsm{index}")
+    os.environ["DSM_METRICS_INTERVAL"] = str(args.duration + DRAIN_TIMEOUT)
+
+    telemetry_watcher = TelemetryWatcher()
+    cscs = [
+        make_local_csc(index, telemetry_watcher, args.write_time) for index in indices
+    ]
+    for csc in cscs:
+        csc._summary_state = salobj.State.ENABLED
+        await csc.handle_summary_state()
+
+    start_time = time.time() + 1
+    producer = multiprocessing.Process(
+        target=produce, args=(directories, args, start_time)
+    )
+    producer.start()
+    await asyncio.sleep(start_time - time.time())
+    start_cpu_time = get_cpu_time()
+    start_wall_time = time.monotonic()
+
+    # Wait until every file has been published.
+    num_files = int(args.duration * args.files_per_second) * len(indices)
+    drain_end = start_wall_time + args.duration + DRAIN_TIMEOUT
+    while time.monotonic() < drain_end and (
+        sum(csc.pipeline_metrics.num_files for csc in cscs) < num_files
+    ):
+        await asyncio.sleep(0.1)
+    producer.join()
+
+    last_write_time = max(
+        (csc.tel_domeSeeing.last_write_time or start_wall_time) for csc in cscs
+    )
+    elapsed = max(last_write_time - start_wall_time, 1e-9)
+    cpu_time = get_cpu_time() - start_cpu_time
+    num_rows = sum(csc.tel_domeSeeing.num_writes for csc in cscs)
+
+    stages = dict()
+    for csc in cscs:
+        for stage, stats in csc.get_pipeline_metrics()["stages"].items():
+            if stats is not None:
+                stages.setdefault(stage, []).append(stats)
+    latency = {
+        stage: {key: max(item[key] for item in stats) for key in ("p50", "p95", "p99")}
+        for stage, stats in stages.items()
+    }
+
+    for csc in cscs:
+        csc._summary_state = salobj.State.STANDBY
+        await csc.handle_summary_state()
+        csc.parse_executor.shutdown(wait=False, cancel_futures=True)
+        csc.ingest_journal.close()
+    telemetry_watcher.close()
+
+    return dict(
+        version=__version__,
+        time=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        parameters=dict(
+            rows_per_file=args.rows_per_file,
+            files_per_second=args.files_per_second,
+            indices=args.indices,
+            bad_fraction=args.bad_fraction,
+            duration=args.duration,
+            write_time=args.write_time,
+            binary=args.binary,
+        ),
+        results=dict(
+            offered_rows_per_second=args.rows_per_file
+            * args.files_per_second
+            * len(indices),
+            rows_published=num_rows,
+            rows_per_second=num_rows / elapsed,
+            elapsed=elapsed,
+            cpu_fraction=cpu_time / elapsed,
+            peak_rss_mib=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            latency=latency,
+        ),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows-per-file", type=int, default=120, help="Rows per file.")
+    parser.add_argument(
+        "--files-per-second", type=float, default=10, help="Files per second per index."
+    )
+    parser.add_argument("--indices", type=int, default=2, help="Number of DSMs.")
+    parser.add_argument(
+        "--bad-fraction", type=float, default=0.0, help="Fraction of malformed rows."
+    )
+    parser.add_argument(
+        "--duration", type=float, default=20, help="Seconds to produce files for."
+    )
+    parser.add_argument(
+        "--write-time",
+        type=float,
+        default=0.0,
+        help="Simulated duration of one SAL write (seconds).",
+    )
+    parser.add_argument(
+        "--binary", action="store_true", help="Write binary telemetry files."
+    )
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        result = asyncio.run(run(args, root_dir))
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output is not None:
+        with open(args.output, "w") as ofile:
+            ofile.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
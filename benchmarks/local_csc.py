@@ -0,0 +1,72 @@
+"""A DSM CSC whose SAL topics are in-process stand-ins, shared by the
+benchmarks that run the real telemetry pipeline without a SAL or Kafka
+connection.
+"""
+
+import asyncio
+import logging
+import time
+import types
+from unittest import mock
+
+import numpy as np
+from lsst.ts import salobj
+from lsst.ts.dsm import DSMCSC
+
+
+class LocalTopic:
+    """In-process stand-in for a SAL write topic that checks the order of
+    the published rows.
+
+    Parameters
+    ----------
+    write_time : `float`
+        Seconds each write takes.
+    """
+
+    def __init__(self, write_time):
+        self.write_time = write_time
+        self.num_writes = 0
+        self.num_out_of_order = 0
+        self.last_timestamp = -np.inf
+        self.last_write_time = None
+
+    async def set_write(self, **kwargs):
+        if self.write_time > 0:
+            await asyncio.sleep(self.write_time)
+        self.num_writes += 1
+        self.last_write_time = time.monotonic()
+        timestamp = kwargs.get("timestampCurrent", self.last_timestamp)
+        if timestamp < self.last_timestamp:
+            self.num_out_of_order += 1
+        self.last_timestamp = timestamp
+
+
+def make_local_csc(index, telemetry_watcher, write_time):
+    """Make a real-mode DSMCSC whose SAL parts are local stand-ins.
+
+    Parameters
+    ----------
+    index : `int`
+        The CSC index.
+    telemetry_watcher : `lsst.ts.dsm.TelemetryWatcher`
+        The watcher of the telemetry directory.
+    write_time : `float`
+        Seconds each write of a topic takes.
+
+    Returns
+    -------
+    `lsst.ts.dsm.DSMCSC`
+        The CSC.
+    """
+
+    def local_base_init(self, name, index, initial_state, simulation_mode):
+        self.salinfo = types.SimpleNamespace(name=name, index=index)
+        self.log = logging.getLogger(f"{name}.{index}")
+        self._simulation_mode = simulation_mode
+        self._summary_state = initial_state
+        self.evt_configuration = LocalTopic(write_time)
+        self.tel_domeSeeing = LocalTopic(write_time)
+
+    with mock.patch.object(salobj.BaseCsc, "__init__", local_base_init):
+        return DSMCSC(index=index, telemetry_watcher=telemetry_watcher)
@@ -24,6 +24,113 @@ try:
 except ImportError:
     __version__ = "?"
 
-from .dsm_csc import *
-from .shutdown_dsm import *
-from .utils import *
+# The shutdown_dsm function has the name of its module. Importing a
+# submodule sets the package attribute of that name to the module, so the
+# function must be bound here, after the module is imported, for
+# ``lsst.ts.dsm.shutdown_dsm`` (and the ``shutdown_dsm`` entry point) to be
+# the function whoever imports the module first. A lazily bound function
+# would be replaced by the module as soon as it was imported. The module
+# only imports salobj when it runs, so this costs little.
+from .shutdown_dsm import set_summary_states, shutdown_dsm
+
+# The module of each public name. The modules are only imported when one of
+# their names is first used, so that e.g. ``shutdown_dsm`` starts without
+# loading astropy, numpy or salobj. Keep this in step with the ``__all__``
+# of each module; the unit tests check that they match.
+_EXPORTS = {
+    "TimestampIndex": "dedup_index",
+    "DSMCSC": "dsm_csc",
+    "run_dsm": "dsm_csc",
+    "DSMGroup": "dsm_group",
+    "run_dsm_group": "dsm_group",
+    "IngestJournal": "ingest_journal",
+    "JournalEntry": "ingest_journal",
+    "IngestQueue": "ingest_queue",
+    "OverflowPolicy": "ingest_queue",
+    "PIPELINE_STAGES": "pipeline_metrics",
+    "PipelineMetrics": "pipeline_metrics",
+    "FRAME_CONFIG": "push_server",
+    "FRAME_RECORDS": "push_server",
+    "PushClient": "push_server",
+    "PushServer": "push_server",
+    "RateLimiter": "rate_limiter",
+    "ReplayedFile": "replay",
+    "TelemetryReplay": "replay",
+    "find_replay_files": "replay",
+    "replay_dsm": "replay",
+    "write_atomically": "replay",
+    "SamplingProfiler": "sampling_profiler",
+    "P2Quantile": "seeing_statistics",
+    "RollingWindow": "seeing_statistics",
+    "SEEING_STATISTICS_FIELDS": "seeing_statistics",
+    "SeeingStatistics": "seeing_statistics",
+    "BundleWriter": "telemetry_archiver",
+    "TelemetryArchiver": "telemetry_archiver",
+    "archive_files": "telemetry_archiver",
+    "prune_archive": "telemetry_archiver",
+    "PollingTelemetryWatcher": "telemetry_watcher",
+    "PollingWatch": "telemetry_watcher",
+    "TelemetryWatcher": "telemetry_watcher",
+    "WATCHER_BACKENDS": "telemetry_watcher",
+    "WatchEvent": "telemetry_watcher",
+    "make_telemetry_watcher": "telemetry_watcher",
+    "BINARY_DAT_DTYPE": "utils",
+    "BINARY_DAT_SUFFIX": "utils",
+    "BINARY_DAT_VERSION": "utils",
+    "COMPRESSED_DAT_SUFFIXES": "utils",
+    "CONVERT_TIME_CACHE_SIZE": "utils",
+    "DAT_COLUMNS": "utils",
+    "DAT_VALUE_LIMITS": "utils",
+    "DOME_SEEING_DTYPE": "utils",
+    "NIGHT_OFFSET": "utils",
+    "TELEMETRY_CONFIG_KEYS": "utils",
+    "TelemetryData": "utils",
+    "YAML_LOADER": "utils",
+    "convert_time": "utils",
+    "convert_times": "utils",
+    "create_telemetry_config": "utils",
+    "create_telemetry_data": "utils",
+    "get_night": "utils",
+    "get_night_end": "utils",
+    "is_binary_data_file": "utils",
+    "is_compressed_data_file": "utils",
+    "is_data_file": "utils",
+    "iter_compressed_telemetry_data": "utils",
+    "parse_telemetry_config": "utils",
+    "parse_telemetry_lines": "utils",
+    "read_binary_telemetry_data": "utils",
+    "read_changed_telemetry_config": "utils",
+    "read_telemetry_config": "utils",
+    "read_telemetry_data": "utils",
+    "scan_telemetry_directory": "utils",
+    "tai_from_utc_unix": "utils",
+    "utc_from_tai_unix": "utils",
+    "validate_binary_records": "utils",
+    "validate_telemetry_config": "utils",
+    "write_binary_telemetry_data": "utils",
+}
+
+_EXPORT_MODULES = frozenset(_EXPORTS.values())
+
+__all__ = ["set_summary_states", "shutdown_dsm"]
+__all__ += sorted(_EXPORTS)
+
+
+def _import_module(module_name):
+    # Unlike importlib.import_module, this is reported by
+    # ``python -X importtime``.
+    return __import__(module_name, globals(), fromlist=["__name__"], level=1)
+
+
+def __getattr__(name):
+    if name in _EXPORT_MODULES:
+        return _import_module(name)
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(_import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | _EXPORT_MODULES)
@@ -0,0 +1,99 @@
+import heapq
+
+import numpy as np
+
+__all__ = ["TimestampIndex"]
+
+
+class TimestampIndex:
+    """A bounded index of recently published measurement timestamps, to
+    find rows that have already been published.
+
+    Timestamps are kept in a heap, oldest first, together with a set for
+    constant-time lookups. The index forgets timestamps more than
+    ``max_age`` seconds older than the newest one and, beyond ``max_size``
+    timestamps, the oldest ones, so its memory use is bounded however fast
+    rows arrive, even if they arrive out of order. Ages are measured in
+    data time, so a backlog is deduplicated the same way as live data.
+
+    Parameters
+    ----------
+    max_size : `int`
+        The maximum number of timestamps kept.
+    max_age : `float`
+        Timestamps this many seconds older than the newest one are
+        forgotten.
+
+    Attributes
+    ----------
+    num_duplicates : `int`
+        The number of duplicate timestamps found by `find_new`.
+    """
+
+    def __init__(self, max_size, max_age):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.num_duplicates = 0
+        self._heap = []
+        self._timestamps = set()
+        self._newest = -np.inf
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def __contains__(self, timestamp):
+        return timestamp in self._timestamps
+
+    def add(self, timestamps):
+        """Add published timestamps.
+
+        Parameters
+        ----------
+        timestamps : `list` [`float`] or `numpy.ndarray`
+            The timestamps.
+        """
+        for timestamp in np.asarray(timestamps, dtype=float).tolist():
+            if timestamp in self._timestamps:
+                continue
+            self._timestamps.add(timestamp)
+            heapq.heappush(self._heap, timestamp)
+            if timestamp > self._newest:
+                self._newest = timestamp
+        oldest_allowed = self._newest - self.max_age
+        while self._heap and (
+            len(self._heap) > self.max_size or self._heap[0] < oldest_allowed
+        ):
+            self._timestamps.discard(heapq.heappop(self._heap))
+
+    def find_new(self, timestamps):
+        """Find the timestamps that have not been published yet.
+
+        Only the timestamps already added count as published, so a
+        timestamp repeated in ``timestamps`` is new every time. The
+        timestamps are not added; call `add` once the rows have been
+        published.
+
+        Parameters
+        ----------
+        timestamps : `numpy.ndarray`
+            The timestamps of the rows about to be published.
+
+        Returns
+        -------
+        `numpy.ndarray`
+            True for each timestamp that is new.
+        """
+        timestamps = np.asarray(timestamps, dtype=float)
+        if self._timestamps:
+            new = np.fromiter(
+                (
+                    timestamp not in self._timestamps
+                    for timestamp in timestamps.tolist()
+                ),
+                dtype=bool,
+                count=len(timestamps),
+            )
+        else:
+            new = np.ones(len(timestamps), dtype=bool)
+        self.num_duplicates += len(timestamps) - int(np.count_nonzero(new))
+        return new
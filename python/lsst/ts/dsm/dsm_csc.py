@@ -1,27 +1,135 @@
 import asyncio
-import csv
+import collections
+import concurrent.futures
+import functools
 import logging
+import math
 import os
-import pathlib
 import shutil
+import signal
 import tempfile
+import threading
+import time
 
 import asyncinotify
-import yaml
+import numpy as np
 from lsst.ts import salobj
 from lsst.ts import utils as tsUtils
 from lsst.ts.dsm import __version__
 
 from . import utils
+from .dedup_index import TimestampIndex
+from .ingest_journal import IngestJournal
+from .ingest_queue import IngestQueue, OverflowPolicy
+from .pipeline_metrics import PipelineMetrics
+from .push_server import PushServer
+from .rate_limiter import RateLimiter
+from .sampling_profiler import SamplingProfiler
+from .seeing_statistics import SeeingStatistics
+from .telemetry_archiver import TelemetryArchiver
+from .telemetry_watcher import make_telemetry_watcher
 
 __all__ = ["DSMCSC", "run_dsm"]
 
-SIMULATION_LOOP_TIMES = [0, 1, 30]  # seconds
+# Simulation mode 3 writes whole camera buffers at the rate of the real UI.
+HIGH_RATE_SIMULATION_MODE = 3
+HIGH_RATE_CAMERA_FPS = 120
+HIGH_RATE_BUFFER_SIZE = 128
+
+SIMULATION_LOOP_TIMES = [
+    0,
+    1,
+    30,
+    HIGH_RATE_BUFFER_SIZE / HIGH_RATE_CAMERA_FPS,
+]  # seconds
+
+# Seed of the simulated telemetry values, so simulations are reproducible.
+SIMULATION_SEED = 47
+
+# Set $DSM_SIMULATION_BINARY to 1 to write simulated telemetry as binary
+# files instead of DAT files.
+DEFAULT_SIMULATION_BINARY = 0
 
 # Default telemetry directory if running in real mode and $DSM_TELEMETRY_DIR
 # is not defined
 DEFAULT_DSM_TELEMETRY_DIR = "/home/saluser/telemetry"
 
+# Number of worker threads used to read and parse telemetry files, which is
+# also how many files each publisher has in progress at once. Can be
+# overridden by $DSM_PARSE_WORKERS.
+DEFAULT_PARSE_WORKERS = 2
+
+# Defaults for the queue of files waiting to be published. These can be
+# overridden by $DSM_INGEST_QUEUE_SIZE, $DSM_INGEST_OVERFLOW_POLICY and
+# $DSM_NUM_PUBLISHERS.
+DEFAULT_INGEST_QUEUE_SIZE = 1000
+DEFAULT_INGEST_OVERFLOW_POLICY = OverflowPolicy.BLOCK.value
+DEFAULT_NUM_PUBLISHERS = 1
+
+# Files older than this many seconds are not published by the backlog scan
+# when the CSC is enabled. Can be overridden by $DSM_BACKLOG_MAX_AGE, where
+# 0 turns the scan off.
+DEFAULT_BACKLOG_MAX_AGE = 86400
+
+# Files last modified more than this many seconds ago are dropped from the
+# ingest journal when it is compacted.
+JOURNAL_RETENTION = 7 * 86400
+
+# Set $DSM_FOLLOW_MODE to 1 to publish the rows of DAT files as they are
+# appended instead of when the file is closed.
+DEFAULT_FOLLOW_MODE = 0
+
+# Maximum number of domeSeeing writes in flight while publishing a file.
+MAX_PENDING_WRITES = 32
+
+# Maximum domeSeeing rows published per second, to protect the EFD. Can be
+# overridden by $DSM_MAX_ROWS_PER_SECOND, where 0 means no limit.
+DEFAULT_MAX_ROWS_PER_SECOND = 0
+
+# Interval between pipeline latency summaries in the CSC log (seconds). Can
+# be overridden by $DSM_METRICS_INTERVAL, where 0 turns the instrumentation
+# off.
+DEFAULT_METRICS_INTERVAL = 0
+
+# In real mode, published DAT files are moved into per-night ZIP bundles in
+# $DSM_ARCHIVE_DIR if it is set. Bundles older than $DSM_ARCHIVE_RETENTION
+# days are deleted, where 0 keeps them forever.
+DEFAULT_ARCHIVE_RETENTION = 0
+
+# Rows whose timestampCurrent was published from an earlier batch within
+# this many seconds (of data time) are not published again. Can be
+# overridden by $DSM_DEDUP_WINDOW; the default of 0 turns deduplication off.
+DEFAULT_DEDUP_WINDOW = 0
+
+# Maximum number of timestamps remembered for deduplication; ten minutes of
+# data at the 120 fps of the fastest camera.
+DEDUP_MAX_ROWS = 120 * 600
+
+# Interval between rolling seeing statistics in the CSC log (seconds). Can
+# be overridden by $DSM_STATISTICS_INTERVAL, where 0 turns the statistics
+# off. $DSM_STATISTICS_WINDOWS is a comma-separated list of the rolling
+# window lengths (seconds).
+DEFAULT_STATISTICS_INTERVAL = 0
+DEFAULT_STATISTICS_WINDOWS = "60,600"
+
+# The running CSC can be profiled if $DSM_PROFILE_DIR is set: SIGUSR1
+# starts sampling the event loop and the parse workers for
+# $DSM_PROFILE_WINDOW seconds, or stops it early, and setting
+# $DSM_PROFILE_ON_ENABLE to 1 starts it when the CSC is enabled. The
+# collapsed stacks are written to a file in $DSM_PROFILE_DIR and the
+# hottest functions to the CSC log.
+DEFAULT_PROFILE_WINDOW = 30
+DEFAULT_PROFILE_ON_ENABLE = 0
+PROFILE_SIGNAL = signal.SIGUSR1
+
+# Number of functions in the profile summary in the CSC log.
+PROFILE_TOP_FUNCTIONS = 15
+
+# The CSC handling PROFILE_SIGNAL. A process has one handler per signal, so
+# in a DSMGroup only one CSC handles it; its profile covers every CSC in the
+# process, as they share the event loop thread.
+_profile_signal_csc = None
+
 
 class DSMCSC(salobj.BaseCsc):
     """
@@ -30,8 +138,11 @@ class DSMCSC(salobj.BaseCsc):
 
     enable_cmdline_state = True
     # The simulation modes fully are documented in the CSC user guide.
-    valid_simulation_modes = (0, 1, 2)
-    simulation_help = "0: real mode, 1: fast simulation, 2: slow simulation"
+    valid_simulation_modes = (0, 1, 2, 3)
+    simulation_help = (
+        "0: real mode, 1: fast simulation, 2: slow simulation, "
+        "3: high-rate simulation"
+    )
     version = __version__
 
     def __init__(
@@ -39,6 +150,7 @@ class DSMCSC(salobj.BaseCsc):
         index,
         initial_state=salobj.State.STANDBY,
         simulation_mode=0,
+        telemetry_watcher=None,
     ):
         """
         Initialize DSM CSC.
@@ -51,15 +163,53 @@ class DSMCSC(salobj.BaseCsc):
             State to place CSC in after initialization.
         simulation_mode : `int`, optional
             Flag to determine mode of operation.
+        telemetry_watcher : `TelemetryWatcher` or `PollingTelemetryWatcher`, optional
+            Watcher shared with other CSCs in the same process. If `None`
+            the CSC makes its own with the backend selected by
+            ``$DSM_WATCHER``.
         """
 
         self.telemetry_directory = None
+        self.ingest_queue = None
+        self.num_publishers = None
+        self.backlog_max_age = None
+        self.ingest_journal = None
+        self.follow_mode = None
+        self.row_rate_limiter = None
+        self.metrics_interval = None
+        self.pipeline_metrics = None
+        self.event_receipt_times = dict()
+        self.telemetry_archiver = None
+        self.push_socket = None
+        self.push_server = None
+        self.dedup_index = None
+        self.statistics_interval = None
+        self.seeing_statistics = None
+        self.profile_directory = None
+        self.profile_window = None
+        self.profile_on_enable = None
+        self.profile_signal_handled = False
+        self.profile_task = tsUtils.make_done_future()
+        self.last_profile = None
+        self.config_topic = None
+        self.config_digest = None
+        self.active_files = set()
+        self.stale_files = set()
+        self.files_being_written = set()
         self.telemetry_loop_task = tsUtils.make_done_future()
-        self.telemetry_notifier = asyncinotify.Inotify()
+        self.owns_telemetry_watcher = telemetry_watcher is None
+        self.telemetry_watcher = (
+            make_telemetry_watcher() if telemetry_watcher is None else telemetry_watcher
+        )
         self.telemetry_watch = None
+        self.telemetry_events = None
+        self.telemetry_watch_time = None
         self.simulated_telemetry_ui_config_written = False
         self.simulated_telemetry_loop_task = tsUtils.make_done_future()
         self.simulation_loop_time = None
+        self.simulation_binary = False
+        self.num_parse_workers = None
+        self.parse_executor = None
 
         super().__init__(
             "DSM",
@@ -73,6 +223,52 @@ class DSMCSC(salobj.BaseCsc):
 
         self.finish_csc_setup()
 
+    def add_profile_signal_handler(self):
+        """Handle `PROFILE_SIGNAL` with `toggle_profiling`, unless another
+        CSC in this process already does.
+        """
+        global _profile_signal_csc
+        if _profile_signal_csc is not None:
+            self.log.warning(
+                f"Not handling {PROFILE_SIGNAL.name}: DSM "
+                f"{_profile_signal_csc.salinfo.index} in this process already "
+                "does, and its profiles include this CSC."
+            )
+            return
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                PROFILE_SIGNAL, self.toggle_profiling
+            )
+        except (RuntimeError, ValueError) as error:
+            self.log.warning(f"Cannot profile on {PROFILE_SIGNAL.name}: {error}")
+            return
+        _profile_signal_csc = self
+        self.profile_signal_handled = True
+
+    def claim_file(self, ifile):
+        """Claim a telemetry file for processing.
+
+        Parameters
+        ----------
+        ifile : `pathlib.PosixPath`
+          The file to process.
+
+        Returns
+        -------
+        claimed : `bool`
+          True if the caller should process the file and then release it
+          with `publish_claimed_file`. False if it is not a telemetry file,
+          or if another publisher is already processing it, in which case
+          that publisher is asked to look at the file again once it is done.
+        """
+        if ifile.suffix != ".yaml" and not utils.is_data_file(ifile):
+            return False
+        if ifile in self.active_files:
+            self.stale_files.add(ifile)
+            return False
+        self.active_files.add(ifile)
+        return True
+
     def cleanup_simulation(self):
         """Remove all generated files and directory from simulation"""
         if os.path.exists(self.telemetry_directory):
@@ -85,14 +281,25 @@ class DSMCSC(salobj.BaseCsc):
         This method will remove the telemetry directory if in simulation mode.
         """
         if self.telemetry_watch is not None:
-            self.telemetry_notifier.rm_watch(self.telemetry_watch)
+            self.telemetry_watcher.rm_watch(self.telemetry_watch)
             self.telemetry_watch = None
-            self.telemetry_notifier.close()
+        if self.owns_telemetry_watcher:
+            self.telemetry_watcher.close()
 
         if self.simulation_mode:
             if os.path.exists(self.telemetry_directory):
                 shutil.rmtree(self.telemetry_directory)
 
+        if self.push_server is not None:
+            await self.push_server.close()
+            self.push_server = None
+        self.remove_profile_signal_handler()
+        self.profile_task.cancel()
+        self.parse_executor.shutdown(wait=False, cancel_futures=True)
+        if self.telemetry_archiver is not None:
+            await self.telemetry_archiver.close()
+        self.ingest_journal.close()
+
         await super().close_tasks()
 
     def finish_csc_setup(self):
@@ -109,26 +316,197 @@ class DSMCSC(salobj.BaseCsc):
         else:
             self.telemetry_directory = os.environ.get(
                 "DSM_TELEMETRY_DIR", DEFAULT_DSM_TELEMETRY_DIR
-            )
+            ).format(index=self.salinfo.index)
+
+        # Older versions of ts_xml have the configuration as telemetry.
+        try:
+            self.config_topic = self.evt_configuration
+        except AttributeError:
+            self.config_topic = self.tel_configuration
 
         self.simulation_loop_time = SIMULATION_LOOP_TIMES[self.simulation_mode]
+        self.simulation_binary = bool(
+            int(os.environ.get("DSM_SIMULATION_BINARY", DEFAULT_SIMULATION_BINARY))
+        )
+
+        self.ingest_queue = IngestQueue(
+            maxsize=int(
+                os.environ.get("DSM_INGEST_QUEUE_SIZE", DEFAULT_INGEST_QUEUE_SIZE)
+            ),
+            policy=os.environ.get(
+                "DSM_INGEST_OVERFLOW_POLICY", DEFAULT_INGEST_OVERFLOW_POLICY
+            ),
+        )
+        self.num_publishers = int(
+            os.environ.get("DSM_NUM_PUBLISHERS", DEFAULT_NUM_PUBLISHERS)
+        )
+        self.num_parse_workers = int(
+            os.environ.get("DSM_PARSE_WORKERS", DEFAULT_PARSE_WORKERS)
+        )
+        if self.num_parse_workers < 1:
+            raise ValueError(
+                f"DSM_PARSE_WORKERS={self.num_parse_workers} must be positive."
+            )
+        self.parse_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.num_parse_workers, thread_name_prefix="dsm_parse"
+        )
+        self.backlog_max_age = float(
+            os.environ.get("DSM_BACKLOG_MAX_AGE", DEFAULT_BACKLOG_MAX_AGE)
+        )
+
+        # Simulation files are deleted once published, so the journal is
+        # only kept on disk in simulation mode if explicitly requested.
+        if self.simulation_mode:
+            journal_file = os.environ.get("DSM_INGEST_JOURNAL")
+        else:
+            journal_file = os.environ.get(
+                "DSM_INGEST_JOURNAL",
+                os.path.join(
+                    os.path.dirname(os.path.normpath(self.telemetry_directory)),
+                    f"dsm{self.salinfo.index}_ingest_journal.jsonl",
+                ),
+            )
+        try:
+            self.ingest_journal = IngestJournal(
+                journal_file, retention=JOURNAL_RETENTION
+            )
+        except OSError as error:
+            self.log.warning(
+                f"Cannot use ingest journal {journal_file}: {error}. "
+                "Published files will not be remembered across restarts."
+            )
+            self.ingest_journal = IngestJournal(None)
+
+        self.follow_mode = bool(
+            int(os.environ.get("DSM_FOLLOW_MODE", DEFAULT_FOLLOW_MODE))
+        )
+        self.row_rate_limiter = RateLimiter(
+            float(
+                os.environ.get("DSM_MAX_ROWS_PER_SECOND", DEFAULT_MAX_ROWS_PER_SECOND)
+            )
+        )
+        self.metrics_interval = float(
+            os.environ.get("DSM_METRICS_INTERVAL", DEFAULT_METRICS_INTERVAL)
+        )
+        if self.metrics_interval > 0:
+            self.pipeline_metrics = PipelineMetrics()
+
+        archive_directory = os.environ.get("DSM_ARCHIVE_DIR")
+        if not self.simulation_mode and archive_directory:
+            retention_days = float(
+                os.environ.get("DSM_ARCHIVE_RETENTION", DEFAULT_ARCHIVE_RETENTION)
+            )
+            self.telemetry_archiver = TelemetryArchiver(
+                archive_directory.format(index=self.salinfo.index),
+                prefix=f"dsm{self.salinfo.index}",
+                log=self.log,
+                retention=retention_days * 86400 if retention_days > 0 else None,
+                archived_callback=self.ingest_journal.remove,
+            )
+
+        dedup_window = float(os.environ.get("DSM_DEDUP_WINDOW", DEFAULT_DEDUP_WINDOW))
+        if dedup_window > 0:
+            self.dedup_index = TimestampIndex(
+                max_size=DEDUP_MAX_ROWS, max_age=dedup_window
+            )
+
+        self.statistics_interval = float(
+            os.environ.get("DSM_STATISTICS_INTERVAL", DEFAULT_STATISTICS_INTERVAL)
+        )
+        if self.statistics_interval > 0:
+            windows = os.environ.get(
+                "DSM_STATISTICS_WINDOWS", DEFAULT_STATISTICS_WINDOWS
+            )
+            self.seeing_statistics = SeeingStatistics(
+                windows=[float(window) for window in windows.split(",")]
+            )
+
+        profile_directory = os.environ.get("DSM_PROFILE_DIR")
+        if profile_directory:
+            self.profile_directory = profile_directory.format(index=self.salinfo.index)
+            self.profile_window = float(
+                os.environ.get("DSM_PROFILE_WINDOW", DEFAULT_PROFILE_WINDOW)
+            )
+            self.profile_on_enable = bool(
+                int(os.environ.get("DSM_PROFILE_ON_ENABLE", DEFAULT_PROFILE_ON_ENABLE))
+            )
+
+        # Telemetry pushed by the DSM UI over a Unix-domain socket is only
+        # accepted if $DSM_PUSH_SOCKET is set.
+        push_socket = os.environ.get("DSM_PUSH_SOCKET")
+        if push_socket:
+            self.push_socket = push_socket.format(index=self.salinfo.index)
+
+    def get_pipeline_metrics(self):
+        """Get the latency and throughput of the telemetry pipeline.
+
+        Returns
+        -------
+        summary : `dict` or `None`
+            The summary described in `PipelineMetrics.summary`, with the
+            `IngestQueue.summary` as ``ingest_queue``, or `None` if the
+            instrumentation is turned off.
+        """
+        if self.pipeline_metrics is None:
+            return None
+        return dict(
+            self.pipeline_metrics.summary(), ingest_queue=self.ingest_queue.summary()
+        )
+
+    def get_seeing_statistics(self):
+        """Get rolling statistics of the published dome seeing.
+
+        Returns
+        -------
+        summary : `dict` or `None`
+            The summary described in `SeeingStatistics.summary`, or `None`
+            if the statistics are turned off.
+        """
+        if self.seeing_statistics is None:
+            return None
+        return self.seeing_statistics.summary()
 
     async def handle_summary_state(self):
         """Handle things that depend on state."""
         self.log.debug(f"Current state: {self.summary_state}")
         if self.summary_state is salobj.State.ENABLED:
             self.log.debug(f"Telemetry dir: {self.telemetry_directory}")
-            try:
-                self.telemetry_watch = self.telemetry_notifier.add_watch(
-                    path=self.telemetry_directory, mask=asyncinotify.Mask.CLOSE_WRITE
+            # Files may also be written elsewhere and renamed into the
+            # directory once complete, as replay_dsm does.
+            mask = asyncinotify.Mask.CLOSE_WRITE | asyncinotify.Mask.MOVED_TO
+            if self.follow_mode:
+                # Files being written are forgotten if they go away.
+                mask |= (
+                    asyncinotify.Mask.MODIFY
+                    | asyncinotify.Mask.DELETE
+                    | asyncinotify.Mask.MOVED_FROM
+                )
+            if self.telemetry_watch is None:
+                (
+                    self.telemetry_watch,
+                    self.telemetry_events,
+                ) = await self.telemetry_watcher.add_watch(
+                    path=self.telemetry_directory, mask=mask
                 )
-            except (AssertionError, ValueError):
-                # Watch already running
-                pass
+                self.telemetry_watch_time = time.time()
+
+            if self.profile_directory is not None and not self.profile_signal_handled:
+                self.add_profile_signal_handler()
+                if self.profile_on_enable and self.profile_task.done():
+                    self.toggle_profiling()
 
             if self.telemetry_loop_task.done():
                 self.telemetry_loop_task = asyncio.create_task(self.telemetry_loop())
 
+            if self.push_socket is not None and self.push_server is None:
+                self.push_server = PushServer(
+                    self.push_socket,
+                    records_callback=self.ingest_pushed_records,
+                    config_callback=self.ingest_pushed_config,
+                    log=self.log,
+                )
+                await self.push_server.start()
+
             if self.simulation_mode and self.simulated_telemetry_loop_task.done():
                 self.simulated_telemetry_loop_task = asyncio.create_task(
                     self.simulated_telemetry_loop()
@@ -138,103 +516,731 @@ class DSMCSC(salobj.BaseCsc):
                 self.simulated_telemetry_loop_task.cancel()
                 self.simulated_telemetry_ui_config_written = False
                 self.cleanup_simulation()
+                self.ingest_queue.clear()
+                self.event_receipt_times.clear()
 
             self.telemetry_loop_task.cancel()
+            if self.push_server is not None:
+                await self.push_server.close()
+                self.push_server = None
+            # Files written while the CSC is not enabled are picked up by
+            # the backlog scan when it is enabled again.
+            if self.telemetry_watch is not None:
+                self.telemetry_watcher.rm_watch(self.telemetry_watch)
+                self.telemetry_watch = None
 
-    async def process_dat_file(self, ifile):
-        """Process the dome seeing DAT file and send telemetry.
+    async def log_pipeline_metrics_loop(self):
+        """Log a summary of the pipeline metrics and the ingest queue every
+        ``metrics_interval`` seconds.
+        """
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            self.log.info(self.pipeline_metrics.format_summary())
+            self.log.info(self.ingest_queue.format_summary())
+
+    async def log_seeing_statistics_loop(self):
+        """Log the seeing statistics every ``statistics_interval``
+        seconds.
+        """
+        while True:
+            await asyncio.sleep(self.statistics_interval)
+            self.log.info(self.seeing_statistics.format_summary())
+
+    async def process_compressed_dat_file(self, ifile, stat, data_offset=0):
+        """Process a compressed dome seeing DAT file and send telemetry.
+
+        The file is decompressed, parsed and published a chunk at a time, so
+        it is never held in memory as a whole. The ingest journal records
+        the offset in the decompressed data as rows are published.
+
+        Parameters
+        ----------
+        ifile : `pathlib.PosixPath`
+          The filename to read and process.
+        stat : `os.stat_result`
+          The status of the file.
+        data_offset : `int`, optional
+          The offset in the decompressed data of the first row to publish.
+        """
+        chunks = utils.iter_compressed_telemetry_data(
+            ifile, data_offset, timed=self.pipeline_metrics is not None
+        )
+        num_rows = 0
+        try:
+            while True:
+                data = await self.run_in_parse_executor(next, chunks, None)
+                if data is None:
+                    break
+                if data.rejected:
+                    self.log.warning(f"Process {ifile} chunk: {data.summary()}.")
+                    for row_offset, reason in data.rejected:
+                        self.log.debug(
+                            f"{ifile}: rejected row ending at decompressed byte "
+                            f"{row_offset}: {reason}"
+                        )
+                await self.publish_dome_seeing(ifile, data)
+                num_rows += len(data.records)
+                if self.pipeline_metrics is not None:
+                    for stage, duration in data.durations.items():
+                        self.pipeline_metrics.record(stage, duration)
+        except ValueError as error:
+            # Retrying would not help; a new version of the file is read
+            # again because its size or modification time differs.
+            self.log.error(f"Stopped after {num_rows} rows: {error}")
+        finally:
+            chunks.close()
+        self.log.info(f"Process {ifile} file: {num_rows} rows.")
+        self.ingest_journal.record(ifile, stat.st_size, stat.st_mtime_ns, stat.st_size)
+        if self.pipeline_metrics is not None:
+            self.pipeline_metrics.record_file(num_rows)
+
+    async def process_yaml_file(self, ifile, stat):
+        """Process the UI configuration YAML file and send telemetry.
+
+        The configuration is not published again if the file has the same
+        content as the last configuration file published.
 
         Parameters
         ----------
         ifile : `pathlib.PosixPath`
           The filename to read and process.
+        stat : `os.stat_result`
+          The status of the file.
         """
         self.log.info(f"Process {ifile} file.")
-        with open(ifile, "r") as infile:
-            reader = csv.reader(infile)
-            for row in reader:
-                try:
-                    await self.tel_domeSeeing.set_write(
-                        dsmIndex=self.salinfo.index,
-                        timestampCurrent=utils.convert_time(row[0]),
-                        timestampFirstMeasurement=utils.convert_time(row[1]),
-                        timestampLastMeasurement=utils.convert_time(row[2]),
-                        rmsX=float(row[3]),
-                        rmsY=float(row[4]),
-                        centroidX=float(row[5]),
-                        centroidY=float(row[6]),
-                        flux=float(row[7]),
-                        maxADC=float(row[8]),
-                        fwhm=float(row[9]),
+        try:
+            digest, config = await self.run_in_parse_executor(
+                utils.read_changed_telemetry_config, ifile, self.config_digest
+            )
+        except ValueError as error:
+            # Not a valid configuration; do not try it again unless it
+            # changes.
+            self.log.error(f"Cannot process {ifile}: {error}")
+        else:
+            if config is None:
+                self.log.info(f"{ifile} is unchanged; not publishing it again.")
+            else:
+                await self.publish_configuration(config)
+                self.config_digest = digest
+        self.ingest_journal.record(ifile, stat.st_size, stat.st_mtime_ns, stat.st_size)
+
+    async def profile(self, duration):
+        """Profile the event loop and the parse workers.
+
+        The stacks of the threads are sampled for ``duration`` seconds, or
+        until the task is cancelled. Then the collapsed stacks, which flame
+        graph tools read, are written to ``profile_directory`` and a
+        summary of the hottest functions is logged. The event loop must
+        run in the main thread, as it does in ``run_dsm`` and
+        ``run_dsm_group``; see `SamplingProfiler`.
+
+        Parameters
+        ----------
+        duration : `float`
+            Seconds to profile for.
+        """
+        loop_ident = threading.get_ident()
+
+        def is_profiled(thread):
+            return thread is not None and (
+                thread.ident == loop_ident or thread.name.startswith("dsm_parse")
+            )
+
+        profiler = SamplingProfiler(thread_filter=is_profiled)
+        try:
+            profiler.start()
+        except (RuntimeError, ValueError) as error:
+            self.log.warning(f"Cannot profile: {error}")
+            return
+        self.log.info(f"Profiling for {duration} s.")
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profiler.stop()
+            filename = os.path.join(
+                self.profile_directory,
+                f"dsm{self.salinfo.index}_profile_"
+                f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}.folded",
+            )
+            try:
+                os.makedirs(self.profile_directory, exist_ok=True)
+                profiler.write_collapsed(filename)
+                self.last_profile = filename
+                self.log.info(f"Wrote profile stacks to {filename}.")
+            except OSError as error:
+                self.log.error(f"Cannot write profile {filename}: {error}")
+            self.log.info(profiler.format_top_functions(PROFILE_TOP_FUNCTIONS))
+
+    async def ingest_pushed_config(self, content):
+        """Publish a UI configuration pushed over the push socket.
+
+        Parameters
+        ----------
+        content : `dict`
+          The content of a UI configuration file.
+        """
+        self.log.info("Process pushed configuration.")
+        await self.publish_configuration(utils.parse_telemetry_config(content))
+        # The next configuration file is published even if it is unchanged,
+        # as it may differ from the pushed configuration.
+        self.config_digest = None
+
+    async def ingest_pushed_records(self, table):
+        """Validate and publish domeSeeing rows pushed over the push socket.
+
+        The rows are small and already decoded, so they are checked in the
+        event loop rather than in a worker thread. Pushed rows are not
+        recorded in the ingest journal.
+
+        Parameters
+        ----------
+        table : `numpy.ndarray`
+          The pushed rows, with `utils.BINARY_DAT_DTYPE`.
+        """
+        start = time.perf_counter()
+        records, offsets, rejected = utils.validate_binary_records(
+            table, np.arange(1, len(table) + 1)
+        )
+        data = utils.TelemetryData(
+            size=0,
+            mtime_ns=0,
+            end_offset=len(table),
+            records=records,
+            offsets=offsets,
+            rejected=rejected,
+        )
+        if rejected:
+            self.log.warning(f"Process pushed rows: {data.summary()}.")
+            for row, reason in rejected:
+                self.log.debug(f"Pushed row {row} rejected: {reason}")
+        await self.publish_dome_seeing("push socket", data, record_journal=False)
+        if self.pipeline_metrics is not None:
+            self.pipeline_metrics.record("parse", time.perf_counter() - start)
+            self.pipeline_metrics.record_file(len(records))
+
+    async def publish_configuration(self, config):
+        """Publish the configuration of the DSM UI.
+
+        Parameters
+        ----------
+        config : `dict`
+          The configuration topic fields, except ``dsmIndex``.
+        """
+        await self.config_topic.set_write(dsmIndex=self.salinfo.index, **config)
+
+    async def publish_dome_seeing(self, ifile, data, record_journal=True):
+        """Publish the valid rows read from a DAT file.
+
+        Up to `MAX_PENDING_WRITES` writes are in flight at once. Each write
+        runs in its own task, and tasks start in creation order, so the rows
+        are written in file order. The ingest journal only advances past a
+        row once it and every row before it have been written, and is
+        updated once per `MAX_PENDING_WRITES` written rows and when the rows
+        are done or a write fails, so a crash can republish at most that
+        many rows. If deduplication is on, rows with the
+        ``timestampCurrent`` of a row published recently from an earlier
+        file, or an earlier part of a followed file, are skipped, e.g. when
+        the DSM UI writes a buffer twice.
+
+        Parameters
+        ----------
+        ifile : `pathlib.PosixPath`
+          The file the rows were read from.
+        data : `TelemetryData`
+          The rows to publish.
+        record_journal : `bool`, optional
+          Record the progress in the ingest journal? False for rows that do
+          not come from a file.
+
+        Raises
+        ------
+        RuntimeError
+            If a row could not be written. No later rows are written.
+        """
+        records = data.records
+        offsets = data.offsets
+        if self.dedup_index is not None and len(records) > 0:
+            new = self.dedup_index.find_new(records["timestampCurrent"])
+            if not np.all(new):
+                self.log.info(
+                    f"Skipping {len(new) - np.count_nonzero(new)} rows of {ifile} "
+                    "that were already published."
+                )
+                records = records[new]
+                offsets = offsets[new]
+        payloads = [
+            dict(zip(records.dtype.names, values), dsmIndex=self.salinfo.index)
+            for values in records.tolist()
+        ]
+        pending = collections.deque()
+        # Offset just past the last written row and the number of rows
+        # written since the ingest journal was last updated.
+        written_offset = None
+        num_unrecorded = 0
+
+        def record_progress():
+            nonlocal num_unrecorded
+            if not record_journal or num_unrecorded == 0:
+                return
+            if data.compressed:
+                self.ingest_journal.record(
+                    ifile, data.size, data.mtime_ns, 0, data_offset=written_offset
+                )
+            else:
+                self.ingest_journal.record(
+                    ifile, data.size, data.mtime_ns, written_offset
+                )
+            num_unrecorded = 0
+
+        async def finish_oldest_write():
+            nonlocal written_offset, num_unrecorded
+            row, row_offset, task, start = pending.popleft()
+            try:
+                await task
+            except Exception as error:
+                raise RuntimeError(
+                    f"Failed to publish row {row} of {len(payloads)} from {ifile}: "
+                    f"{error!r}"
+                ) from error
+            if self.dedup_index is not None:
+                self.dedup_index.add([payloads[row]["timestampCurrent"]])
+            if self.seeing_statistics is not None:
+                self.seeing_statistics.add(payloads[row])
+            written_offset = row_offset
+            num_unrecorded += 1
+            if num_unrecorded >= MAX_PENDING_WRITES:
+                record_progress()
+            if start is not None:
+                self.pipeline_metrics.record("write", time.monotonic() - start)
+
+        try:
+            for row, (payload, row_offset) in enumerate(
+                zip(payloads, offsets.tolist())
+            ):
+                if len(pending) >= MAX_PENDING_WRITES:
+                    await finish_oldest_write()
+                await self.row_rate_limiter.wait()
+                start = None if self.pipeline_metrics is None else time.monotonic()
+                task = asyncio.create_task(self.tel_domeSeeing.set_write(**payload))
+                pending.append((row, row_offset, task, start))
+            while pending:
+                await finish_oldest_write()
+        finally:
+            for _, _, task, _ in pending:
+                task.cancel()
+            record_progress()
+
+    async def publish_dat_file(self, ifile, data):
+        """Publish the rows read from a DAT or binary telemetry file.
+
+        The ingest journal is updated as rows are published, so an
+        interrupted file can be resumed from about the first unpublished
+        row.
+
+        Parameters
+        ----------
+        ifile : `pathlib.PosixPath`
+          The file the rows were read from.
+        data : `TelemetryData`
+          The rows read by `read_dat_file`.
+        """
+        if data.rejected:
+            self.log.warning(f"Process {ifile} file: {data.summary()}.")
+            for row_offset, reason in data.rejected:
+                self.log.debug(
+                    f"{ifile}: rejected row ending at byte {row_offset}: {reason}"
+                )
+        else:
+            self.log.info(f"Process {ifile} file: {data.summary()}.")
+        await self.publish_dome_seeing(ifile, data)
+        self.ingest_journal.record(ifile, data.size, data.mtime_ns, data.end_offset)
+        if self.pipeline_metrics is not None:
+            for stage, duration in data.durations.items():
+                self.pipeline_metrics.record(stage, duration)
+            if len(data.records) > 0:
+                self.pipeline_metrics.record(
+                    "end_to_end", time.time() - data.mtime_ns / 1e9
+                )
+            self.pipeline_metrics.record_file(len(data.records))
+
+    async def publish_claimed_file(self, ifile, read):
+        """Publish a file claimed with `claim_file` and release it.
+
+        Parameters
+        ----------
+        ifile : `pathlib.PosixPath`
+          The file to publish.
+        read : `collections.abc.Awaitable`
+          The `read_file` of the file, which may already be running.
+        """
+        try:
+            publish = await read
+            while True:
+                if publish is not None:
+                    await publish()
+                if ifile not in self.stale_files:
+                    break
+                self.stale_files.discard(ifile)
+                publish = await self.read_file(ifile)
+        finally:
+            self.active_files.discard(ifile)
+            self.stale_files.discard(ifile)
+
+    async def publish_loop(self):
+        """Publish the files waiting in the ingest queue.
+
+        Up to ``num_parse_workers`` files are in progress at once: the file
+        being published and the next files in the queue, which are read and
+        parsed ahead in worker threads. The files are still published one at
+        a time in the order they were queued, so the rows of a burst of
+        files reach the EFD in order. A file that is already being processed
+        is not read ahead; it is read again once the earlier pass has been
+        published. The ingest journal is compacted between files once it
+        needs it.
+        """
+        read_slots = asyncio.Semaphore(self.num_parse_workers)
+        reads = asyncio.Queue()
+
+        async def read_ahead():
+            while True:
+                await read_slots.acquire()
+                ifile = await self.ingest_queue.get()
+                if self.claim_file(ifile):
+                    reads.put_nowait(
+                        (ifile, asyncio.create_task(self.read_file(ifile)))
                     )
-                except IndexError as error:
-                    self.log.error(f"{ifile}: {error}")
-        if self.simulation_mode:
-            os.remove(os.path.join(self.telemetry_directory, ifile))
+                else:
+                    read_slots.release()
 
-    async def process_event(self, event):
-        """Process I/O Events.
+        read_ahead_task = asyncio.create_task(read_ahead())
+        try:
+            while True:
+                ifile, read_task = await reads.get()
+                try:
+                    await self.publish_claimed_file(ifile, read_task)
+                except Exception:
+                    self.log.exception(f"Failed to process {ifile}.")
+                finally:
+                    read_slots.release()
+                if self.ingest_journal.needs_compaction:
+                    try:
+                        await self.ingest_journal.compact_async()
+                    except OSError as error:
+                        self.log.warning(
+                            f"Cannot compact the ingest journal: {error}. "
+                            "Recording in the old journal file."
+                        )
+        finally:
+            read_ahead_task.cancel()
+            while not reads.empty():
+                ifile, read_task = reads.get_nowait()
+                read_task.cancel()
+                self.active_files.discard(ifile)
+                self.stale_files.discard(ifile)
+
+    async def queue_event(self, event):
+        """Add the file from an I/O event to the ingest queue.
 
         Parameters
         ----------
         event : `asyncinotify.Event`
             Payload containing the I/O event information.
         """
+        if event.mask & asyncinotify.Mask.Q_OVERFLOW:
+            self.log.error("Inotify queue overflowed; telemetry files were missed.")
+            return
         self.log.debug(f"Event: Mask = {event.mask}, Name = {event.name}")
-        if event.name.suffix == ".yaml":
-            await self.process_yaml_file(event.path)
-        if event.name.suffix == ".dat":
-            await self.process_dat_file(event.path)
+        if event.path.suffix != ".yaml" and not utils.is_data_file(event.path):
+            # E.g. the temporary file of a file renamed into place.
+            return
+        if event.mask & (asyncinotify.Mask.DELETE | asyncinotify.Mask.MOVED_FROM):
+            self.files_being_written.discard(event.path)
+            return
+        if event.mask & asyncinotify.Mask.MODIFY:
+            # Only uncompressed data files are published while they are
+            # being written.
+            if event.path.suffix != ".dat" and not utils.is_binary_data_file(
+                event.path
+            ):
+                return
+            self.files_being_written.add(event.path)
+            await self.ingest_queue.put(event.path, policy=OverflowPolicy.COALESCE)
+            return
+        self.files_being_written.discard(event.path)
+        if self.pipeline_metrics is not None:
+            self.event_receipt_times[event.path] = time.time()
+        dropped = await self.ingest_queue.put(event.path)
+        if dropped is not None:
+            self.event_receipt_times.pop(dropped, None)
+            self.log.warning(
+                f"Ingest queue full; dropped {dropped}. "
+                f"Depth={self.ingest_queue.depth}, "
+                f"dropped={self.ingest_queue.num_dropped}."
+            )
 
-    async def process_yaml_file(self, ifile):
-        """Process the UI configuration YAML file and send telemetry.
+    async def read_dat_file(self, ifile, offset=0, final=True):
+        """Read and parse a dome seeing DAT file in a worker thread.
+
+        Binary telemetry files are read with
+        `utils.read_binary_telemetry_data` instead of being parsed as text.
+
+        Parameters
+        ----------
+        ifile : `pathlib.PosixPath`
+          The filename to read.
+        offset : `int`, optional
+          The byte offset of the first row to read.
+        final : `bool`, optional
+          Is the file complete? If not, a last line without a line ending is
+          left to be read once it is finished.
+
+        Returns
+        -------
+        data : `TelemetryData` or `None`
+          The rows read, or `None` if the file cannot be read by this CSC,
+          in which case it is recorded as published in the ingest journal.
+        """
+        if utils.is_binary_data_file(ifile):
+            read_data = utils.read_binary_telemetry_data
+        else:
+            read_data = utils.read_telemetry_data
+        try:
+            return await self.run_in_parse_executor(
+                read_data, ifile, offset, final, self.pipeline_metrics is not None
+            )
+        except ValueError as error:
+            # Not a file this CSC can read; do not try it again unless it
+            # changes.
+            self.log.error(f"Cannot process {ifile}: {error}")
+            stat = await self.run_in_parse_executor(os.stat, ifile)
+            self.ingest_journal.record(
+                ifile, stat.st_size, stat.st_mtime_ns, stat.st_size
+            )
+            return None
+
+    async def read_file(self, ifile):
+        """Read what has not yet been published from a telemetry file.
+
+        The ingest journal is consulted first: a file that was already
+        published with the same size and modification time is skipped and
+        a partially published one is resumed. This way files seen by both
+        the backlog scan and the I/O events, or interrupted by a restart,
+        are only published once.
+
+        DAT and binary files are read, parsed and their times converted
+        here, so this can run ahead of publishing earlier files. Compressed
+        files are read as they are published, a chunk at a time.
 
         Parameters
         ----------
         ifile : `pathlib.PosixPath`
           The filename to read and process.
+
+        Returns
+        -------
+        publish : `callable` or `None`
+          Coroutine function that publishes what was read and then deletes
+          or archives the file if it is finished, or `None` if the file no
+          longer exists.
         """
-        self.log.info(f"Process {ifile} file.")
-        with open(ifile, "r") as infile:
-            content = yaml.safe_load(infile)
-            ui_config_file = pathlib.PosixPath(
-                content["ui_versions"]["config_file"]
-            ).as_uri()
-            try:
-                config_msg = self.evt_configuration
-            except AttributeError:
-                config_msg = self.tel_configuration
-            await config_msg.set_write(
-                dsmIndex=self.salinfo.index,
-                timestampConfigStart=utils.convert_time(content["timestamp"]),
-                uiVersionCode=content["ui_versions"]["code"],
-                uiVersionConfig=content["ui_versions"]["config"],
-                uiConfigFile=ui_config_file,
-                cameraName=content["camera"]["name"],
-                cameraFps=content["camera"]["fps"],
-                dataBufferSize=content["data"]["buffer_size"],
-                dataAcquisitionTime=content["data"]["acquisition_time"],
+        # Taken before anything can fail, so a file that is not published
+        # leaves no receipt time behind.
+        receipt_time = self.event_receipt_times.pop(ifile, None)
+        try:
+            stat = await self.run_in_parse_executor(os.stat, ifile)
+        except FileNotFoundError:
+            if self.simulation_mode or self.telemetry_archiver is not None:
+                # Data files are removed or archived once published, so a
+                # file queued more than once is gone after the first time.
+                self.log.debug(f"{ifile} no longer exists.")
+            else:
+                self.log.warning(f"{ifile} no longer exists.")
+            return None
+        if self.pipeline_metrics is not None and receipt_time is not None:
+            self.pipeline_metrics.record("event", receipt_time - stat.st_mtime_ns / 1e9)
+            self.pipeline_metrics.record("queue", time.time() - receipt_time)
+        entry = self.ingest_journal.get(ifile)
+        final = ifile not in self.files_being_written
+
+        process = None
+        if entry is not None and entry.is_complete(stat):
+            self.log.debug(f"{ifile} already processed.")
+        elif ifile.suffix == ".yaml":
+            process = functools.partial(self.process_yaml_file, ifile, stat)
+        elif ifile.suffix == ".dat" or utils.is_binary_data_file(ifile):
+            if entry is not None and entry.matches(stat):
+                offset = entry.offset
+            elif (
+                self.follow_mode and entry is not None and entry.offset <= stat.st_size
+            ):
+                # The file has grown since it was last read.
+                offset = entry.offset
+            else:
+                offset = 0
+            data = await self.read_dat_file(ifile, offset, final)
+            if data is not None:
+                process = functools.partial(self.publish_dat_file, ifile, data)
+        elif utils.is_compressed_data_file(ifile):
+            if entry is not None and entry.matches(stat) and entry.data_offset:
+                data_offset = entry.data_offset
+            else:
+                data_offset = 0
+            process = functools.partial(
+                self.process_compressed_dat_file, ifile, stat, data_offset
             )
 
+        async def publish():
+            if process is not None:
+                await process()
+            is_data_file = utils.is_data_file(ifile)
+            if self.simulation_mode and is_data_file and final:
+                os.remove(os.path.join(self.telemetry_directory, ifile))
+                self.ingest_journal.remove(ifile)
+            elif self.telemetry_archiver is not None and is_data_file and final:
+                self.telemetry_archiver.add(ifile)
+
+        return publish
+
+    def remove_profile_signal_handler(self):
+        """Stop handling `PROFILE_SIGNAL`, if this CSC does."""
+        global _profile_signal_csc
+        if not self.profile_signal_handled:
+            return
+        asyncio.get_running_loop().remove_signal_handler(PROFILE_SIGNAL)
+        _profile_signal_csc = None
+        self.profile_signal_handled = False
+
+    async def run_in_parse_executor(self, func, *args):
+        """Run a blocking file reading function in a worker thread.
+
+        This keeps file I/O and parsing from stalling the event loop that
+        also serves commands and heartbeats.
+
+        Parameters
+        ----------
+        func : `callable`
+            The blocking function to run.
+        *args : `list`
+            The arguments to the function.
+
+        Returns
+        -------
+        `object`
+            The return value of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, func, *args)
+
+    async def scan_backlog(self):
+        """Queue the telemetry files written before the I/O watch started.
+
+        The most recent UI configuration file is queued first, followed by
+        the data files in order of modification time. Files modified after
+        the watch started are left to the I/O events.
+        """
+        if self.backlog_max_age <= 0:
+            return
+        config_files, data_files = await self.run_in_parse_executor(
+            utils.scan_telemetry_directory,
+            self.telemetry_directory,
+            time.time() - self.backlog_max_age,
+            self.telemetry_watch_time,
+        )
+        backlog = config_files[-1:] + data_files
+        if backlog:
+            self.log.info(f"Publishing {len(backlog)} backlog files.")
+        for ifile in backlog:
+            await self.ingest_queue.put(ifile, policy=OverflowPolicy.COALESCE)
+
     async def simulated_telemetry_loop(self):
-        """Run the simulated telemetry loop."""
+        """Run the simulated telemetry loop.
+
+        Files are written on a fixed grid of ``simulation_loop_time``
+        seconds, so the cadence does not drift however long writing a file
+        takes. Files that fall due while the loop is behind are skipped.
+        In high-rate mode each file holds a whole camera buffer; otherwise
+        it holds one row.
+        """
+        if self.simulation_mode == HIGH_RATE_SIMULATION_MODE:
+            camera_fps, data_buffer_size = (
+                HIGH_RATE_CAMERA_FPS,
+                HIGH_RATE_BUFFER_SIZE,
+            )
+        else:
+            camera_fps = data_buffer_size = None
+        rng = np.random.default_rng(SIMULATION_SEED)
+        num_rows = 1
+        start_monotonic = time.monotonic()
+        start_time = time.time()
+        tick = 0
         while True:
             if not self.simulated_telemetry_ui_config_written:
-                utils.create_telemetry_config(
-                    self.telemetry_directory, self.simulation_loop_time
+                camera_fps, data_buffer_size = utils.create_telemetry_config(
+                    self.telemetry_directory,
+                    self.simulation_loop_time,
+                    camera_fps,
+                    data_buffer_size,
                 )
+                if self.simulation_mode == HIGH_RATE_SIMULATION_MODE:
+                    num_rows = data_buffer_size
                 self.simulated_telemetry_ui_config_written = True
 
             utils.create_telemetry_data(
-                self.telemetry_directory, self.simulation_loop_time
+                self.telemetry_directory,
+                self.simulation_loop_time,
+                num_rows,
+                rng=rng,
+                end_time=start_time + tick * self.simulation_loop_time,
+                binary=self.simulation_binary,
             )
 
-            await asyncio.sleep(self.simulation_loop_time)
+            next_tick = max(
+                tick + 1,
+                math.ceil(
+                    (time.monotonic() - start_monotonic) / self.simulation_loop_time
+                ),
+            )
+            if next_tick > tick + 1:
+                self.log.warning(
+                    f"Simulation fell behind; skipped {next_tick - tick - 1} files."
+                )
+            tick = next_tick
+            await asyncio.sleep(
+                start_monotonic + tick * self.simulation_loop_time - time.monotonic()
+            )
 
     async def telemetry_loop(self):
-        """Run the telemetry loop."""
-        async for ioevent in self.telemetry_notifier:
-            await self.process_event(ioevent)
+        """Run the telemetry loop.
+
+        I/O events are drained into the ingest queue as they arrive, while
+        separate publisher tasks process the queued files.
+        """
+        publish_tasks = [
+            asyncio.create_task(self.publish_loop()) for _ in range(self.num_publishers)
+        ]
+        publish_tasks.append(asyncio.create_task(self.scan_backlog()))
+        if self.pipeline_metrics is not None:
+            publish_tasks.append(asyncio.create_task(self.log_pipeline_metrics_loop()))
+        if self.seeing_statistics is not None:
+            publish_tasks.append(asyncio.create_task(self.log_seeing_statistics_loop()))
+        try:
+            while True:
+                ioevent = await self.telemetry_events.get()
+                await self.queue_event(ioevent)
+        finally:
+            for task in publish_tasks:
+                task.cancel()
+
+    def toggle_profiling(self):
+        """Start profiling for ``profile_window`` seconds, or stop it if it
+        is running.
+
+        This is the handler of `PROFILE_SIGNAL`; see `profile`.
+        """
+        if self.profile_task.done():
+            self.profile_task = asyncio.create_task(self.profile(self.profile_window))
+        else:
+            self.profile_task.cancel()
 
 
 def run_dsm():
@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+
+from lsst.ts import salobj
+
+from .dsm_csc import DSMCSC
+from .telemetry_watcher import make_telemetry_watcher
+
+__all__ = ["DSMGroup", "run_dsm_group"]
+
+
+class DSMGroup:
+    """Run the CSCs of several DSMs in one process.
+
+    The CSCs share the event loop, the imported libraries and one telemetry
+    watcher, made by `make_telemetry_watcher`, which is much cheaper than
+    one process per DSM. Each CSC still has its own SAL index, telemetry
+    directory, ingest queue and journal, and is commanded independently.
+
+    Parameters
+    ----------
+    indices : `list` [`int`]
+        The indices of the DSMs.
+    initial_state : `lsst.ts.salobj.State`, optional
+        State to place the CSCs in after initialization.
+    simulation_mode : `int`, optional
+        Flag to determine mode of operation of all CSCs.
+
+    Raises
+    ------
+    ValueError
+        If ``indices`` is empty or has duplicates.
+    """
+
+    def __init__(self, indices, initial_state=salobj.State.STANDBY, simulation_mode=0):
+        if not indices:
+            raise ValueError("At least one index is needed.")
+        if len(set(indices)) != len(indices):
+            raise ValueError(f"indices={indices} has duplicates.")
+        self.telemetry_watcher = make_telemetry_watcher()
+        self.cscs = [
+            DSMCSC(
+                index=index,
+                initial_state=initial_state,
+                simulation_mode=simulation_mode,
+                telemetry_watcher=self.telemetry_watcher,
+            )
+            for index in indices
+        ]
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Close all CSCs."""
+        try:
+            await asyncio.gather(*[csc.close() for csc in self.cscs])
+        finally:
+            self.telemetry_watcher.close()
+
+    async def done(self):
+        """Wait until all CSCs have quit, e.g. with the exitControl
+        command.
+        """
+        try:
+            await asyncio.gather(*[csc.done_task for csc in self.cscs])
+        finally:
+            self.telemetry_watcher.close()
+
+    async def start(self):
+        """Wait until all CSCs have started."""
+        await asyncio.gather(*[csc.start_task for csc in self.cscs])
+
+    @classmethod
+    async def amain(cls):
+        """Make a group from command-line arguments and run it until all
+        CSCs have quit.
+        """
+        parser = argparse.ArgumentParser(
+            description="Run the CSCs of several DSMs in one process."
+        )
+        parser.add_argument("indices", nargs="+", type=int, help="DSM indices.")
+        parser.add_argument(
+            "--state",
+            choices=["standby", "disabled", "enabled"],
+            default="standby",
+            help="Initial state of the CSCs.",
+        )
+        parser.add_argument(
+            "--simulate",
+            type=int,
+            choices=DSMCSC.valid_simulation_modes,
+            default=0,
+            help=DSMCSC.simulation_help,
+        )
+        args = parser.parse_args()
+        group = cls(
+            indices=args.indices,
+            initial_state=salobj.State[args.state.upper()],
+            simulation_mode=args.simulate,
+        )
+        await group.start()
+        await group.done()
+
+
+def run_dsm_group():
+    """Run the CSCs of several DSMs in one process."""
+    asyncio.run(DSMGroup.amain())
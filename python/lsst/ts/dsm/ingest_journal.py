@@ -0,0 +1,273 @@
+import asyncio
+import collections
+import json
+import os
+import time
+
+__all__ = ["IngestJournal", "JournalEntry"]
+
+# The journal is compacted when it holds more than this many lines and more
+# than COMPACT_FACTOR lines per file it tracks.
+MIN_COMPACT_LINES = 10000
+COMPACT_FACTOR = 4
+
+
+class JournalEntry(
+    collections.namedtuple(
+        "JournalEntry", ["size", "mtime_ns", "offset", "data_offset"], defaults=[None]
+    )
+):
+    """How much of a telemetry file has been published.
+
+    Parameters
+    ----------
+    size : `int`
+        The size of the file in bytes when it was last read.
+    mtime_ns : `int`
+        The modification time of the file in nanoseconds when it was last
+        read.
+    offset : `int`
+        The byte offset just past the last published row. For a compressed
+        file this is 0 until the whole file has been published, and then
+        its size.
+    data_offset : `int` or `None`, optional
+        For a compressed file, the offset in the decompressed data just past
+        the last published row.
+    """
+
+    __slots__ = ()
+
+    def is_complete(self, stat):
+        """Has all of this version of the file been published?
+
+        Parameters
+        ----------
+        stat : `os.stat_result`
+            The current status of the file.
+
+        Returns
+        -------
+        `bool`
+            True if the file is unchanged and published up to its end.
+        """
+        return self.matches(stat) and self.offset >= stat.st_size
+
+    def matches(self, stat):
+        """Is this entry for the current version of the file?
+
+        Parameters
+        ----------
+        stat : `os.stat_result`
+            The current status of the file.
+
+        Returns
+        -------
+        `bool`
+            True if the file has not changed since the entry was recorded.
+        """
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+
+class IngestJournal:
+    """Record of the telemetry files that have been published.
+
+    Each update is appended as a JSON line to the journal file, so the
+    record survives a crash or restart of the CSC. The latest entry of
+    every file is also kept in memory for constant time lookups. Once
+    `needs_compaction` the journal file should be rewritten without
+    superseded lines, with `compact_async` in an event loop.
+
+    Parameters
+    ----------
+    filename : `str` or `None`
+        The journal file. If `None` the journal is only kept in memory.
+    retention : `float`, optional
+        Entries for files last modified more than this many seconds ago are
+        discarded when the journal is compacted. If `None` entries are only
+        discarded by `remove`.
+    """
+
+    def __init__(self, filename, retention=None):
+        self.filename = filename
+        self.retention = retention
+        self.entries = dict()
+        self.num_lines = 0
+        self._file = None
+        # Lines appended while the journal file is rewritten, or None.
+        self._compacting = None
+
+        if self.filename is None:
+            return
+        if os.path.exists(self.filename):
+            self._load()
+        self.compact()
+
+    def close(self):
+        """Close the journal file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def needs_compaction(self):
+        """Has the journal file grown enough to be compacted?"""
+        return (
+            self._file is not None
+            and self._compacting is None
+            and self.num_lines
+            > max(MIN_COMPACT_LINES, COMPACT_FACTOR * len(self.entries))
+        )
+
+    def compact(self):
+        """Rewrite the journal file with only the current entries.
+
+        This does blocking I/O.
+        """
+        lines = self._start_compaction()
+        try:
+            self._write_compacted(lines)
+        except BaseException:
+            self._compacting = None
+            raise
+        self._finish_compaction(len(lines))
+
+    async def compact_async(self):
+        """Rewrite the journal file with only the current entries, in the
+        default executor.
+
+        Entries may be recorded while the file is rewritten; they are
+        appended to the new file. If this fails or is cancelled the old
+        journal file is kept.
+        """
+        if self._compacting is not None:
+            return
+        lines = self._start_compaction()
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._write_compacted, lines)
+        except BaseException:
+            self._compacting = None
+            raise
+        self._finish_compaction(len(lines))
+
+    def _start_compaction(self):
+        """Discard expired entries and format the current ones as lines."""
+        if self.retention is not None:
+            oldest_mtime_ns = (time.time() - self.retention) * 1e9
+            self.entries = {
+                name: entry
+                for name, entry in self.entries.items()
+                if entry.mtime_ns >= oldest_mtime_ns
+            }
+        self._compacting = []
+        return [self._format(name, entry) for name, entry in self.entries.items()]
+
+    def _write_compacted(self, lines):
+        """Write the given lines to the temporary journal file."""
+        if self.filename is None:
+            return
+        with open(f"{self.filename}.tmp", "w") as ofile:
+            ofile.writelines(lines)
+            ofile.flush()
+            os.fsync(ofile.fileno())
+
+    def _finish_compaction(self, num_lines):
+        """Replace the journal file with the temporary one and append the
+        lines recorded while it was written.
+
+        If the file cannot be replaced the old one stays open, so entries
+        are still recorded.
+        """
+        appended = self._compacting
+        self._compacting = None
+        if self.filename is None:
+            return
+        # The old file is only closed once it has been replaced.
+        os.replace(f"{self.filename}.tmp", self.filename)
+        self.close()
+        self._file = open(self.filename, "a", buffering=1)
+        self._file.writelines(appended)
+        self.num_lines = num_lines + len(appended)
+
+    def get(self, name):
+        """Get the journal entry for a file.
+
+        Parameters
+        ----------
+        name : `str` or `pathlib.Path`
+            The telemetry file.
+
+        Returns
+        -------
+        `JournalEntry` or `None`
+            The entry, or `None` if the file has not been published.
+        """
+        return self.entries.get(str(name))
+
+    def record(self, name, size, mtime_ns, offset, data_offset=None):
+        """Record how much of a telemetry file has been published.
+
+        Parameters
+        ----------
+        name : `str` or `pathlib.Path`
+            The telemetry file.
+        size : `int`
+            The size of the file in bytes when it was read.
+        mtime_ns : `int`
+            The modification time of the file in nanoseconds when it was read.
+        offset : `int`
+            The byte offset just past the last published row.
+        data_offset : `int`, optional
+            For a compressed file, the offset in the decompressed data just
+            past the last published row.
+        """
+        entry = JournalEntry(
+            size=size, mtime_ns=mtime_ns, offset=offset, data_offset=data_offset
+        )
+        self.entries[str(name)] = entry
+        self._append(str(name), entry)
+
+    def remove(self, name):
+        """Forget a telemetry file, e.g. because it has been deleted.
+
+        Parameters
+        ----------
+        name : `str` or `pathlib.Path`
+            The telemetry file.
+        """
+        if self.entries.pop(str(name), None) is not None:
+            self._append(str(name), None)
+
+    def _append(self, name, entry):
+        if self._file is None:
+            return
+        line = self._format(name, entry)
+        self._file.write(line)
+        self.num_lines += 1
+        if self._compacting is not None:
+            self._compacting.append(line)
+
+    @staticmethod
+    def _format(name, entry):
+        if entry is None:
+            return json.dumps(dict(name=name)) + "\n"
+        fields = entry._asdict()
+        if fields["data_offset"] is None:
+            del fields["data_offset"]
+        return json.dumps(dict(name=name, **fields)) + "\n"
+
+    def _load(self):
+        with open(self.filename, "r") as infile:
+            for line in infile:
+                try:
+                    fields = json.loads(line)
+                    name = fields.pop("name")
+                    if fields:
+                        self.entries[name] = JournalEntry(**fields)
+                    else:
+                        self.entries.pop(name, None)
+                except (ValueError, KeyError, TypeError):
+                    # A line cut short by a crash; everything before it is
+                    # still valid.
+                    continue
+                self.num_lines += 1
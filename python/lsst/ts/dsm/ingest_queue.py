@@ -0,0 +1,170 @@
+import asyncio
+import collections
+import enum
+
+__all__ = ["IngestQueue", "OverflowPolicy"]
+
+
+class OverflowPolicy(enum.Enum):
+    """What to do with a new file when the ingest queue is full."""
+
+    BLOCK = "block"
+    """Wait for the publishers to make room."""
+    COALESCE = "coalesce"
+    """Never queue a file that is already waiting; otherwise wait for room."""
+    DROP_OLDEST = "drop_oldest"
+    """Discard the oldest waiting file to make room."""
+
+
+class IngestQueue:
+    """Bounded queue of telemetry files waiting to be published.
+
+    Parameters
+    ----------
+    maxsize : `int`
+        The maximum number of files waiting in the queue.
+    policy : `OverflowPolicy`, optional
+        What to do when a file is added to a full queue.
+
+    Attributes
+    ----------
+    max_depth : `int`
+        The largest number of files that have been waiting at once.
+    num_blocked : `int`
+        The number of files that had to wait for room in the queue.
+    num_coalesced : `int`
+        The number of files not queued because they were already waiting.
+    num_dropped : `int`
+        The number of files discarded to make room in the queue.
+    """
+
+    def __init__(self, maxsize, policy=OverflowPolicy.BLOCK):
+        if maxsize < 1:
+            raise ValueError(f"maxsize={maxsize} must be positive.")
+        self.maxsize = maxsize
+        self.policy = OverflowPolicy(policy)
+        self.max_depth = 0
+        self.num_blocked = 0
+        self.num_coalesced = 0
+        self.num_dropped = 0
+
+        self._items = collections.deque()
+        self._waiting = collections.Counter()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+    @property
+    def depth(self):
+        """The number of files waiting in the queue."""
+        return len(self._items)
+
+    def clear(self):
+        """Discard all waiting files."""
+        self._items.clear()
+        self._waiting.clear()
+        self._update_events()
+
+    async def get(self):
+        """Remove and return the oldest waiting file, waiting if needed.
+
+        Returns
+        -------
+        `pathlib.Path`
+            The file to publish.
+        """
+        while not self._items:
+            await self._not_empty.wait()
+        item = self._items.popleft()
+        self._remove_waiting(item)
+        self._update_events()
+        return item
+
+    async def put(self, item, policy=None):
+        """Add a file to the queue, applying the overflow policy.
+
+        Parameters
+        ----------
+        item : `pathlib.Path`
+            The file to publish.
+        policy : `OverflowPolicy`, optional
+            Override the queue's overflow policy for this file.
+
+        Returns
+        -------
+        dropped : `pathlib.Path` or `None`
+            The file discarded to make room, if any.
+        """
+        policy = self.policy if policy is None else OverflowPolicy(policy)
+        if policy is OverflowPolicy.COALESCE and self._waiting[item] > 0:
+            self.num_coalesced += 1
+            return None
+
+        dropped = None
+        if len(self._items) >= self.maxsize:
+            if policy is OverflowPolicy.DROP_OLDEST:
+                dropped = self._items.popleft()
+                self._remove_waiting(dropped)
+                self.num_dropped += 1
+            else:
+                self.num_blocked += 1
+                while len(self._items) >= self.maxsize:
+                    await self._not_full.wait()
+                if policy is OverflowPolicy.COALESCE and self._waiting[item] > 0:
+                    self.num_coalesced += 1
+                    return None
+
+        self._items.append(item)
+        self._waiting[item] += 1
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._update_events()
+        return dropped
+
+    def summary(self):
+        """Summarize the state of the queue.
+
+        Returns
+        -------
+        summary : `dict`
+            The ``depth``, ``max_depth``, ``num_blocked``,
+            ``num_coalesced`` and ``num_dropped`` of the queue.
+        """
+        return dict(
+            depth=self.depth,
+            max_depth=self.max_depth,
+            num_blocked=self.num_blocked,
+            num_coalesced=self.num_coalesced,
+            num_dropped=self.num_dropped,
+        )
+
+    def format_summary(self):
+        """Format the summary for the CSC log.
+
+        Returns
+        -------
+        `str`
+            One line with the depth and the overflow counts.
+        """
+        summary = self.summary()
+        return (
+            f"Ingest queue: depth={summary['depth']}, "
+            f"max_depth={summary['max_depth']}, "
+            f"blocked={summary['num_blocked']}, "
+            f"coalesced={summary['num_coalesced']}, "
+            f"dropped={summary['num_dropped']}"
+        )
+
+    def _remove_waiting(self, item):
+        self._waiting[item] -= 1
+        if self._waiting[item] <= 0:
+            del self._waiting[item]
+
+    def _update_events(self):
+        if self._items:
+            self._not_empty.set()
+        else:
+            self._not_empty.clear()
+        if len(self._items) < self.maxsize:
+            self._not_full.set()
+        else:
+            self._not_full.clear()
@@ -0,0 +1,132 @@
+import collections
+import time
+
+import numpy as np
+
+__all__ = ["PIPELINE_STAGES", "PipelineMetrics"]
+
+# The stages of publishing a telemetry file, in pipeline order:
+#
+# * event: from the file's last modification to the I/O event being read.
+# * queue: from the I/O event to a publisher picking up the file.
+# * parse: opening, reading and parsing the file, except converting times.
+# * convert_time: converting the timestamps of the file to TAI.
+# * write: writing one domeSeeing row, from the start of the write until it
+#   and the rows before it have been written.
+# * end_to_end: from the file's last modification to its last row written.
+PIPELINE_STAGES = ("event", "queue", "parse", "convert_time", "write", "end_to_end")
+
+PERCENTILES = (50, 95, 99)
+
+
+class PipelineMetrics:
+    """Latency and throughput of the telemetry pipeline.
+
+    The latest ``window`` durations of every stage are kept, from which the
+    percentiles are computed on demand. File and row rates are computed
+    over the files published in the last ``rate_window`` seconds.
+
+    Parameters
+    ----------
+    window : `int`, optional
+        The number of durations kept per stage.
+    rate_window : `float`, optional
+        The time over which file and row rates are computed (seconds).
+    """
+
+    def __init__(self, window=10000, rate_window=60):
+        self.rate_window = rate_window
+        self.durations = {
+            stage: collections.deque(maxlen=window) for stage in PIPELINE_STAGES
+        }
+        self.num_files = 0
+        self.num_rows = 0
+        self.start_time = time.monotonic()
+        self._published = collections.deque()
+
+    def record(self, stage, duration):
+        """Record how long one stage took.
+
+        Parameters
+        ----------
+        stage : `str`
+            One of `PIPELINE_STAGES`.
+        duration : `float`
+            The duration (seconds).
+        """
+        self.durations[stage].append(duration)
+
+    def record_file(self, num_rows):
+        """Record that a file has been published.
+
+        Parameters
+        ----------
+        num_rows : `int`
+            The number of rows published from the file.
+        """
+        self.num_files += 1
+        self.num_rows += num_rows
+        now = time.monotonic()
+        self._published.append((now, num_rows))
+        self._prune(now)
+
+    def summary(self):
+        """Summarize the latencies and rates.
+
+        Returns
+        -------
+        summary : `dict`
+            ``stages`` maps each stage to the number of durations kept and
+            their p50, p95 and p99 (seconds), or `None` if there are none.
+            ``files_per_second`` and ``rows_per_second`` are the recent
+            rates and ``num_files`` and ``num_rows`` the totals.
+        """
+        stages = dict()
+        for stage, durations in self.durations.items():
+            if durations:
+                values = np.percentile(np.fromiter(durations, dtype=float), PERCENTILES)
+                stages[stage] = dict(
+                    count=len(durations),
+                    **{
+                        f"p{p}": value for p, value in zip(PERCENTILES, values.tolist())
+                    },
+                )
+            else:
+                stages[stage] = None
+
+        now = time.monotonic()
+        self._prune(now)
+        interval = max(min(self.rate_window, now - self.start_time), 1e-9)
+        return dict(
+            stages=stages,
+            files_per_second=len(self._published) / interval,
+            rows_per_second=sum(num_rows for _, num_rows in self._published) / interval,
+            num_files=self.num_files,
+            num_rows=self.num_rows,
+        )
+
+    def format_summary(self):
+        """Format the summary for the CSC log.
+
+        Returns
+        -------
+        `str`
+            One line with the rates and the percentiles of each stage in
+            milliseconds.
+        """
+        summary = self.summary()
+        items = [
+            f"{summary['files_per_second']:.2f} files/s",
+            f"{summary['rows_per_second']:.1f} rows/s",
+        ]
+        for stage, stats in summary["stages"].items():
+            if stats is not None:
+                percentiles = "/".join(
+                    f"{1000 * stats[f'p{p}']:.1f}" for p in PERCENTILES
+                )
+                items.append(f"{stage} {percentiles}")
+        return "Pipeline: " + ", ".join(items) + " (p50/p95/p99 ms)"
+
+    def _prune(self, now):
+        while self._published and self._published[0][0] < now - self.rate_window:
+            self._published.popleft()
@@ -0,0 +1,206 @@
+import asyncio
+import os
+import stat
+import struct
+
+import numpy as np
+import yaml
+
+from . import utils
+
+__all__ = ["FRAME_CONFIG", "FRAME_RECORDS", "PushClient", "PushServer"]
+
+# Every frame starts with a 4-byte kind and the payload size in bytes.
+FRAME_HEADER = struct.Struct("<4sI")
+
+# A frame of domeSeeing rows, as the records of a binary telemetry file
+# (`utils.BINARY_DAT_DTYPE`).
+FRAME_RECORDS = b"DSMB"
+
+# A frame holding a UI configuration, as the UTF-8 YAML of a UI
+# configuration file.
+FRAME_CONFIG = b"CONF"
+
+# Largest payload accepted; a client sending more is disconnected.
+MAX_FRAME_SIZE = 64 << 20
+
+
+class PushServer:
+    """Receive telemetry pushed by a DSM UI over a Unix-domain socket.
+
+    A client sends a stream of frames, each a `FRAME_HEADER` followed by
+    the payload. Frames of one connection are handled in order, and the
+    next frame is not read until the callback for the previous one has
+    finished, so a slow publisher pushes back on the client. A client
+    sending an unknown or oversized frame is disconnected.
+
+    Parameters
+    ----------
+    path : `str`
+        The socket file. A stale socket file is replaced.
+    records_callback : `callable`
+        Coroutine function called with each `FRAME_RECORDS` payload as a
+        `numpy.ndarray` with `utils.BINARY_DAT_DTYPE`.
+    config_callback : `callable`
+        Coroutine function called with the decoded YAML of each
+        `FRAME_CONFIG` payload.
+    log : `logging.Logger`
+        Logger for client errors.
+
+    Attributes
+    ----------
+    num_frames : `int`
+        The number of frames received.
+    """
+
+    def __init__(self, path, records_callback, config_callback, log):
+        self.path = path
+        self.records_callback = records_callback
+        self.config_callback = config_callback
+        self.log = log
+        self.num_frames = 0
+        self.server = None
+        self.writers = set()
+
+    async def start(self):
+        """Start listening on the socket."""
+        try:
+            if stat.S_ISSOCK(os.stat(self.path).st_mode):
+                os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.server = await asyncio.start_unix_server(self.handle_client, self.path)
+
+    async def close(self):
+        """Stop listening and disconnect all clients."""
+        if self.server is None:
+            return
+        self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+        await self.server.wait_closed()
+        self.server = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    async def handle_client(self, reader, writer):
+        """Read and dispatch the frames of one client until it disconnects.
+
+        Parameters
+        ----------
+        reader : `asyncio.StreamReader`
+            The client stream to read.
+        writer : `asyncio.StreamWriter`
+            The client stream to write.
+        """
+        self.writers.add(writer)
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(FRAME_HEADER.size)
+                except asyncio.IncompleteReadError:
+                    return
+                kind, size = FRAME_HEADER.unpack(header)
+                if kind not in (FRAME_RECORDS, FRAME_CONFIG) or size > MAX_FRAME_SIZE:
+                    self.log.error(
+                        f"Push client sent a bad frame: kind={kind!r}, size={size}; "
+                        "disconnecting."
+                    )
+                    return
+                try:
+                    payload = await reader.readexactly(size)
+                except asyncio.IncompleteReadError:
+                    self.log.warning(
+                        "Push client disconnected in the middle of a frame."
+                    )
+                    return
+                self.num_frames += 1
+                if kind == FRAME_RECORDS and size % utils.BINARY_DAT_DTYPE.itemsize:
+                    self.log.error(
+                        f"Skipping pushed frame of {size} bytes: not a whole number "
+                        "of records."
+                    )
+                    continue
+                try:
+                    if kind == FRAME_RECORDS:
+                        await self.records_callback(
+                            np.frombuffer(payload, dtype=utils.BINARY_DAT_DTYPE)
+                        )
+                    else:
+                        await self.config_callback(
+                            yaml.load(payload, Loader=utils.YAML_LOADER)
+                        )
+                except Exception:
+                    self.log.exception(
+                        f"Failed to ingest pushed {kind.decode()} frame."
+                    )
+        except ConnectionError:
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+
+class PushClient:
+    """Push telemetry to a `PushServer`, as a DSM UI would.
+
+    Use `connect` to make one.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, path):
+        """Connect to a push server.
+
+        Parameters
+        ----------
+        path : `str`
+            The socket file of the server.
+
+        Returns
+        -------
+        `PushClient`
+            The connected client.
+        """
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer)
+
+    async def send_records(self, records):
+        """Send domeSeeing rows.
+
+        Parameters
+        ----------
+        records : `numpy.ndarray`
+            The rows, with `utils.DOME_SEEING_DTYPE` fields and TAI
+            timestamps.
+        """
+        await self._send(
+            FRAME_RECORDS, np.asarray(records).astype(utils.BINARY_DAT_DTYPE).tobytes()
+        )
+
+    async def send_config(self, content):
+        """Send a UI configuration.
+
+        Parameters
+        ----------
+        content : `dict`
+            The content of a UI configuration file.
+        """
+        await self._send(FRAME_CONFIG, yaml.safe_dump(content).encode())
+
+    async def close(self):
+        """Disconnect from the server."""
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def _send(self, kind, payload):
+        self.writer.write(FRAME_HEADER.pack(kind, len(payload)) + payload)
+        await self.writer.drain()
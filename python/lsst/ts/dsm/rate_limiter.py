@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+__all__ = ["RateLimiter"]
+
+
+class RateLimiter:
+    """Pace a sequence of operations to a maximum rate.
+
+    Operations are scheduled on a fixed grid of ``1 / rate`` seconds, so
+    short delays do not accumulate into a lower average rate. After an idle
+    period the grid restarts from the current time rather than allowing a
+    burst to catch up.
+
+    Parameters
+    ----------
+    rate : `float`
+        The maximum number of operations per second. Zero or less means
+        no limit.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.next_time = None
+
+    async def wait(self):
+        """Wait until the next operation is allowed."""
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        if self.next_time is None or self.next_time < now:
+            self.next_time = now
+        delay = self.next_time - now
+        self.next_time += 1 / self.rate
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import collections
+import dataclasses
+import math
+import os
+import pathlib
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from . import utils
+
+__all__ = [
+    "ReplayedFile",
+    "TelemetryReplay",
+    "find_replay_files",
+    "replay_dsm",
+    "write_atomically",
+]
+
+# Seconds to wait for the last replayed files to be published.
+DEFAULT_PUBLISH_WAIT = 60
+
+
+@dataclasses.dataclass
+class ReplayedFile:
+    """A recorded telemetry file and how its replay went.
+
+    Parameters
+    ----------
+    source : `pathlib.Path`
+        The recorded file.
+    offset : `float`
+        When the file was written, in seconds after the first file of the
+        recording.
+    last_timestamp : `float` or `None`
+        The ``timestampCurrent`` of the last valid row of the file, which
+        shows when the file has been published; `None` for UI configuration
+        files and files without valid rows.
+    scheduled : `float`
+        When the file was due to be written (Unix seconds).
+    written : `float`
+        When the file was written (Unix seconds).
+    published : `float`
+        When its last row was published (Unix seconds).
+    """
+
+    source: pathlib.Path
+    offset: float
+    last_timestamp: float = None
+    scheduled: float = math.nan
+    written: float = math.nan
+    published: float = math.nan
+
+
+def find_replay_files(directory):
+    """Find the telemetry files of a recording, in the order they were
+    written.
+
+    This does blocking I/O, and reads every data file to find the
+    timestamp of its last row.
+
+    Parameters
+    ----------
+    directory : `str` or `pathlib.Path`
+        The directory holding the recorded telemetry files.
+
+    Returns
+    -------
+    files : `list` [`ReplayedFile`]
+        The telemetry files, oldest first.
+    """
+    config_files, data_files = utils.scan_telemetry_directory(directory)
+    mtimes = {path: path.stat().st_mtime for path in config_files + data_files}
+    # A UI configuration written with a data file is replayed first, as
+    # the CSC publishes it first from a backlog.
+    paths = sorted(
+        mtimes, key=lambda path: (mtimes[path], utils.is_data_file(path), path.name)
+    )
+    start = mtimes[paths[0]] if paths else 0
+    return [
+        ReplayedFile(
+            source=path,
+            offset=mtimes[path] - start,
+            last_timestamp=_read_last_timestamp(path),
+        )
+        for path in paths
+    ]
+
+
+def _read_last_timestamp(path):
+    """Get the ``timestampCurrent`` of the last valid row of a telemetry
+    file, or `None` if it has none.
+    """
+    if not utils.is_data_file(path):
+        return None
+    records = None
+    try:
+        if utils.is_compressed_data_file(path):
+            # A damaged file is published up to the damage.
+            for data in utils.iter_compressed_telemetry_data(path):
+                if len(data.records) > 0:
+                    records = data.records
+        elif utils.is_binary_data_file(path):
+            records = utils.read_binary_telemetry_data(path).records
+        else:
+            records = utils.read_telemetry_data(path).records
+    except ValueError:
+        pass
+    if records is None or len(records) == 0:
+        return None
+    return float(records["timestampCurrent"][-1])
+
+
+def write_atomically(source, directory):
+    """Copy a file into a directory so it appears there complete.
+
+    The file is written to a hidden temporary file in the directory and
+    then renamed, so a watcher never sees it partly written. This does
+    blocking I/O.
+
+    Parameters
+    ----------
+    source : `pathlib.Path`
+        The file to copy.
+    directory : `str` or `pathlib.Path`
+        The directory to copy it to.
+
+    Returns
+    -------
+    path : `pathlib.Path`
+        The copy.
+    """
+    path = pathlib.Path(directory) / source.name
+    temporary = path.with_name(f".{source.name}.replay")
+    shutil.copyfile(source, temporary)
+    os.replace(temporary, path)
+    return path
+
+
+class TelemetryReplay:
+    """Replay recorded telemetry files into the telemetry directory of a
+    DSM CSC.
+
+    The files are written with the same spacing in time as they were
+    recorded, divided by ``speed``. `record_published` is meant to be
+    called with every domeSeeing row the CSC publishes, to measure how far
+    publishing lags behind the replay schedule.
+
+    Parameters
+    ----------
+    files : `list` [`ReplayedFile`]
+        The files to replay, as from `find_replay_files`.
+    telemetry_directory : `str` or `pathlib.Path`
+        The directory to write the files to.
+    speed : `float`, optional
+        How many times faster than recorded to replay the files; `math.inf`
+        writes them all as fast as possible.
+    """
+
+    def __init__(self, files, telemetry_directory, speed=1):
+        if not speed > 0:
+            raise ValueError(f"speed={speed} must be positive.")
+        self.files = files
+        self.telemetry_directory = telemetry_directory
+        self.speed = speed
+        self.start_time = None
+        # The last timestamp of each data file not yet published, and the
+        # data files ending at each timestamp; files can end on the same
+        # timestamp, e.g. when the DSM UI wrote a buffer twice.
+        self._unpublished = dict()
+        self._files_ending_at = collections.defaultdict(list)
+        for file in files:
+            if file.last_timestamp is not None:
+                self._unpublished[file.source] = file.last_timestamp
+                self._files_ending_at[file.last_timestamp].append(file)
+        self._all_published = asyncio.Event()
+        if not self._unpublished:
+            self._all_published.set()
+
+    async def run(self):
+        """Write the files to the telemetry directory on schedule."""
+        loop = asyncio.get_running_loop()
+        self.start_time = time.time()
+        for file in self.files:
+            file.scheduled = self.start_time + file.offset / self.speed
+            delay = file.scheduled - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await loop.run_in_executor(
+                None, write_atomically, file.source, self.telemetry_directory
+            )
+            file.written = time.time()
+
+    def record_published(self, timestamp, publish_time=None):
+        """Record that the CSC published a domeSeeing row.
+
+        Parameters
+        ----------
+        timestamp : `float`
+            The ``timestampCurrent`` of the row.
+        publish_time : `float`, optional
+            When the row was published (Unix seconds); now if `None`.
+        """
+        files = self._files_ending_at.pop(timestamp, None)
+        if files is None:
+            return
+        for file in files:
+            del self._unpublished[file.source]
+            file.published = time.time() if publish_time is None else publish_time
+        if not self._unpublished:
+            self._all_published.set()
+
+    async def wait_published(self, timeout):
+        """Wait for the last row of every data file to be published.
+
+        Parameters
+        ----------
+        timeout : `float`
+            The maximum time to wait (seconds).
+
+        Returns
+        -------
+        all_published : `bool`
+            True if every file was published in time.
+        """
+        try:
+            await asyncio.wait_for(self._all_published.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def summary(self):
+        """Summarize how far writing and publishing lagged behind the
+        replay schedule.
+
+        Returns
+        -------
+        summary : `dict`
+            ``num_files``, the files replayed; ``num_data_files``, those
+            with rows; ``num_published``, those whose rows were published;
+            ``write_lag`` and ``publish_lag``, each a dict with the
+            ``median``, ``p90`` and ``max`` delay in seconds after the
+            scheduled time a file was written or published, NaN if there
+            are none.
+        """
+        data_files = [file for file in self.files if file.last_timestamp is not None]
+        return dict(
+            num_files=len(self.files),
+            num_data_files=len(data_files),
+            num_published=sum(not math.isnan(file.published) for file in data_files),
+            write_lag=_lag_statistics(
+                [file.written - file.scheduled for file in self.files]
+            ),
+            publish_lag=_lag_statistics(
+                [file.published - file.scheduled for file in data_files]
+            ),
+        )
+
+    def format_summary(self):
+        """Format the `summary` as one line per measurement."""
+        summary = self.summary()
+        lines = [
+            f"Replayed {summary['num_files']} files; the last rows of "
+            f"{summary['num_published']} of {summary['num_data_files']} data "
+            "files were published."
+        ]
+        for name in ("write_lag", "publish_lag"):
+            lag = summary[name]
+            lines.append(
+                f"{name.replace('_', ' ').capitalize()} (s): median={lag['median']:.3f}, "
+                f"p90={lag['p90']:.3f}, max={lag['max']:.3f}"
+            )
+        return "\n".join(lines)
+
+
+def _lag_statistics(lags):
+    lags = np.array(lags, dtype=float)
+    lags = lags[~np.isnan(lags)]
+    if len(lags) == 0:
+        return dict(median=math.nan, p90=math.nan, max=math.nan)
+    return dict(
+        median=float(np.median(lags)),
+        p90=float(np.percentile(lags, 90)),
+        max=float(lags.max()),
+    )
+
+
+def _parse_speed(text):
+    speed = math.inf if text == "max" else float(text)
+    if not speed > 0:
+        raise argparse.ArgumentTypeError(f"{text} is not a positive speed.")
+    return speed
+
+
+async def _replay(args):
+    from lsst.ts import salobj
+
+    from .dsm_csc import DEFAULT_DSM_TELEMETRY_DIR
+
+    telemetry_directory = args.telemetry_dir
+    if telemetry_directory is None:
+        telemetry_directory = os.environ.get(
+            "DSM_TELEMETRY_DIR", DEFAULT_DSM_TELEMETRY_DIR
+        ).format(index=args.index)
+    loop = asyncio.get_running_loop()
+    files = await loop.run_in_executor(None, find_replay_files, args.source)
+    if not files:
+        print(f"No telemetry files in {args.source}.")
+        return False
+    replay = TelemetryReplay(files, telemetry_directory, speed=args.speed)
+
+    async with salobj.Domain() as domain, salobj.Remote(
+        domain=domain, name="DSM", index=args.index, include=["domeSeeing"]
+    ) as remote:
+        remote.tel_domeSeeing.callback = lambda data: replay.record_published(
+            data.timestampCurrent
+        )
+        await replay.run()
+        all_published = await replay.wait_published(args.wait)
+    print(replay.format_summary())
+    return all_published
+
+
+def replay_dsm():
+    """Replay recorded telemetry files into a running DSM CSC."""
+    parser = argparse.ArgumentParser(
+        description="Replay recorded telemetry files into a running DSM CSC "
+        "and report how far publishing lagged behind."
+    )
+    parser.add_argument("source", help="Directory of recorded telemetry files.")
+    parser.add_argument("index", type=int, help="SAL index of the DSM CSC.")
+    parser.add_argument(
+        "--telemetry-dir",
+        help="Telemetry directory of the CSC; by default $DSM_TELEMETRY_DIR "
+        "as the CSC uses it.",
+    )
+    parser.add_argument(
+        "--speed",
+        type=_parse_speed,
+        default=1.0,
+        help="How many times faster than recorded to replay the files, "
+        "or max to write them all at once.",
+    )
+    parser.add_argument(
+        "--wait",
+        type=float,
+        default=DEFAULT_PUBLISH_WAIT,
+        help="Seconds to wait after the last file for its rows to be published.",
+    )
+    args = parser.parse_args()
+    if not asyncio.run(_replay(args)):
+        sys.exit(1)
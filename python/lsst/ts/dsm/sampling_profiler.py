@@ -0,0 +1,218 @@
+import collections
+import os
+import signal
+import sys
+import threading
+
+__all__ = ["SamplingProfiler"]
+
+# Seconds of CPU time between samples.
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# Innermost frames, as (file name, function), of a thread that is waiting
+# for work rather than doing any: the event loop waiting for I/O and a
+# worker thread waiting for a job. An event loop with work ready also
+# selects, but with a timeout of 0.
+IDLE_FRAMES = frozenset([("selectors.py", "select"), ("thread.py", "_worker")])
+
+# The profiler that owns the SIGPROF handler and timer of the process.
+_running_profiler = None
+
+
+class SamplingProfiler:
+    """Find where threads spend their time by sampling their Python stacks.
+
+    Every ``interval`` seconds of CPU time used by the process a
+    ``SIGPROF`` timer interrupts the main thread, which records the stack
+    it was interrupted in and those of the other profiled threads.
+    Interrupting the main thread, rather than sampling from another
+    thread, sees an event loop in the main thread where it is busy; a
+    sampling thread only gets to run when the loop releases the GIL to wait
+    for I/O. Nothing runs between `start` and `stop`, so the profiler costs
+    nothing while it is not in use. Samples of a thread waiting for work
+    (see `IDLE_FRAMES`) are only counted.
+
+    The profiler must be started and stopped in the main thread, and only
+    one can run in a process at a time. The main thread only takes samples
+    while it runs Python code or waits in an interruptible call such as
+    ``select`` or `time.sleep`; nothing is sampled while it is blocked in
+    e.g. `threading.Thread.join`.
+
+    Parameters
+    ----------
+    thread_filter : `callable`, optional
+        Called with each `threading.Thread`, or `None` for threads not made
+        by `threading`; only threads it returns True for are profiled. If
+        `None` every thread is profiled.
+    interval : `float`, optional
+        Seconds of CPU time between samples.
+
+    Attributes
+    ----------
+    stacks : `collections.Counter`
+        The number of samples of each stack, as a tuple of frame names,
+        the thread name first and the innermost frame last.
+    num_samples : `int`
+        The number of stacks sampled, including idle ones.
+    num_idle : `int`
+        The number of samples of a thread waiting for work.
+    """
+
+    def __init__(self, thread_filter=None, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.thread_filter = thread_filter
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.num_samples = 0
+        self.num_idle = 0
+        self._started = False
+        self._running = False
+        self._previous_handler = None
+
+    def start(self):
+        """Start sampling.
+
+        Raises
+        ------
+        RuntimeError
+            If the profiler has already been started, or another one is
+            running.
+        ValueError
+            If not called in the main thread.
+        """
+        global _running_profiler
+        if self._started:
+            raise RuntimeError("The profiler has already been started.")
+        if _running_profiler is not None:
+            raise RuntimeError("Another profiler is running in this process.")
+        self._previous_handler = signal.signal(signal.SIGPROF, self._handle_signal)
+        self._started = True
+        self._running = True
+        _running_profiler = self
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        """Stop sampling."""
+        global _running_profiler
+        if not self._running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler)
+        self._running = False
+        _running_profiler = None
+
+    def _handle_signal(self, signum, frame):
+        self.sample(frame)
+
+    def sample(self, main_frame=None):
+        """Record the current stack of each profiled thread.
+
+        Parameters
+        ----------
+        main_frame : `types.FrameType`, optional
+            The frame the main thread is in, if not this one, as when it
+            has been interrupted by a signal.
+        """
+        threads = {thread.ident: thread for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        if main_frame is not None:
+            frames[threading.main_thread().ident] = main_frame
+        for ident, frame in frames.items():
+            thread = threads.get(ident)
+            if self.thread_filter is not None and not self.thread_filter(thread):
+                continue
+            self.num_samples += 1
+            if _is_idle(frame):
+                self.num_idle += 1
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            names.append(f"thread {ident}" if thread is None else thread.name)
+            self.stacks[tuple(reversed(names))] += 1
+
+    def collapsed(self):
+        """Format the samples as collapsed stacks.
+
+        This is the input format of flame graph tools such as
+        ``flamegraph.pl`` and speedscope: one line per stack, the frames
+        separated by ``;`` and followed by a space and the number of
+        samples.
+
+        Returns
+        -------
+        lines : `list` [`str`]
+            The collapsed stacks, most sampled first.
+        """
+        return [
+            f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()
+        ]
+
+    def write_collapsed(self, filename):
+        """Write the `collapsed` stacks to a file.
+
+        This does blocking I/O.
+
+        Parameters
+        ----------
+        filename : `str`
+            The file to write.
+        """
+        with open(filename, "w") as ofile:
+            for line in self.collapsed():
+                ofile.write(line + "\n")
+
+    def top_functions(self, num_functions=10):
+        """Find the functions that were sampled the most.
+
+        Parameters
+        ----------
+        num_functions : `int`, optional
+            The number of functions to return.
+
+        Returns
+        -------
+        functions : `list` [`tuple`]
+            For each function, its name, the number of samples in which it
+            was the innermost frame (self) and the number in which it was
+            anywhere on the stack (total), most self samples first.
+        """
+        self_counts = collections.Counter()
+        total_counts = collections.Counter()
+        for stack, count in self.stacks.items():
+            # The first name is the thread.
+            self_counts[stack[-1]] += count
+            for name in set(stack[1:]):
+                total_counts[name] += count
+        return sorted(
+            ((name, self_counts[name], total) for name, total in total_counts.items()),
+            key=lambda item: (-item[1], -item[2], item[0]),
+        )[:num_functions]
+
+    def format_top_functions(self, num_functions=10):
+        """Format the `top_functions` as one line each, after a header."""
+        num_busy = self.num_samples - self.num_idle
+        lines = [
+            f"Profile of {self.num_samples} samples, {num_busy} busy; "
+            f"top {num_functions} functions by self samples (self/total):"
+        ]
+        for name, self_count, total_count in self.top_functions(num_functions):
+            lines.append(f"  {self_count:6d} {total_count:6d}  {name}")
+        return "\n".join(lines)
+
+
+def _is_idle(frame):
+    """Is a thread waiting for work, given its innermost frame?"""
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) not in IDLE_FRAMES:
+        return False
+    return code.co_name != "select" or frame.f_locals.get("timeout") != 0
+
+
+def _frame_name(code):
+    """Name a frame's function for a collapsed stack, without the ``;``
+    that separates frames.
+    """
+    name = getattr(code, "co_qualname", code.co_name)
+    filename = os.path.basename(code.co_filename)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":")
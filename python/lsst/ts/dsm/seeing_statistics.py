@@ -0,0 +1,322 @@
+import collections
+import math
+
+from .utils import get_night, get_night_end, tai_from_utc_unix, utc_from_tai_unix
+
+__all__ = [
+    "SEEING_STATISTICS_FIELDS",
+    "P2Quantile",
+    "RollingWindow",
+    "SeeingStatistics",
+]
+
+# The domeSeeing fields summarized.
+SEEING_STATISTICS_FIELDS = ("fwhm", "rmsX", "rmsY")
+
+# The quantiles estimated for each field.
+QUANTILES = (0.5, 0.9)
+
+
+class P2Quantile:
+    """Streaming estimate of a quantile with the P-squared algorithm.
+
+    Five markers are kept and adjusted as values arrive, so each update is
+    O(1) and no values are stored (Jain and Chlamtac, "The P^2 algorithm
+    for dynamic calculation of quantiles and histograms without storing
+    observations", Communications of the ACM, 1985).
+
+    Parameters
+    ----------
+    p : `float`
+        The quantile to estimate, between 0 and 1.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self._initial = []
+        self._heights = None
+        self._positions = None
+        self._desired = None
+        self._increments = (0, p / 2, p, (1 + p) / 2, 1)
+
+    def add(self, value):
+        """Add a value.
+
+        Parameters
+        ----------
+        value : `float`
+            The value.
+        """
+        self.count += 1
+        if self._heights is None:
+            self._initial.append(value)
+            if len(self._initial) == 5:
+                self._heights = sorted(self._initial)
+                self._positions = [0, 1, 2, 3, 4]
+                p = self.p
+                self._desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+            return
+
+        heights = self._heights
+        positions = self._positions
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            offset = self._desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (
+                offset <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (
+                        positions[i + step] - positions[i]
+                    )
+                heights[i] = height
+                positions[i] += step
+
+    @property
+    def value(self):
+        """The estimated quantile, or `None` if there are no values."""
+        if self._heights is not None:
+            return self._heights[2]
+        if not self._initial:
+            return None
+        values = sorted(self._initial)
+        return values[min(int(self.p * len(values)), len(values) - 1)]
+
+    def _parabolic(self, i, step):
+        heights = self._heights
+        positions = self._positions
+        return heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+            (positions[i] - positions[i - 1] + step)
+            * (heights[i + 1] - heights[i])
+            / (positions[i + 1] - positions[i])
+            + (positions[i + 1] - positions[i] - step)
+            * (heights[i] - heights[i - 1])
+            / (positions[i] - positions[i - 1])
+        )
+
+
+class RollingWindow:
+    """Mean, variance, minimum and maximum of the values of the last
+    ``duration`` seconds, updated in O(1) amortized time per value.
+
+    The mean and variance are updated with Welford's method as values enter
+    and leave the window. The minimum and maximum are the heads of two
+    monotonic queues.
+
+    Parameters
+    ----------
+    duration : `float`
+        The length of the window (seconds). Values more than this much
+        older than the newest one leave the window.
+    """
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._values = collections.deque()
+        self._minima = collections.deque()
+        self._maxima = collections.deque()
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, timestamp, value):
+        """Add a value.
+
+        Parameters
+        ----------
+        timestamp : `float`
+            The time of the value (seconds). Times should not decrease.
+        value : `float`
+            The value.
+        """
+        self._values.append((timestamp, value))
+        delta = value - self.mean
+        self.mean += delta / len(self._values)
+        self._m2 += delta * (value - self.mean)
+        while self._minima and self._minima[-1][1] >= value:
+            self._minima.pop()
+        self._minima.append((timestamp, value))
+        while self._maxima and self._maxima[-1][1] <= value:
+            self._maxima.pop()
+        self._maxima.append((timestamp, value))
+
+        oldest_allowed = timestamp - self.duration
+        while self._values[0][0] < oldest_allowed:
+            self._remove()
+
+    @property
+    def variance(self):
+        """The sample variance, or NaN with fewer than two values."""
+        if len(self._values) < 2:
+            return math.nan
+        return max(self._m2, 0.0) / (len(self._values) - 1)
+
+    @property
+    def min(self):
+        """The minimum, or NaN if the window is empty."""
+        return self._minima[0][1] if self._minima else math.nan
+
+    @property
+    def max(self):
+        """The maximum, or NaN if the window is empty."""
+        return self._maxima[0][1] if self._maxima else math.nan
+
+    def _remove(self):
+        timestamp, value = self._values.popleft()
+        if self._values:
+            delta = value - self.mean
+            self.mean -= delta / len(self._values)
+            self._m2 -= delta * (value - self.mean)
+        else:
+            self.mean = 0.0
+            self._m2 = 0.0
+        if self._minima[0][0] <= timestamp:
+            self._minima.popleft()
+        if self._maxima[0][0] <= timestamp:
+            self._maxima.popleft()
+
+
+class SeeingStatistics:
+    """Streaming summaries of the published dome seeing.
+
+    For each field in `SEEING_STATISTICS_FIELDS` the mean, standard
+    deviation, minimum and maximum are kept over each rolling window, and
+    the median and 90th percentile are estimated over the observing night
+    (see `get_night`) of the newest row. Every update is O(1).
+
+    The rows are timestamped in TAI, so they are converted to UTC to find
+    their night, as the night changes at a fixed UTC time.
+
+    Parameters
+    ----------
+    windows : `list` [`float`]
+        The lengths of the rolling windows (seconds).
+
+    Attributes
+    ----------
+    count : `int`
+        The number of rows added during the night.
+    night : `str` or `None`
+        The observing night of the newest row, as YYYYMMDD.
+    """
+
+    def __init__(self, windows):
+        self.windows = tuple(windows)
+        self._windows = {
+            name: [RollingWindow(duration) for duration in self.windows]
+            for name in SEEING_STATISTICS_FIELDS
+        }
+        self.reset()
+
+    def add(self, row):
+        """Add a published row.
+
+        Parameters
+        ----------
+        row : `dict`
+            The domeSeeing fields of the row.
+        """
+        timestamp = row["timestampCurrent"]
+        if timestamp >= self._night_end:
+            self.reset()
+            utc = utc_from_tai_unix(timestamp)
+            self.night = get_night(utc)
+            self._night_end = tai_from_utc_unix(get_night_end(utc))
+        self.count += 1
+        for name in SEEING_STATISTICS_FIELDS:
+            value = row[name]
+            for window in self._windows[name]:
+                window.add(timestamp, value)
+            for quantile in self._quantiles[name]:
+                quantile.add(value)
+
+    def reset(self):
+        """Start a new night.
+
+        The quantiles start again from the next row. The rolling windows
+        keep their rows, as they drop old rows themselves.
+        """
+        self.count = 0
+        self.night = None
+        self._night_end = -math.inf
+        self._quantiles = {
+            name: [P2Quantile(p) for p in QUANTILES]
+            for name in SEEING_STATISTICS_FIELDS
+        }
+
+    def summary(self):
+        """Summarize the statistics.
+
+        Returns
+        -------
+        summary : `dict`
+            For each field, ``windows`` maps each window length to the
+            ``count``, ``mean``, ``std``, ``min`` and ``max`` of its values,
+            and ``p50`` and ``p90`` are the estimated quantiles over the
+            night (`None` if there are none). ``count`` is the number of
+            rows and ``night`` the night, as in the attributes.
+        """
+        summary = dict(count=self.count, night=self.night)
+        for name in SEEING_STATISTICS_FIELDS:
+            windows = dict()
+            for window in self._windows[name]:
+                windows[window.duration] = dict(
+                    count=len(window),
+                    mean=window.mean if len(window) else math.nan,
+                    std=math.sqrt(window.variance),
+                    min=window.min,
+                    max=window.max,
+                )
+            summary[name] = dict(
+                windows=windows,
+                **{
+                    f"p{round(100 * quantile.p)}": quantile.value
+                    for quantile in self._quantiles[name]
+                },
+            )
+        return summary
+
+    def format_summary(self):
+        """Format the summary for the CSC log.
+
+        Returns
+        -------
+        `str`
+            One line with the quantiles of each field and its mean and
+            standard deviation over the shortest window.
+        """
+        summary = self.summary()
+        items = []
+        for name in SEEING_STATISTICS_FIELDS:
+            stats = summary[name]
+            if stats["p50"] is None:
+                continue
+            window = stats["windows"][min(self.windows)]
+            items.append(
+                f"{name} p50 {stats['p50']:.3f} p90 {stats['p90']:.3f} "
+                f"mean {window['mean']:.3f} std {window['std']:.3f}"
+            )
+        return (
+            f"Seeing over {summary['count']} rows of night {summary['night']}: "
+            + (", ".join(items) if items else "no data")
+            + f" (mean/std over {min(self.windows):g} s)"
+        )
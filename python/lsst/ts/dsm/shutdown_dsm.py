@@ -1,33 +1,171 @@
 import argparse
 import asyncio
+import sys
 
-from lsst.ts import salobj
+__all__ = ["set_summary_states", "shutdown_dsm"]
 
-__all__ = ["shutdown_dsm"]
+# Seconds each CSC has to reach the requested state.
+DEFAULT_TIMEOUT = 30
 
+# Seconds to listen for heartbeats when looking for running CSCs; salobj
+# CSCs send one every second.
+DISCOVERY_TIME = 3
 
-async def shutdown(opts):
-    end_state = getattr(salobj.State, opts.state.upper())
 
-    domain = salobj.Domain()
+async def discover_indices(domain, discovery_time=DISCOVERY_TIME):
+    """Find the indices of the running DSM CSCs from their heartbeats.
+
+    Parameters
+    ----------
+    domain : `lsst.ts.salobj.Domain`
+        The domain to listen in.
+    discovery_time : `float`, optional
+        Seconds to listen for heartbeats.
+
+    Returns
+    -------
+    indices : `list` [`int`]
+        The indices heard from, in increasing order.
+    """
+    from lsst.ts import salobj
+
+    indices = set()
+    remote = salobj.Remote(domain=domain, name="DSM", index=0, include=["heartbeat"])
     try:
-        remote = salobj.Remote(domain=domain, name="DSM", index=opts.index)
         await remote.start_task
-        await salobj.set_summary_state(remote, end_state)
+        remote.evt_heartbeat.callback = lambda data: indices.add(data.salIndex)
+        await asyncio.sleep(discovery_time)
     finally:
-        await domain.close()
+        await remote.close()
+    return sorted(indices)
+
+
+async def set_summary_states(
+    state,
+    indices=None,
+    timeout=DEFAULT_TIMEOUT,
+    discovery_time=DISCOVERY_TIME,
+    domain=None,
+):
+    """Send several DSM CSCs to a summary state at once.
+
+    All CSCs are commanded concurrently through one domain, each with its
+    own timeout, so one CSC that does not answer does not hold up the
+    others.
+
+    Parameters
+    ----------
+    state : `lsst.ts.salobj.State`
+        The state to send the CSCs to.
+    indices : `list` [`int`], optional
+        The indices of the CSCs. If `None` every CSC sending heartbeats is
+        commanded; see `discover_indices`.
+    timeout : `float`, optional
+        Seconds each CSC has to reach the state.
+    discovery_time : `float`, optional
+        Seconds to listen for heartbeats if ``indices`` is `None`.
+    domain : `lsst.ts.salobj.Domain`, optional
+        The domain to use. If `None` one is made and closed when done.
+
+    Returns
+    -------
+    results : `dict` [`int`, `str` or `None`]
+        For each index, `None` if the CSC reached the state, otherwise why
+        it did not.
+    """
+    from lsst.ts import salobj
+
+    async def set_state(index):
+        remote = salobj.Remote(
+            domain=domain, name="DSM", index=index, include=["summaryState"]
+        )
+
+        async def start_and_set_state():
+            await remote.start_task
+            await salobj.set_summary_state(remote, state, timeout=timeout)
+
+        try:
+            await asyncio.wait_for(start_and_set_state(), timeout=timeout)
+            return None
+        except asyncio.TimeoutError:
+            return f"no answer within {timeout} s"
+        except Exception as error:
+            return str(error) or repr(error)
+        finally:
+            await remote.close()
+
+    owns_domain = domain is None
+    if owns_domain:
+        domain = salobj.Domain()
+    try:
+        if indices is None:
+            indices = await discover_indices(domain, discovery_time)
+        results = await asyncio.gather(*[set_state(index) for index in indices])
+    finally:
+        if owns_domain:
+            await domain.close()
+    return dict(zip(indices, results))
+
+
+def format_report(results, state_name):
+    """Format the results of `set_summary_states`, one line per CSC plus
+    a total.
+    """
+    lines = [
+        f"DSM {index}: {state_name}" if error is None else f"DSM {index}: {error}"
+        for index, error in sorted(results.items())
+    ]
+    num_ok = sum(error is None for error in results.values())
+    lines.append(f"{num_ok} of {len(results)} DSMs reached {state_name}.")
+    return "\n".join(lines)
 
 
 def shutdown_dsm():
-    parser = argparse.ArgumentParser(description="Shutdown the DSM CSC.")
+    parser = argparse.ArgumentParser(
+        description="Shutdown DSM CSCs, all at once if there are several."
+    )
     parser.add_argument(
-        "index",
+        "indices",
+        nargs="*",
         type=int,
-        help="SAL index; Must match the index to the running process you wish to terminate.",
+        help="SAL indices; Must match the indices of the running processes "
+        "you wish to terminate.",
     )
     parser.add_argument(
-        "--state", choices=["standby", "offline"], help="Set the shutdown state."
+        "--all",
+        action="store_true",
+        help="Shut down every DSM CSC that is sending heartbeats.",
+    )
+    parser.add_argument(
+        "--state",
+        choices=["standby", "offline"],
+        required=True,
+        help="Set the shutdown state.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Seconds each CSC has to reach the state.",
     )
     args = parser.parse_args()
+    if args.all == bool(args.indices):
+        parser.error("Specify either some indices or --all.")
+    if len(set(args.indices)) != len(args.indices):
+        parser.error(f"indices={args.indices} has duplicates.")
 
-    asyncio.run(shutdown(args))
+    # Imported here so the arguments are checked without loading salobj.
+    from lsst.ts import salobj
+
+    state = salobj.State[args.state.upper()]
+    results = asyncio.run(
+        set_summary_states(
+            state, indices=None if args.all else args.indices, timeout=args.timeout
+        )
+    )
+    if not results:
+        print("No DSM CSCs found.")
+        sys.exit(1)
+    print(format_report(results, state.name))
+    if any(error is not None for error in results.values()):
+        sys.exit(1)
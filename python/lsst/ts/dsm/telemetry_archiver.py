@@ -0,0 +1,335 @@
+import asyncio
+import concurrent.futures
+import os
+import re
+import time
+import zipfile
+
+from lsst.ts import utils as tsUtils
+
+from .utils import get_night
+
+__all__ = [
+    "BundleWriter",
+    "TelemetryArchiver",
+    "archive_files",
+    "prune_archive",
+]
+
+# Seconds between checks for bundles older than the retention time.
+PRUNE_INTERVAL = 3600
+
+
+class BundleWriter:
+    """Move telemetry files into compressed per-night bundles, keeping the
+    bundle of the latest night open.
+
+    Each file is added to the ZIP bundle ``<prefix>_<night>.zip`` of the
+    night it was written. Opening a bundle to append reads its whole
+    directory and closing it writes the directory again, so the bundle is
+    kept open until a file of another night is added or `close` is
+    called. The files are only deleted once their bundle has been closed,
+    so they are never lost. A file already in its bundle, e.g. because a
+    crash interrupted an earlier run, is only deleted. A bundle that cannot
+    be read, e.g. because a crash interrupted appending to it, is renamed
+    with a ``.corrupt`` suffix and a new one is started.
+
+    This does blocking I/O and is not thread safe, so the CSC only uses it
+    in one worker thread.
+
+    Parameters
+    ----------
+    archive_directory : `str`
+        The directory holding the bundles.
+    prefix : `str`
+        The start of the bundle names.
+
+    Attributes
+    ----------
+    night : `str` or `None`
+        The night of the open bundle, as YYYYMMDD, or `None` if no bundle
+        is open.
+    added : `list`
+        The files added to the open bundle, which are deleted once it is
+        closed.
+    """
+
+    def __init__(self, archive_directory, prefix):
+        self.archive_directory = archive_directory
+        self.prefix = prefix
+        self.night = None
+        self.added = []
+        self._archive = None
+        self._names = set()
+
+    def add(self, filenames):
+        """Add files to the bundles of their nights.
+
+        Parameters
+        ----------
+        filenames : `list` [`str` or `pathlib.Path`]
+            The files to archive.
+
+        Returns
+        -------
+        archived : `list`
+            The files that have been archived, because a bundle was closed,
+            or that no longer exist.
+        errors : `list` [`tuple`]
+            Each file that could not be archived and the exception.
+        """
+        by_night = dict()
+        archived = []
+        errors = []
+        for filename in filenames:
+            try:
+                mtime = os.stat(filename).st_mtime
+            except FileNotFoundError:
+                archived.append(filename)
+                continue
+            by_night.setdefault(get_night(mtime), []).append(filename)
+
+        for night, night_files in sorted(by_night.items()):
+            if night != self.night:
+                archived += self.close()
+                self._open(night)
+            for filename in night_files:
+                name = os.path.basename(filename)
+                try:
+                    if name not in self._names:
+                        self._archive.write(filename, arcname=name)
+                        self._names.add(name)
+                    self.added.append(filename)
+                except OSError as error:
+                    errors.append((filename, error))
+        return archived, errors
+
+    def close(self):
+        """Close the open bundle, if any, and delete the files added to it.
+
+        Returns
+        -------
+        archived : `list`
+            The files deleted.
+        """
+        if self._archive is None:
+            return []
+        self._archive.close()
+        self._archive = None
+        self.night = None
+        self._names = set()
+        archived = []
+        for filename in dict.fromkeys(self.added):
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+            archived.append(filename)
+        self.added = []
+        return archived
+
+    def _open(self, night):
+        bundle = os.path.join(self.archive_directory, f"{self.prefix}_{night}.zip")
+        if os.path.exists(bundle):
+            # Appending to a bundle that cannot be read would start a new
+            # archive after it, hiding the files already in it. A crash
+            # while appending can leave one whose end record is intact,
+            # so its directory is read.
+            try:
+                with zipfile.ZipFile(bundle):
+                    pass
+            except zipfile.BadZipFile:
+                self._set_aside(bundle)
+        self._archive = zipfile.ZipFile(bundle, "a", compression=zipfile.ZIP_DEFLATED)
+        self._names = set(self._archive.namelist())
+        self.night = night
+
+    def _set_aside(self, bundle):
+        """Rename a bundle that cannot be read, keeping it for manual
+        recovery.
+        """
+        os.replace(bundle, f"{bundle}.corrupt.{int(time.time())}")
+
+
+def archive_files(archive_directory, prefix, filenames):
+    """Move telemetry files into compressed per-night bundles.
+
+    The files are added with a `BundleWriter`, which is then closed.
+
+    Parameters
+    ----------
+    archive_directory : `str`
+        The directory holding the bundles.
+    prefix : `str`
+        The start of the bundle names.
+    filenames : `list` [`str` or `pathlib.Path`]
+        The files to archive.
+
+    Returns
+    -------
+    archived : `list`
+        The files that have been archived or no longer exist.
+    errors : `list` [`tuple`]
+        Each file that could not be archived and the exception.
+    """
+    writer = BundleWriter(archive_directory, prefix)
+    try:
+        archived, errors = writer.add(filenames)
+    finally:
+        archived_on_close = writer.close()
+    return archived + archived_on_close, errors
+
+
+def prune_archive(archive_directory, prefix, retention, now=None):
+    """Delete bundles of nights older than the retention time.
+
+    Parameters
+    ----------
+    archive_directory : `str`
+        The directory holding the bundles.
+    prefix : `str`
+        The start of the bundle names.
+    retention : `float`
+        Bundles of nights that ended more than this many seconds ago are
+        deleted.
+    now : `float`, optional
+        The current Unix time. If `None` use the system clock.
+
+    Returns
+    -------
+    `list` [`str`]
+        The deleted bundles.
+    """
+    now = time.time() if now is None else now
+    oldest_night = get_night(now - retention)
+    pattern = re.compile(rf"{re.escape(prefix)}_(\d{{8}})\.zip$")
+    removed = []
+    with os.scandir(archive_directory) as entries:
+        for entry in entries:
+            match = pattern.match(entry.name)
+            if match is not None and match.group(1) < oldest_night:
+                os.remove(entry.path)
+                removed.append(entry.path)
+    return sorted(removed)
+
+
+class TelemetryArchiver:
+    """Move published telemetry files into compressed per-night bundles,
+    without blocking the event loop.
+
+    Files are archived in batches by a task that calls `archive_files` in
+    a dedicated worker thread, so archiving never competes with parsing.
+    Each bundle is closed at the end of the batch, so a crash can only
+    damage the bundle being written and the files of the batch are still
+    in the telemetry directory. A batch that fails stays queued and is
+    tried again with the next one.
+
+    Parameters
+    ----------
+    archive_directory : `str`
+        The directory holding the bundles. It is created if needed.
+    prefix : `str`
+        The start of the bundle names, e.g. ``dsm1``.
+    log : `logging.Logger`
+        Logger for archiving errors.
+    retention : `float`, optional
+        Bundles of nights older than this many seconds are deleted. If
+        `None` bundles are kept forever.
+    archived_callback : `callable`, optional
+        Function called with each file once it has been archived and
+        deleted.
+
+    Attributes
+    ----------
+    num_archived : `int`
+        The number of files archived.
+    """
+
+    def __init__(
+        self, archive_directory, prefix, log, retention=None, archived_callback=None
+    ):
+        os.makedirs(archive_directory, exist_ok=True)
+        self.archive_directory = archive_directory
+        self.prefix = prefix
+        self.retention = retention
+        self.log = log
+        self.archived_callback = archived_callback
+        self.num_archived = 0
+        self.pending = dict()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="dsm_archive"
+        )
+        self.archive_task = tsUtils.make_done_future()
+        self._has_pending = asyncio.Event()
+        self._last_prune_time = 0
+
+    def add(self, filename):
+        """Queue a file to be archived.
+
+        Parameters
+        ----------
+        filename : `str` or `pathlib.Path`
+            A telemetry file that has been completely published.
+        """
+        self.pending[filename] = None
+        self._has_pending.set()
+        if self.archive_task.done():
+            self.archive_task = asyncio.create_task(self.archive_loop())
+
+    async def archive_loop(self):
+        """Archive the queued files in batches."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._has_pending.wait()
+            self._has_pending.clear()
+            filenames = list(self.pending)
+            try:
+                archived, errors = await loop.run_in_executor(
+                    self.executor,
+                    archive_files,
+                    self.archive_directory,
+                    self.prefix,
+                    filenames,
+                )
+            except Exception:
+                self.log.exception(f"Failed to archive {len(filenames)} files.")
+                continue
+            for filename in filenames:
+                self.pending.pop(filename, None)
+            for filename, error in errors:
+                self.log.warning(f"Could not archive {filename}: {error!r}")
+            self._finish(archived)
+
+            now = time.time()
+            if (
+                self.retention is not None
+                and now > self._last_prune_time + PRUNE_INTERVAL
+            ):
+                self._last_prune_time = now
+                try:
+                    removed = await loop.run_in_executor(
+                        self.executor,
+                        prune_archive,
+                        self.archive_directory,
+                        self.prefix,
+                        self.retention,
+                    )
+                except OSError as error:
+                    self.log.warning(f"Could not prune old bundles: {error!r}")
+                else:
+                    for bundle in removed:
+                        self.log.info(f"Deleted archive bundle {bundle}.")
+
+    async def close(self):
+        """Stop archiving. Files still queued stay where they are and are
+        archived after the next start.
+        """
+        self.archive_task.cancel()
+        self.executor.shutdown(wait=False)
+
+    def _finish(self, archived):
+        """Count archived files and report them to the callback."""
+        self.num_archived += len(archived)
+        if self.archived_callback is not None:
+            for filename in archived:
+                self.archived_callback(filename)
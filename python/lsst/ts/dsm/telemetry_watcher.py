@@ -0,0 +1,450 @@
+import asyncio
+import collections
+import os
+import pathlib
+import time
+
+import asyncinotify
+from lsst.ts import utils as tsUtils
+
+__all__ = [
+    "PollingTelemetryWatcher",
+    "PollingWatch",
+    "TelemetryWatcher",
+    "WATCHER_BACKENDS",
+    "WatchEvent",
+    "make_telemetry_watcher",
+]
+
+# Default watcher backend; can be overridden by $DSM_WATCHER.
+DEFAULT_WATCHER_BACKEND = "inotify"
+
+# Limits of the adaptive poll interval of the polling watcher (seconds).
+# The interval doubles after every pass that finds no change and drops back
+# to the minimum as soon as one does.
+MIN_POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 1.0
+
+# Seconds a polled file must keep the same size and modification time before
+# it is reported as finished; can be overridden by $DSM_POLL_QUIET_TIME.
+# File servers cache file attributes, so a single unchanged poll does not
+# mean the writer is done.
+DEFAULT_POLL_QUIET_TIME = 1.0
+
+# A polled file is stat-ed on every pass until it has not changed for this
+# many seconds; after that it is only looked at again by a full scan.
+HOT_FILE_TIME = 60
+
+# Seconds between full scans of a polled directory, which also catch files
+# that changed long after they were last written.
+FULL_SCAN_INTERVAL = 30
+
+# A polled directory is listed on every pass while its modification time is
+# less than this many seconds old, since file servers may only store the
+# time to the second and their clocks may differ from ours.
+DIR_MTIME_SLACK = 5
+
+
+class TelemetryWatcher:
+    """Watch the telemetry directories of one or more CSCs with a single
+    inotify instance.
+
+    One task reads the inotify events and hands each one to the queue of the
+    watch it belongs to, so CSCs sharing the watcher do not hold up each
+    other. An overflow of the kernel event queue is not tied to any watch
+    and is reported to all of them.
+    """
+
+    def __init__(self):
+        self.notifier = asyncinotify.Inotify()
+        self.event_queues = dict()
+        self.read_task = tsUtils.make_done_future()
+
+    async def add_watch(self, path, mask):
+        """Start watching a directory.
+
+        Parameters
+        ----------
+        path : `str`
+            The directory to watch.
+        mask : `asyncinotify.Mask`
+            The events to report.
+
+        Returns
+        -------
+        watch : `asyncinotify.Watch`
+            The new watch.
+        events : `asyncio.Queue`
+            The queue the events of the watch are put on.
+
+        Raises
+        ------
+        ValueError
+            If the directory is already watched.
+        """
+        watch = self.notifier.add_watch(path=path, mask=mask)
+        if watch in self.event_queues:
+            raise ValueError(f"{path} is already watched.")
+        events = asyncio.Queue()
+        self.event_queues[watch] = events
+        if self.read_task.done():
+            self.read_task = asyncio.create_task(self.read_loop())
+        return watch, events
+
+    def close(self):
+        """Stop watching all directories."""
+        self.read_task.cancel()
+        for watch in list(self.event_queues):
+            self.rm_watch(watch)
+        self.notifier.close()
+
+    async def read_loop(self):
+        """Read inotify events and put them on the queue of their watch."""
+        async for event in self.notifier:
+            if event.mask & asyncinotify.Mask.Q_OVERFLOW:
+                for events in self.event_queues.values():
+                    events.put_nowait(event)
+            elif event.watch in self.event_queues:
+                self.event_queues[event.watch].put_nowait(event)
+
+    def rm_watch(self, watch):
+        """Stop watching a directory.
+
+        Parameters
+        ----------
+        watch : `asyncinotify.Watch`
+            The watch returned by `add_watch`.
+        """
+        if self.event_queues.pop(watch, None) is None:
+            return
+        try:
+            self.notifier.rm_watch(watch)
+        except OSError:
+            # The directory has already been removed.
+            pass
+
+
+class WatchEvent(
+    collections.namedtuple("WatchEvent", ["mask", "path", "name", "watch"])
+):
+    """A file event found by `PollingTelemetryWatcher`, with the same
+    fields the CSC uses from `asyncinotify.Event`.
+
+    Parameters
+    ----------
+    mask : `asyncinotify.Mask`
+        ``CLOSE_WRITE`` when a file has stopped changing, ``MODIFY`` when it
+        has changed and ``DELETE`` when it is gone.
+    path : `pathlib.Path`
+        The full path of the file.
+    name : `pathlib.Path`
+        The name of the file in the watched directory.
+    watch : `PollingWatch`
+        The watch that found the event.
+    """
+
+    __slots__ = ()
+
+
+class PollingWatch:
+    """A directory watched by `PollingTelemetryWatcher`.
+
+    Parameters
+    ----------
+    path : `str`
+        The directory to watch.
+    mask : `asyncinotify.Mask`
+        The events to report.
+    quiet_time : `float`, optional
+        Seconds a file must stay unchanged to be reported as finished.
+
+    Attributes
+    ----------
+    files : `dict`
+        For each file name, its size and modification time in nanoseconds,
+        whether its current state has been reported as finished and when it
+        last changed (monotonic seconds).
+    hot_files : `set` [`str`]
+        The files that changed in the last `HOT_FILE_TIME` seconds.
+    has_pending : `bool`
+        Are any files still changing?
+    num_stats : `int`
+        The number of files stat-ed, a measure of the polling cost.
+    """
+
+    def __init__(self, path, mask, quiet_time=DEFAULT_POLL_QUIET_TIME):
+        self.path = pathlib.Path(path)
+        self.mask = mask
+        self.quiet_time = quiet_time
+        self.files = dict()
+        self.hot_files = set()
+        self.has_pending = False
+        self.dir_mtime_ns = None
+        self.last_full_scan = time.monotonic()
+        self.num_stats = 0
+
+    def scan(self, full=False):
+        """Compare the directory with the index and update the index.
+
+        This does blocking I/O, so the watcher runs it in a worker thread.
+        The directory is only listed if its modification time changed or is
+        recent, since files were created or removed then, or if ``full``. Only
+        files that changed recently are stat-ed on every call, so the cost
+        of a call does not grow with the number of older files.
+
+        Parameters
+        ----------
+        full : `bool`, optional
+            List the directory and stat every file?
+
+        Returns
+        -------
+        `list` [`WatchEvent`]
+            The events found.
+        """
+        now = time.monotonic()
+        if full:
+            self.last_full_scan = now
+        dir_mtime_ns = os.stat(self.path).st_mtime_ns
+        to_stat = set()
+        events = []
+        if (
+            full
+            or dir_mtime_ns != self.dir_mtime_ns
+            or time.time() - dir_mtime_ns / 1e9 < DIR_MTIME_SLACK
+        ):
+            self.dir_mtime_ns = dir_mtime_ns
+            names = set()
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            names.add(entry.name)
+                    except OSError:
+                        continue
+            for name in self.files.keys() - names:
+                self._forget(name, events)
+            to_stat = names if full else names - self.files.keys()
+        self.hot_files = {
+            name for name in self.hot_files if now - self.files[name][3] < HOT_FILE_TIME
+        }
+        to_stat |= self.hot_files
+
+        for name in to_stat:
+            try:
+                stat = os.stat(self.path / name)
+            except FileNotFoundError:
+                if name in self.files:
+                    self._forget(name, events)
+                continue
+            self.num_stats += 1
+            state = (stat.st_size, stat.st_mtime_ns)
+            previous = self.files.get(name)
+            if previous is None or previous[:2] != state:
+                self.files[name] = (*state, False, now)
+                self.hot_files.add(name)
+                if self.mask & asyncinotify.Mask.MODIFY:
+                    events.append(self._event(asyncinotify.Mask.MODIFY, name))
+            elif not previous[2] and now - previous[3] >= self.quiet_time:
+                # Unchanged for long enough that the writer is done.
+                self.files[name] = (*state, True, previous[3])
+                if self.mask & asyncinotify.Mask.CLOSE_WRITE:
+                    events.append(self._event(asyncinotify.Mask.CLOSE_WRITE, name))
+        self.has_pending = any(not self.files[name][2] for name in self.hot_files)
+        return events
+
+    def seed(self):
+        """Index the files already in the directory without reporting them.
+
+        This does blocking I/O.
+        """
+        self.dir_mtime_ns = os.stat(self.path).st_mtime_ns
+        self.last_full_scan = time.monotonic()
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        self.files[entry.name] = (
+                            stat.st_size,
+                            stat.st_mtime_ns,
+                            True,
+                            self.last_full_scan,
+                        )
+                except OSError:
+                    continue
+
+    def _forget(self, name, events):
+        """Remove a file that is gone from the index, and report it."""
+        del self.files[name]
+        self.hot_files.discard(name)
+        if self.mask & asyncinotify.Mask.DELETE:
+            events.append(self._event(asyncinotify.Mask.DELETE, name))
+
+    def _event(self, mask, name):
+        return WatchEvent(
+            mask=mask, path=self.path / name, name=pathlib.Path(name), watch=self
+        )
+
+
+class PollingTelemetryWatcher:
+    """Watch telemetry directories by polling them, for file systems such as
+    NFS or CIFS where inotify does not see writes made on other hosts.
+
+    Each directory is polled by its own task, which keeps an index of the
+    size and modification time of its files and reports the differences
+    between passes as events with the same interface as
+    `TelemetryWatcher`: ``MODIFY`` when a file changed, ``CLOSE_WRITE``
+    once it has stopped changing for ``quiet_time`` and ``DELETE`` when it
+    is gone. The poll interval adapts between ``min_interval`` and
+    ``max_interval``.
+
+    Parameters
+    ----------
+    min_interval : `float`, optional
+        The shortest time between passes (seconds).
+    max_interval : `float`, optional
+        The longest time between passes (seconds).
+    quiet_time : `float`, optional
+        Seconds a file must keep the same size and modification time to be
+        reported as finished. It should be longer than the time the file
+        server caches file attributes.
+    """
+
+    def __init__(
+        self,
+        min_interval=MIN_POLL_INTERVAL,
+        max_interval=MAX_POLL_INTERVAL,
+        quiet_time=DEFAULT_POLL_QUIET_TIME,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.quiet_time = quiet_time
+        self.event_queues = dict()
+        self.poll_tasks = dict()
+
+    async def add_watch(self, path, mask):
+        """Start watching a directory.
+
+        The files already in the directory are indexed, in a worker thread,
+        but not reported.
+
+        Parameters
+        ----------
+        path : `str`
+            The directory to watch.
+        mask : `asyncinotify.Mask`
+            The events to report; only ``CLOSE_WRITE`` and ``MODIFY`` are
+            supported. A file renamed into the directory is reported like
+            one written there.
+
+        Returns
+        -------
+        watch : `PollingWatch`
+            The new watch.
+        events : `asyncio.Queue`
+            The queue the events of the watch are put on.
+
+        Raises
+        ------
+        ValueError
+            If the directory is already watched.
+        """
+        path = os.path.realpath(path)
+        if any(str(watch.path) == path for watch in self.event_queues):
+            raise ValueError(f"{path} is already watched.")
+        watch = PollingWatch(path, mask, quiet_time=self.quiet_time)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, watch.seed)
+        # Another call may have watched the directory meanwhile.
+        if any(str(other.path) == path for other in self.event_queues):
+            raise ValueError(f"{path} is already watched.")
+        events = asyncio.Queue()
+        self.event_queues[watch] = events
+        self.poll_tasks[watch] = asyncio.create_task(self.poll_loop(watch))
+        return watch, events
+
+    def close(self):
+        """Stop watching all directories."""
+        for watch in list(self.event_queues):
+            self.rm_watch(watch)
+
+    async def poll_loop(self, watch):
+        """Poll a directory and put the events found on its queue.
+
+        Parameters
+        ----------
+        watch : `PollingWatch`
+            The watch to poll.
+        """
+        loop = asyncio.get_running_loop()
+        interval = self.min_interval
+        while True:
+            await asyncio.sleep(interval)
+            full = time.monotonic() - watch.last_full_scan > FULL_SCAN_INTERVAL
+            try:
+                events = await loop.run_in_executor(None, watch.scan, full)
+            except OSError:
+                # E.g. the directory was removed or the server is away.
+                events = []
+            for event in events:
+                self.event_queues[watch].put_nowait(event)
+            if events or watch.has_pending:
+                interval = self.min_interval
+            else:
+                interval = min(2 * interval, self.max_interval)
+
+    def rm_watch(self, watch):
+        """Stop watching a directory.
+
+        Parameters
+        ----------
+        watch : `PollingWatch`
+            The watch returned by `add_watch`.
+        """
+        if self.event_queues.pop(watch, None) is None:
+            return
+        self.poll_tasks.pop(watch).cancel()
+
+
+# The watcher backends, by the names used in $DSM_WATCHER.
+WATCHER_BACKENDS = dict(inotify=TelemetryWatcher, polling=PollingTelemetryWatcher)
+
+
+def make_telemetry_watcher(backend=None):
+    """Make a telemetry watcher.
+
+    Parameters
+    ----------
+    backend : `str`, optional
+        The name of a backend in `WATCHER_BACKENDS`. If `None` use
+        ``$DSM_WATCHER``, or inotify if that is not set.
+
+    The quiet time of the polling watcher is ``$DSM_POLL_QUIET_TIME``, or
+    `DEFAULT_POLL_QUIET_TIME` if that is not set.
+
+    Returns
+    -------
+    `TelemetryWatcher` or `PollingTelemetryWatcher`
+        The new watcher.
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown.
+    """
+    if backend is None:
+        backend = os.environ.get("DSM_WATCHER", DEFAULT_WATCHER_BACKEND)
+    try:
+        watcher_class = WATCHER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown watcher backend {backend!r}; must be one of {sorted(WATCHER_BACKENDS)}."
+        )
+    if watcher_class is PollingTelemetryWatcher:
+        return watcher_class(
+            quiet_time=float(
+                os.environ.get("DSM_POLL_QUIET_TIME", DEFAULT_POLL_QUIET_TIME)
+            )
+        )
+    return watcher_class()
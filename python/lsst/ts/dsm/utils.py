@@ -1,32 +1,304 @@
+import calendar
+import collections
 import csv
+import dataclasses
+import datetime
+import functools
+import gzip
+import hashlib
 import os
+import pathlib
+import re
+import time
+import zlib
 
+import erfa
 import numpy as np
 import yaml
-from astropy.time import Time, TimeDelta
 from lsst.ts import utils as tsUtils
 
-__all__ = ["convert_time", "create_telemetry_config", "create_telemetry_data"]
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
+# Errors raised when decompressing a truncated or corrupt telemetry file.
+# Other OSErrors, e.g. for a file that is gone, are not about its content.
+DECOMPRESSION_ERRORS = (gzip.BadGzipFile, EOFError, zlib.error) + (
+    () if zstandard is None else (zstandard.ZstdError,)
+)
 
+__all__ = [
+    "BINARY_DAT_DTYPE",
+    "BINARY_DAT_SUFFIX",
+    "BINARY_DAT_VERSION",
+    "COMPRESSED_DAT_SUFFIXES",
+    "CONVERT_TIME_CACHE_SIZE",
+    "DAT_COLUMNS",
+    "DAT_VALUE_LIMITS",
+    "DOME_SEEING_DTYPE",
+    "NIGHT_OFFSET",
+    "TELEMETRY_CONFIG_KEYS",
+    "TelemetryData",
+    "YAML_LOADER",
+    "convert_time",
+    "convert_times",
+    "create_telemetry_config",
+    "create_telemetry_data",
+    "get_night",
+    "get_night_end",
+    "is_binary_data_file",
+    "is_compressed_data_file",
+    "is_data_file",
+    "iter_compressed_telemetry_data",
+    "parse_telemetry_config",
+    "parse_telemetry_lines",
+    "read_binary_telemetry_data",
+    "read_changed_telemetry_config",
+    "read_telemetry_config",
+    "read_telemetry_data",
+    "scan_telemetry_directory",
+    "tai_from_utc_unix",
+    "utc_from_tai_unix",
+    "validate_binary_records",
+    "validate_telemetry_config",
+    "write_binary_telemetry_data",
+]
+
+# The libyaml loader is several times faster than the pure-Python one,
+# but PyYAML may be built without it.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# The keys of a DSM UI configuration: the top-level scalars map to `None`
+# and the sections to the keys they must have.
+TELEMETRY_CONFIG_KEYS = dict(
+    timestamp=None,
+    ui_versions=("code", "config", "config_file"),
+    camera=("name", "fps"),
+    data=("buffer_size", "acquisition_time"),
+)
+
+# Compressed telemetry files the DSM UI may write. Reading .dat.zst files
+# needs the optional zstandard package.
+COMPRESSED_DAT_SUFFIXES = (".dat.gz", ".dat.zst")
+
+# Size of the blocks read from compressed telemetry files, in bytes of
+# decompressed data.
+DECOMPRESSED_CHUNK_SIZE = 1 << 20
+
+# Maximum number of time strings remembered by convert_time.
+CONVERT_TIME_CACHE_SIZE = 4096
+
+# Julian Date of the Unix epoch, used to turn TAI Julian Dates into
+# TAI seconds since 1970-01-01T00:00:00.
+UNIX_EPOCH_JD = 2440587.5
+SECONDS_PER_DAY = 86400
+
+# The observing night of a time is the UTC date 12 hours earlier, so a whole
+# night has one date.
+NIGHT_OFFSET = 12 * 3600
+
+# Leap seconds are integral from 1972 onwards, so the TAI-UTC offset only
+# changes on day boundaries and can be looked up once per day.
+FIRST_INTEGRAL_LEAP_SECOND_YEAR = 1972
+
+# The columns of a DSM UI telemetry (DAT) file, named after the domeSeeing
+# topic fields they are published as.
+DAT_TIME_COLUMNS = (
+    "timestampCurrent",
+    "timestampFirstMeasurement",
+    "timestampLastMeasurement",
+)
+DAT_VALUE_COLUMNS = ("rmsX", "rmsY", "centroidX", "centroidY", "flux", "maxADC", "fwhm")
+DAT_COLUMNS = DAT_TIME_COLUMNS + DAT_VALUE_COLUMNS
+DOME_SEEING_DTYPE = np.dtype([(name, np.float64) for name in DAT_COLUMNS])
+# How DAT columns are read before the timestamps are converted.
+DAT_TEXT_DTYPE = np.dtype(
+    [(name, "S64") for name in DAT_TIME_COLUMNS]
+    + [(name, np.float64) for name in DAT_VALUE_COLUMNS]
+)
+
+# Binary telemetry files hold fixed-size little-endian records of the
+# domeSeeing fields, with the timestamps already TAI unix seconds, after a
+# header identifying the format. The header gives its own size and the
+# record size, so later versions can extend both.
+BINARY_DAT_SUFFIX = ".dsmb"
+BINARY_DAT_MAGIC = b"DSMB"
+BINARY_DAT_VERSION = 1
+BINARY_DAT_DTYPE = np.dtype([(name, "<f8") for name in DAT_COLUMNS])
+BINARY_HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", "<u2"),
+        ("header_size", "<u2"),
+        ("record_size", "<u4"),
+        ("num_fields", "<u4"),
+    ]
+)
+
+# Inclusive limits of the measurements; rows outside these are rejected.
+DAT_VALUE_LIMITS = dict(
+    rmsX=(0, np.inf),
+    rmsY=(0, np.inf),
+    centroidX=(-np.inf, np.inf),
+    centroidY=(-np.inf, np.inf),
+    flux=(0, np.inf),
+    maxADC=(0, np.inf),
+    fwhm=(0, np.inf),
+)
+
+# Longest ISO time string handled without astropy (microsecond resolution
+# plus some slack for more fraction digits).
+ISO_TIME_MAX_LENGTH = 32
+
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+ISO_TIME_REGEX = re.compile(
+    r"(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})"
+    r"[T ](?P<hour>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2})"
+    r"(?P<fraction>\.\d+)?$"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _tai_minus_utc(year, month, day):
+    """Return TAI-UTC in seconds for the given UTC date.
+
+    Parameters
+    ----------
+    year : `int`
+        The UTC year.
+    month : `int`
+        The UTC month.
+    day : `int`
+        The UTC day of month.
+
+    Returns
+    -------
+    `int`
+        The number of seconds TAI is ahead of UTC on that date.
+    """
+    return int(erfa.dat(year, month, day, 0.0))
+
+
+@functools.lru_cache(maxsize=None)
+def _is_leap_second_day(year, month, day):
+    """Does the given UTC date end with a leap second?"""
+    next_day = datetime.date(year, month, day) + datetime.timedelta(days=1)
+    return _tai_minus_utc(next_day.year, next_day.month, next_day.day) > _tai_minus_utc(
+        year, month, day
+    )
+
+
+def _iso_fields_in_range(year, month, day, hour, minute, second):
+    """Are the fields of an ISO UTC time string a valid time?
+
+    A second of 60 is only valid in the leap second at the end of a day.
+    """
+    if not 1 <= month <= 12 or not 1 <= day <= calendar.monthrange(year, month)[1]:
+        return False
+    if hour >= 24 or minute >= 60 or second > 60:
+        return False
+    return second < 60 or (
+        hour == 23 and minute == 59 and _is_leap_second_day(year, month, day)
+    )
+
+
+@functools.lru_cache(maxsize=CONVERT_TIME_CACHE_SIZE)
 def convert_time(in_time):
     """Convert an ISO UTC timestring to TAI timestamp.
 
+    Strings of the form ``YYYY-MM-DDTHH:MM:SS[.ffffff]`` from 1972 onwards
+    whose fields are in range are converted without creating an
+    `astropy.time.Time`, which includes times inside a leap second
+    (``23:59:60.x``). Anything else, including the `datetime.datetime`
+    YAML decodes an unquoted timestamp to, falls back to
+    `astropy.time.Time`. Results are memoized, since the same timestamp
+    often appears in several fields of a telemetry row.
+
     Parameters
     ----------
-    in_time : `str`
+    in_time : `str` or `datetime.datetime`
         The time to convert.
 
     Returns
     -------
     float
         The TAI time corresponding to the input.
+
+    Raises
+    ------
+    ValueError
+        If the string is not a valid time.
     """
+    if not isinstance(in_time, str):
+        return _convert_time_with_astropy(in_time)
+    match = ISO_TIME_REGEX.match(in_time)
+    if match is None or int(match["year"]) < FIRST_INTEGRAL_LEAP_SECOND_YEAR:
+        return _convert_time_with_astropy(in_time)
+
+    year = int(match["year"])
+    month = int(match["month"])
+    day = int(match["day"])
+    hour = int(match["hour"])
+    minute = int(match["minute"])
+    second = int(match["second"])
+    if not _iso_fields_in_range(year, month, day, hour, minute, second):
+        return _convert_time_with_astropy(in_time)
+    day_start = calendar.timegm((year, month, day, 0, 0, 0))
+    seconds_of_day = 3600 * hour + 60 * minute + second
+    fraction = float(match["fraction"]) if match["fraction"] else 0.0
+    tai_seconds = day_start + seconds_of_day + _tai_minus_utc(year, month, day)
+    return tai_seconds + fraction
+
+
+def _convert_time_with_astropy(in_time):
+    """Convert an ISO UTC timestring to TAI timestamp with astropy."""
+    from astropy.time import Time
+
     ptime = Time(in_time, scale="utc")
     return tsUtils.tai_from_utc(ptime)
 
 
-def create_telemetry_config(output_dir, sim_loop_time):
+def convert_times(in_times):
+    """Convert a sequence of ISO UTC timestrings to TAI timestamps.
+
+    Strings of the form ``YYYY-MM-DDTHH:MM:SS[.ffffff]`` from 1972 onwards
+    are parsed together with array arithmetic on their characters, so this
+    is the preferred way to convert a whole column of timestamps. Any other
+    strings are converted in a single vectorized `astropy.time.Time` call.
+
+    Parameters
+    ----------
+    in_times : `list` [`str`] or `numpy.ndarray`
+        The times to convert.
+
+    Returns
+    -------
+    `numpy.ndarray`
+        The TAI times corresponding to the inputs.
+
+    Raises
+    ------
+    ValueError
+        If any of the strings is not a valid time.
+    """
+    in_times = np.asarray(in_times)
+    tai_seconds, parsed, _ = _convert_iso_times(in_times)
+    if not np.all(parsed):
+        from astropy.time import Time
+
+        unique_times, inverse = np.unique(in_times[~parsed], return_inverse=True)
+        tai = Time(unique_times.astype(str), scale="utc").tai
+        other_seconds = (tai.jd1 - UNIX_EPOCH_JD) * SECONDS_PER_DAY
+        other_seconds += tai.jd2 * SECONDS_PER_DAY
+        tai_seconds[~parsed] = other_seconds[inverse.reshape(-1)]
+    return tai_seconds
+
+
+def create_telemetry_config(
+    output_dir, sim_loop_time, camera_fps=None, data_buffer_size=None
+):
     """Create the DSM UI Configuration file for simulation mode.
 
     Parameters
@@ -35,19 +307,31 @@ def create_telemetry_config(output_dir, sim_loop_time):
         Directory to write the telemetry UI configuration file.
     sim_loop_time : `int` or `float`
         The time in seconds between successive telemetry file generations.
+    camera_fps : `int`, optional
+        The camera frame rate. If `None` it depends on ``sim_loop_time``.
+    data_buffer_size : `int`, optional
+        The number of frames per telemetry file. If `None` it depends on
+        ``sim_loop_time``.
+
+    Returns
+    -------
+    camera_fps : `int`
+        The camera frame rate written to the file.
+    data_buffer_size : `int`
+        The number of frames per telemetry file written to the file.
     """
     ui_version = "1.0.1"
     ui_config_version = "1.4.4"
     ui_config_file = "/dsm/ui_dsm_config/default.yaml"
     camera_name = "Sim_Camera"
-    if sim_loop_time > 1:
-        camera_fps = 40
-        data_buffer_size = 1024
-    else:
-        camera_fps = 120
-        data_buffer_size = 128
+    if camera_fps is None:
+        camera_fps = 40 if sim_loop_time > 1 else 120
+    if data_buffer_size is None:
+        data_buffer_size = 1024 if sim_loop_time > 1 else 128
     data_acquisition_time = sim_loop_time
 
+    from astropy.time import Time
+
     content = dict(
         timestamp=Time.now().isot,
         ui_versions=dict(
@@ -65,39 +349,1077 @@ def create_telemetry_config(output_dir, sim_loop_time):
     filename = os.path.join(output_dir, "dsm_ui_config.yaml")
     with open(filename, "w") as ofile:
         yaml.dump(content, ofile)
+    return camera_fps, data_buffer_size
 
 
-def create_telemetry_data(output_dir, sim_loop_time):
+def create_telemetry_data(
+    output_dir,
+    sim_loop_time,
+    num_rows=1,
+    bad_fraction=0,
+    rng=None,
+    end_time=None,
+    binary=False,
+):
     """Create the DSM UI telemetry file for simulation mode.
 
     Parameters
     ----------
     output_dir : `str`
         Directory to write the telemetry data file.
+    sim_loop_time : `int` or `float`
+        The time in seconds covered by the file.
+    num_rows : `int`, optional
+        The number of rows, each covering an equal part of ``sim_loop_time``.
+    bad_fraction : `float`, optional
+        The fraction of rows written with missing columns, as a DSM UI
+        failing mid-write would leave them.
+    rng : `numpy.random.Generator`, optional
+        The source of the simulated values. If `None` the global NumPy
+        random state is used.
+    end_time : `float`, optional
+        The Unix time (UTC) of the last row. If `None` it is now.
+    binary : `bool`, optional
+        Write a binary telemetry file instead of a DAT file? Bad rows are
+        then written with a negative flux.
+
+    Returns
+    -------
+    filename : `str`
+        The telemetry data file.
     """
-    now = Time.now()
-    first = now - TimeDelta(sim_loop_time, format="sec")
-    rms_roi = np.random.random()
-    centroidX = 214 + 3 * np.random.random()
-    centroidY = 320 + 3 * np.random.random()
-    flux = 2000 + 100 * np.random.random()
-    maxADC = 1000 + 100 * np.random.random()
-    fwhm = 6 + np.random.random()
-
-    output = [
-        now.isot,
+    from astropy.time import Time, TimeDelta
+
+    random = np.random.random if rng is None else rng.random
+    now = Time.now() if end_time is None else Time(end_time, format="unix")
+    row_time = sim_loop_time / num_rows
+    current = now - TimeDelta(row_time * np.arange(num_rows - 1, -1, -1), format="sec")
+    first = current - TimeDelta(row_time, format="sec")
+    current.precision = first.precision = 6
+    values = random((num_rows, 6))
+    rms_roi = values[:, 0]
+    columns = [
+        current.isot,
         first.isot,
-        now.isot,
+        current.isot,
         rms_roi,
         rms_roi,
-        centroidX,
-        centroidY,
-        flux,
-        maxADC,
-        fwhm,
+        214 + 3 * values[:, 1],
+        320 + 3 * values[:, 2],
+        2000 + 100 * values[:, 3],
+        1000 + 100 * values[:, 4],
+        6 + values[:, 5],
     ]
+    bad_rows = (
+        np.flatnonzero(random(num_rows) < bad_fraction)
+        if bad_fraction > 0
+        else np.empty(0, dtype=int)
+    )
+    telemetry_file = "dsm_{}_{:06d}{}".format(
+        now.strftime("%Y%m%d_%H%M%S"),
+        int(now.unix * 1e6) % 1000000,
+        BINARY_DAT_SUFFIX if binary else ".dat",
+    )
+    filename = os.path.join(output_dir, telemetry_file)
 
-    telemetry_file = "dsm_{}.dat".format(now.strftime("%Y%m%d_%H%M%S"))
-    with open(os.path.join(output_dir, telemetry_file), "w") as csv_file:
+    if binary:
+        records = np.empty(num_rows, dtype=DOME_SEEING_DTYPE)
+        for name, column in zip(DAT_COLUMNS, columns):
+            if name in DAT_TIME_COLUMNS:
+                column = convert_times(column)
+            records[name] = column
+        records["flux"][bad_rows] = -1
+        write_binary_telemetry_data(filename, records)
+        return filename
+
+    rows = [list(row) for row in zip(*(column.tolist() for column in columns))]
+    for i in bad_rows.tolist():
+        rows[i] = rows[i][:-2]
+    with open(filename, "w") as csv_file:
         writer = csv.writer(csv_file)
-        writer.writerow(output)
+        writer.writerows(rows)
+    return filename
+
+
+@dataclasses.dataclass
+class TelemetryData:
+    """Rows read from a DSM UI telemetry file.
+
+    Parameters
+    ----------
+    size : `int`
+        The size of the file in bytes when it was read.
+    mtime_ns : `int`
+        The modification time of the file in nanoseconds when it was read.
+    end_offset : `int`
+        The byte offset just past the last line read.
+    records : `numpy.ndarray`
+        The valid rows, with `DOME_SEEING_DTYPE` fields named after the
+        domeSeeing topic fields.
+    offsets : `numpy.ndarray`
+        The byte offset just past each valid row.
+    rejected : `list` [`tuple`]
+        The byte offset just past and the reason for each rejected row.
+    durations : `dict` [`str`, `float`]
+        How long reading the file took (seconds): ``parse`` for opening,
+        reading and parsing it, except ``convert_time`` for converting the
+        timestamps. Empty unless the read was timed.
+    compressed : `bool`
+        Was the file compressed? If so, ``end_offset`` and ``offsets`` are
+        offsets in the decompressed data.
+    """
+
+    size: int
+    mtime_ns: int
+    end_offset: int
+    records: np.ndarray = dataclasses.field(
+        default_factory=lambda: np.empty(0, dtype=DOME_SEEING_DTYPE)
+    )
+    offsets: np.ndarray = dataclasses.field(
+        default_factory=lambda: np.empty(0, dtype=np.int64)
+    )
+    rejected: list = dataclasses.field(default_factory=list)
+    durations: dict = dataclasses.field(default_factory=dict)
+    compressed: bool = False
+
+    def summary(self):
+        """Summarize the valid and rejected rows.
+
+        Returns
+        -------
+        `str`
+            The number of valid rows and rejected rows per reason.
+        """
+        summary = f"{len(self.records)} rows"
+        if self.rejected:
+            reasons = collections.Counter(reason for _, reason in self.rejected)
+            details = ", ".join(
+                f"{count} {reason}" for reason, count in reasons.items()
+            )
+            summary += f", {len(self.rejected)} rejected ({details})"
+        return summary
+
+
+def get_night(utc_time):
+    """Get the observing night of a time.
+
+    Parameters
+    ----------
+    utc_time : `float`
+        The time (UTC Unix seconds).
+
+    Returns
+    -------
+    `str`
+        The night as YYYYMMDD.
+    """
+    return time.strftime("%Y%m%d", time.gmtime(utc_time - NIGHT_OFFSET))
+
+
+def get_night_end(utc_time):
+    """Get the end of the observing night of a time.
+
+    Parameters
+    ----------
+    utc_time : `float`
+        The time (UTC Unix seconds).
+
+    Returns
+    -------
+    `float`
+        The time the night ends and the next one starts (UTC Unix
+        seconds).
+    """
+    night_start = utc_time - (utc_time - NIGHT_OFFSET) % SECONDS_PER_DAY
+    return night_start + SECONDS_PER_DAY
+
+
+def is_binary_data_file(filename):
+    """Is a file a binary telemetry data file?
+
+    Parameters
+    ----------
+    filename : `str` or `pathlib.Path`
+        The file name.
+
+    Returns
+    -------
+    `bool`
+        True if the name ends with `BINARY_DAT_SUFFIX`.
+    """
+    return str(filename).endswith(BINARY_DAT_SUFFIX)
+
+
+def is_compressed_data_file(filename):
+    """Is a file a compressed telemetry data file?
+
+    Parameters
+    ----------
+    filename : `str` or `pathlib.Path`
+        The file name.
+
+    Returns
+    -------
+    `bool`
+        True if the name ends with one of `COMPRESSED_DAT_SUFFIXES`.
+    """
+    return str(filename).endswith(COMPRESSED_DAT_SUFFIXES)
+
+
+def is_data_file(filename):
+    """Is a file a telemetry data file in any of the supported formats?
+
+    Parameters
+    ----------
+    filename : `str` or `pathlib.Path`
+        The file name.
+
+    Returns
+    -------
+    `bool`
+        True for DAT files, compressed or not, and binary telemetry files.
+    """
+    return (
+        str(filename).endswith(".dat")
+        or is_compressed_data_file(filename)
+        or is_binary_data_file(filename)
+    )
+
+
+def iter_compressed_telemetry_data(
+    filename, offset=0, chunk_size=DECOMPRESSED_CHUNK_SIZE, timed=False
+):
+    """Read a compressed DSM UI telemetry file a chunk at a time.
+
+    The file is decompressed as a stream, so only about ``chunk_size``
+    bytes of it are held in memory at once. This does blocking I/O, so
+    the CSC runs each step in a worker thread.
+
+    Parameters
+    ----------
+    filename : `str` or `pathlib.Path`
+        The ``.dat.gz`` or ``.dat.zst`` file to read.
+    offset : `int`, optional
+        The offset in the decompressed data of the first row to read.
+    chunk_size : `int`, optional
+        The approximate number of decompressed bytes per chunk.
+    timed : `bool`, optional
+        Measure how long reading and converting times take?
+
+    Yields
+    ------
+    `TelemetryData`
+        The rows of the next chunk of the file, with ``compressed`` set.
+
+    Raises
+    ------
+    ValueError
+        If the file is truncated or corrupt, after the chunks read before
+        the damage have been yielded, or if it is a ``.dat.zst`` file and
+        zstandard is not installed.
+    """
+    stat = os.stat(filename)
+    position = 0
+    pending = b""
+    blocks = _iter_decompressed(filename, chunk_size)
+    while True:
+        if timed:
+            start = time.perf_counter()
+        block = next(blocks, None)
+        if block is None:
+            content, pending = pending, b""
+        else:
+            pending += block
+            cut = pending.rfind(b"\n") + 1
+            content, pending = pending[:cut], pending[cut:]
+        if not content and block is not None:
+            continue
+        first = position
+        position += len(content)
+        if content and position > offset:
+            if first < offset:
+                skip = offset - first
+                content = content[skip:]
+                first = offset
+            durations = dict(convert_time=0) if timed else dict()
+            records, offsets, rejected = parse_telemetry_lines(
+                content.splitlines(keepends=True),
+                first,
+                durations if timed else None,
+            )
+            if timed:
+                durations["parse"] = (
+                    time.perf_counter() - start - durations["convert_time"]
+                )
+            yield TelemetryData(
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                end_offset=position,
+                records=records,
+                offsets=offsets,
+                rejected=rejected,
+                durations=durations,
+                compressed=True,
+            )
+        if block is None:
+            return
+
+
+def read_binary_telemetry_data(filename, offset=0, final=True, timed=False):
+    """Read a binary telemetry file into domeSeeing topic fields.
+
+    The file is memory-mapped and its records are used as they are, with
+    no text parsing or time conversion. Unless some rows are rejected, the
+    returned records are a view of the file rather than a copy. This does
+    blocking I/O, so the CSC runs it in a worker thread.
+
+    Parameters
+    ----------
+    filename : `str` or `pathlib.Path`
+        The binary telemetry file to read.
+    offset : `int`, optional
+        The byte offset to start reading from. Offsets inside the header or
+        a record are moved to the start of the next record.
+    final : `bool`, optional
+        Is the file complete? If so, an incomplete last record is rejected;
+        if not, it is left for a later read.
+    timed : `bool`, optional
+        Measure how long reading the file takes?
+
+    Returns
+    -------
+    `TelemetryData`
+        The rows read from the file.
+
+    Raises
+    ------
+    ValueError
+        If the header is not that of a binary telemetry file of a supported
+        version.
+    """
+    durations = dict()
+    if timed:
+        start = time.perf_counter()
+    with open(filename, "rb") as infile:
+        stat = os.fstat(infile.fileno())
+        header_bytes = infile.read(BINARY_HEADER_DTYPE.itemsize)
+
+    if len(header_bytes) < BINARY_HEADER_DTYPE.itemsize:
+        if final:
+            raise ValueError(f"{filename} is too short for a binary telemetry file.")
+        # The header has not been written yet.
+        return TelemetryData(size=stat.st_size, mtime_ns=stat.st_mtime_ns, end_offset=0)
+    header = np.frombuffer(header_bytes, dtype=BINARY_HEADER_DTYPE)[0]
+    if header["magic"] != BINARY_DAT_MAGIC:
+        raise ValueError(f"{filename} is not a binary telemetry file.")
+    if header["version"] > BINARY_DAT_VERSION:
+        raise ValueError(
+            f"{filename} has binary telemetry version {header['version']}; "
+            f"only up to {BINARY_DAT_VERSION} is supported."
+        )
+    header_size = int(header["header_size"])
+    record_size = int(header["record_size"])
+    if (
+        header["num_fields"] != len(DAT_COLUMNS)
+        or record_size != BINARY_DAT_DTYPE.itemsize
+        or header_size < BINARY_HEADER_DTYPE.itemsize
+    ):
+        raise ValueError(f"{filename} has an unsupported binary telemetry layout.")
+
+    first_record = max(0, -(-(offset - header_size) // record_size))
+    num_records = max(0, (stat.st_size - header_size) // record_size - first_record)
+    start_offset = header_size + first_record * record_size
+    end_offset = start_offset + num_records * record_size
+    if num_records > 0:
+        mapped = np.memmap(
+            filename,
+            dtype=BINARY_DAT_DTYPE,
+            mode="r",
+            offset=start_offset,
+            shape=(num_records,),
+        )
+        table = mapped.view(np.ndarray)
+    else:
+        table = np.empty(0, dtype=BINARY_DAT_DTYPE)
+    offsets = start_offset + record_size * np.arange(1, num_records + 1, dtype=np.int64)
+
+    records, offsets, rejected = validate_binary_records(table, offsets)
+    if final and stat.st_size > end_offset:
+        rejected.append((stat.st_size, "incomplete record"))
+        end_offset = stat.st_size
+
+    if timed:
+        durations["convert_time"] = 0
+        durations["parse"] = time.perf_counter() - start
+    return TelemetryData(
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        end_offset=end_offset,
+        records=records,
+        offsets=offsets,
+        rejected=rejected,
+        durations=durations,
+    )
+
+
+def read_telemetry_config(filename):
+    """Read a DSM UI configuration file into configuration topic fields.
+
+    This does blocking I/O, so the CSC runs it in a worker thread.
+
+    Parameters
+    ----------
+    filename : `str` or `pathlib.Path`
+        The UI configuration YAML file to read.
+
+    Returns
+    -------
+    `dict`
+        The configuration topic fields, except ``dsmIndex``.
+    """
+    with open(filename, "rb") as infile:
+        return parse_telemetry_config(_load_yaml(infile.read(), filename))
+
+
+def read_changed_telemetry_config(filename, digest=None):
+    """Read a DSM UI configuration file unless its content is unchanged.
+
+    The DSM UI may rewrite the configuration file without changing it, so
+    the content is hashed and only parsed if the hash differs from that of
+    the configuration already published. This does blocking I/O, so the CSC
+    runs it in a worker thread.
+
+    Parameters
+    ----------
+    filename : `str` or `pathlib.Path`
+        The UI configuration YAML file to read.
+    digest : `str`, optional
+        The hash of the configuration already published, if any.
+
+    Returns
+    -------
+    digest : `str`
+        The hash of the file content.
+    config : `dict` or `None`
+        The configuration topic fields, except ``dsmIndex``, or `None` if
+        the hash matches ``digest``.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a valid UI configuration.
+    """
+    with open(filename, "rb") as infile:
+        content = infile.read()
+    new_digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    if new_digest == digest:
+        return new_digest, None
+    return new_digest, parse_telemetry_config(_load_yaml(content, filename))
+
+
+def _load_yaml(content, filename):
+    """Decode YAML, raising `ValueError` if it is not valid."""
+    try:
+        return yaml.load(content, Loader=YAML_LOADER)
+    except yaml.YAMLError as error:
+        raise ValueError(f"{filename} is not valid YAML: {error}")
+
+
+def parse_telemetry_config(content):
+    """Convert the content of a DSM UI configuration into configuration
+    topic fields.
+
+    Parameters
+    ----------
+    content : `dict`
+        The decoded YAML of a UI configuration file.
+
+    Returns
+    -------
+    `dict`
+        The configuration topic fields, except ``dsmIndex``.
+
+    Raises
+    ------
+    ValueError
+        If the content does not have all of `TELEMETRY_CONFIG_KEYS`.
+    """
+    validate_telemetry_config(content)
+    ui_config_file = pathlib.PosixPath(content["ui_versions"]["config_file"]).as_uri()
+    return dict(
+        timestampConfigStart=convert_time(content["timestamp"]),
+        uiVersionCode=content["ui_versions"]["code"],
+        uiVersionConfig=content["ui_versions"]["config"],
+        uiConfigFile=ui_config_file,
+        cameraName=content["camera"]["name"],
+        cameraFps=content["camera"]["fps"],
+        dataBufferSize=content["data"]["buffer_size"],
+        dataAcquisitionTime=content["data"]["acquisition_time"],
+    )
+
+
+def validate_telemetry_config(content):
+    """Check that the content of a DSM UI configuration has all of
+    `TELEMETRY_CONFIG_KEYS`.
+
+    Parameters
+    ----------
+    content : `object`
+        The decoded YAML of a UI configuration file.
+
+    Raises
+    ------
+    ValueError
+        If the content is not a mapping or lacks any of the keys; the
+        message names every missing key.
+    """
+    if not isinstance(content, dict):
+        raise ValueError(
+            f"UI configuration is a {type(content).__name__}, not a mapping."
+        )
+    missing = []
+    for key, section_keys in TELEMETRY_CONFIG_KEYS.items():
+        if key not in content:
+            missing.append(key)
+        elif section_keys is not None:
+            section = content[key]
+            if not isinstance(section, dict):
+                raise ValueError(f"UI configuration {key} is not a mapping.")
+            missing += [f"{key}.{name}" for name in section_keys if name not in section]
+    if missing:
+        raise ValueError(f"UI configuration lacks {', '.join(missing)}.")
+
+
+def parse_telemetry_lines(lines, offset=0, durations=None):
+    """Parse and validate lines of a DSM UI telemetry file.
+
+    The lines are split into columns, converted and checked against
+    `DAT_VALUE_LIMITS` as whole arrays rather than row by row. Blank lines
+    are skipped.
+
+    Parameters
+    ----------
+    lines : `list` [`bytes`]
+        The lines to parse, including their line endings.
+    offset : `int`, optional
+        The byte offset of the first line in the file.
+    durations : `dict`, optional
+        If given, the time spent converting timestamps (seconds) is added
+        to its ``convert_time`` item.
+
+    Returns
+    -------
+    records : `numpy.ndarray`
+        The valid rows, with `DOME_SEEING_DTYPE` fields.
+    offsets : `numpy.ndarray`
+        The byte offset just past each valid row.
+    rejected : `list` [`tuple`]
+        The byte offset just past and the reason for each rejected row.
+    """
+    line_ends = offset + np.cumsum(
+        np.fromiter((len(line) for line in lines), dtype=np.int64, count=len(lines))
+    )
+    rows = np.char.strip(np.array(lines, dtype=bytes))
+    reasons = np.full(len(lines), "", dtype=object)
+
+    nonblank = np.char.str_len(rows) > 0
+    good = nonblank & (np.char.count(rows, b",") == len(DAT_COLUMNS) - 1)
+    reasons[nonblank & ~good] = "wrong number of columns"
+
+    time_columns, values = _split_columns(rows[good])
+    if durations is None:
+        times = _parse_times(time_columns)
+    else:
+        start = time.perf_counter()
+        times = _parse_times(time_columns)
+        durations["convert_time"] = (
+            durations.get("convert_time", 0) + time.perf_counter() - start
+        )
+
+    good_times, good_values = _check_rows(times, values)
+
+    good_indices = np.flatnonzero(good)
+    reasons[good_indices[~good_times]] = "invalid timestamp"
+    reasons[good_indices[good_times & ~good_values]] = "invalid value"
+    valid = good_times & good_values
+    good[good_indices[~valid]] = False
+
+    records = np.empty(np.count_nonzero(valid), dtype=DOME_SEEING_DTYPE)
+    for i, name in enumerate(DAT_TIME_COLUMNS):
+        records[name] = times[valid, i]
+    for i, name in enumerate(DAT_VALUE_COLUMNS):
+        records[name] = values[valid, i]
+
+    rejected_indices = np.flatnonzero(reasons != "")
+    rejected = list(
+        zip(line_ends[rejected_indices].tolist(), reasons[rejected_indices])
+    )
+    return records, line_ends[good], rejected
+
+
+def read_telemetry_data(filename, offset=0, final=True, timed=False):
+    """Read a DSM UI telemetry file into domeSeeing topic fields.
+
+    This does blocking I/O, so the CSC runs it in a worker thread.
+
+    Parameters
+    ----------
+    filename : `str` or `pathlib.Path`
+        The telemetry DAT file to read.
+    offset : `int`, optional
+        The byte offset to start reading from.
+    final : `bool`, optional
+        Is the file complete? If not, a last line without a line ending is
+        left for a later read.
+    timed : `bool`, optional
+        Measure how long reading and converting times take?
+
+    Returns
+    -------
+    `TelemetryData`
+        The rows read from the file.
+    """
+    durations = dict()
+    if timed:
+        start = time.perf_counter()
+        durations["convert_time"] = 0
+    with open(filename, "rb") as infile:
+        infile.seek(offset)
+        content = infile.read()
+        stat = os.fstat(infile.fileno())
+
+    lines = content.splitlines(keepends=True)
+    end_offset = offset + len(content)
+    if lines and not final and not lines[-1].endswith(b"\n"):
+        end_offset -= len(lines.pop())
+
+    records, offsets, rejected = parse_telemetry_lines(
+        lines, offset, durations if timed else None
+    )
+    if timed:
+        durations["parse"] = time.perf_counter() - start - durations["convert_time"]
+    return TelemetryData(
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        end_offset=end_offset,
+        records=records,
+        offsets=offsets,
+        rejected=rejected,
+        durations=durations,
+    )
+
+
+def scan_telemetry_directory(directory, min_mtime=None, max_mtime=None):
+    """Find the telemetry files in a directory, oldest first.
+
+    This does blocking I/O, so the CSC runs it in a worker thread.
+
+    Parameters
+    ----------
+    directory : `str` or `pathlib.Path`
+        The telemetry directory to scan.
+    min_mtime : `float`, optional
+        Ignore files last modified before this Unix time.
+    max_mtime : `float`, optional
+        Ignore files last modified at or after this Unix time.
+
+    Returns
+    -------
+    config_files : `list` [`pathlib.Path`]
+        The UI configuration (YAML) files sorted by modification time.
+    data_files : `list` [`pathlib.Path`]
+        The telemetry data files in any of the supported formats, sorted by
+        modification time.
+    """
+    config_files = []
+    data_files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".yaml"):
+                files = config_files
+            elif is_data_file(entry.name):
+                files = data_files
+            else:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                mtime = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if min_mtime is not None and mtime < min_mtime:
+                continue
+            if max_mtime is not None and mtime >= max_mtime:
+                continue
+            files.append((mtime, entry.name))
+
+    def to_paths(files):
+        return [pathlib.Path(directory, name) for _, name in sorted(files)]
+
+    return to_paths(config_files), to_paths(data_files)
+
+
+def tai_from_utc_unix(utc_time):
+    """Convert UTC Unix seconds to TAI Unix seconds.
+
+    Unlike `lsst.ts.utils.tai_from_utc` this does not need astropy.
+
+    Parameters
+    ----------
+    utc_time : `float`
+        The UTC time (Unix seconds).
+
+    Returns
+    -------
+    `float`
+        The TAI time (Unix seconds).
+    """
+    return utc_time + _tai_minus_utc(*time.gmtime(utc_time)[:3])
+
+
+def utc_from_tai_unix(tai_time):
+    """Convert TAI Unix seconds to UTC Unix seconds.
+
+    Unix time has no leap seconds, so the times in a leap second give the
+    UTC times of the second after it.
+
+    Parameters
+    ----------
+    tai_time : `float`
+        The TAI time (Unix seconds).
+
+    Returns
+    -------
+    `float`
+        The UTC time (Unix seconds).
+    """
+    # TAI is ahead, so its date may be the day after the UTC date.
+    utc_guess = tai_time - _tai_minus_utc(*time.gmtime(tai_time)[:3])
+    return tai_time - _tai_minus_utc(*time.gmtime(utc_guess)[:3])
+
+
+def _iter_decompressed(filename, chunk_size):
+    """Decompress a telemetry file a block at a time.
+
+    Raises
+    ------
+    ValueError
+        If the file is truncated or corrupt, or zstandard is needed but not
+        installed.
+    """
+    try:
+        if str(filename).endswith(".gz"):
+            with gzip.open(filename, "rb") as infile:
+                while block := infile.read(chunk_size):
+                    yield block
+        elif str(filename).endswith(".zst"):
+            if zstandard is None:
+                raise ValueError(
+                    f"Cannot read {filename}: the zstandard package is not installed."
+                )
+            with open(filename, "rb") as infile:
+                decompressor = None
+                pending = b""
+                while compressed := infile.read(max(chunk_size // 16, 1)):
+                    while compressed:
+                        if decompressor is None or decompressor.eof:
+                            # The start of the file or of another frame.
+                            decompressor = zstandard.ZstdDecompressor().decompressobj()
+                        pending += decompressor.decompress(compressed)
+                        compressed = (
+                            decompressor.unused_data if decompressor.eof else b""
+                        )
+                    # The output of one read is not bounded, so split it.
+                    while len(pending) >= chunk_size:
+                        block = pending[:chunk_size]
+                        pending = pending[chunk_size:]
+                        yield block
+                if pending:
+                    yield pending
+                if decompressor is None or not decompressor.eof:
+                    raise EOFError("Compressed file ended before the end of the frame")
+        else:
+            raise ValueError(f"{filename} is not a compressed telemetry file.")
+    except DECOMPRESSION_ERRORS as error:
+        raise ValueError(f"{filename} is truncated or corrupt: {error}") from error
+
+
+def validate_binary_records(table, offsets):
+    """Check binary telemetry records against `DAT_VALUE_LIMITS`.
+
+    Parameters
+    ----------
+    table : `numpy.ndarray`
+        The records, with `BINARY_DAT_DTYPE`.
+    offsets : `numpy.ndarray`
+        The byte offset just past each record, or any other position used
+        to report rejected records.
+
+    Returns
+    -------
+    records : `numpy.ndarray`
+        The valid records, with `DOME_SEEING_DTYPE` fields. If all are
+        valid this is a view of ``table`` rather than a copy.
+    offsets : `numpy.ndarray`
+        The offsets of the valid records.
+    rejected : `list` [`tuple`]
+        The offset and the reason for each rejected record.
+    """
+    # Every field is a float64, so the records can be viewed as a 2-D array.
+    columns = table.view("<f8").reshape(len(table), len(DAT_COLUMNS))
+    num_times = len(DAT_TIME_COLUMNS)
+    good_times, good_values = _check_rows(
+        columns[:, :num_times], columns[:, num_times:]
+    )
+    valid = good_times & good_values
+    rejected = [
+        (row_offset, "invalid timestamp" if not good_time else "invalid value")
+        for row_offset, good_time in zip(
+            offsets[~valid].tolist(), good_times[~valid].tolist()
+        )
+    ]
+    if not np.all(valid):
+        table = table[valid]
+        offsets = offsets[valid]
+    return table.astype(DOME_SEEING_DTYPE, copy=False), offsets, rejected
+
+
+def write_binary_telemetry_data(filename, records):
+    """Append rows to a binary telemetry file.
+
+    The header is written first if the file is new or empty, so a producer
+    can append to the same file as data arrives.
+
+    Parameters
+    ----------
+    filename : `str` or `pathlib.Path`
+        The binary telemetry file to write.
+    records : `numpy.ndarray`
+        The rows to write, with `DOME_SEEING_DTYPE` fields and TAI
+        timestamps.
+    """
+    with open(filename, "ab") as ofile:
+        if ofile.tell() == 0:
+            header = np.array(
+                [
+                    (
+                        BINARY_DAT_MAGIC,
+                        BINARY_DAT_VERSION,
+                        BINARY_HEADER_DTYPE.itemsize,
+                        BINARY_DAT_DTYPE.itemsize,
+                        len(DAT_COLUMNS),
+                    )
+                ],
+                dtype=BINARY_HEADER_DTYPE,
+            )
+            ofile.write(header.tobytes())
+        ofile.write(np.asarray(records).astype(BINARY_DAT_DTYPE).tobytes())
+
+
+def _check_rows(times, values):
+    """Check timestamps and measurements against `DAT_VALUE_LIMITS`.
+
+    Parameters
+    ----------
+    times : `numpy.ndarray`
+        The TAI timestamps, one row per telemetry row.
+    values : `numpy.ndarray`
+        The measurements, one row per telemetry row.
+
+    Returns
+    -------
+    good_times : `numpy.ndarray`
+        True where all the timestamps of a row are valid.
+    good_values : `numpy.ndarray`
+        True where all the measurements of a row are within limits.
+    """
+    good_times = np.all(np.isfinite(times) & (times > 0), axis=1)
+    lower, upper = np.array([DAT_VALUE_LIMITS[name] for name in DAT_VALUE_COLUMNS]).T
+    good_values = np.all(
+        np.isfinite(values) & (values >= lower) & (values <= upper), axis=1
+    )
+    return good_times, good_values
+
+
+def _convert_iso_times(in_times):
+    """Convert ISO UTC timestrings to TAI timestamps with array arithmetic.
+
+    Parameters
+    ----------
+    in_times : `numpy.ndarray`
+        The times to convert, as `str` or `bytes`.
+
+    Returns
+    -------
+    tai_seconds : `numpy.ndarray`
+        The TAI times, or NaN where a string could not be converted.
+    parsed : `numpy.ndarray`
+        True where a string was converted.
+    out_of_range : `numpy.ndarray`
+        True where a string has the form of an ISO time from 1972 onwards
+        but a field out of range, such as an hour of 25.
+    """
+    shape = in_times.shape
+    tai_seconds = np.full(shape, np.nan)
+    parsed = np.zeros(shape, dtype=bool)
+    out_of_range = np.zeros(shape, dtype=bool)
+    if in_times.size == 0 or in_times.dtype.kind not in "SU":
+        return tai_seconds, parsed, out_of_range
+    try:
+        chars = np.asarray(in_times.reshape(-1), dtype=f"S{ISO_TIME_MAX_LENGTH}")
+    except UnicodeEncodeError:
+        return tai_seconds, parsed, out_of_range
+    chars = chars.view(np.uint8).reshape(-1, ISO_TIME_MAX_LENGTH)
+    digits = chars.astype(np.int16) - ord("0")
+    is_digit = (digits >= 0) & (digits <= 9)
+
+    def number(start, stop):
+        value = np.zeros(len(chars), dtype=np.int64)
+        for i in range(start, stop):
+            value = 10 * value + digits[:, i]
+        return value
+
+    year = number(0, 4)
+    month = number(5, 7)
+    day = number(8, 10)
+    hour = number(11, 13)
+    minute = number(14, 16)
+    second = number(17, 19)
+
+    # Trailing bytes are either a fraction of a second or padding.
+    fraction_digits = is_digit[:, 20:]
+    padding = chars[:, 20:] == 0
+    has_fraction = chars[:, 19] == ord(".")
+    fraction_scale = 10.0 ** -np.arange(1, ISO_TIME_MAX_LENGTH - 19)
+    fraction = np.where(fraction_digits, digits[:, 20:], 0) @ fraction_scale
+
+    ok = np.char.str_len(in_times.reshape(-1)) <= ISO_TIME_MAX_LENGTH
+    ok &= np.all(is_digit[:, [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]], axis=1)
+    ok &= (chars[:, 4] == ord("-")) & (chars[:, 7] == ord("-"))
+    ok &= (chars[:, 10] == ord("T")) | (chars[:, 10] == ord(" "))
+    ok &= (chars[:, 13] == ord(":")) & (chars[:, 16] == ord(":"))
+    ok &= np.where(
+        has_fraction,
+        fraction_digits[:, 0] & np.all(fraction_digits | padding, axis=1),
+        (chars[:, 19] == 0) & np.all(padding, axis=1),
+    )
+    ok &= year >= FIRST_INTEGRAL_LEAP_SECOND_YEAR
+    well_formed = ok.copy()
+    ok &= (month >= 1) & (month <= 12) & (day >= 1)
+    is_leap_year = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_length = DAYS_IN_MONTH[np.clip(month, 1, 12) - 1]
+    ok &= day <= month_length + (is_leap_year & (month == 2))
+    ok &= (hour < 24) & (minute < 60)
+    is_leap_second = ok & (second == 60) & (hour == 23) & (minute == 59)
+    for i in np.flatnonzero(is_leap_second):
+        is_leap_second[i] = _is_leap_second_day(
+            int(year[i]), int(month[i]), int(day[i])
+        )
+    ok &= (second < 60) | is_leap_second
+    out_of_range.reshape(-1)[:] = well_formed & ~ok
+    if not np.any(ok):
+        return tai_seconds, parsed, out_of_range
+
+    # Days since 1970-01-01 in the proleptic Gregorian calendar.
+    shifted_year = year - (month <= 2)
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = (
+        365 * (shifted_year % 400)
+        + (shifted_year % 400) // 4
+        - (shifted_year % 400) // 100
+        + day_of_year
+    )
+    days = 146097 * (shifted_year // 400) + day_of_era - 719468
+
+    ok_index = np.flatnonzero(ok)
+    unique_days, first_index, inverse = np.unique(
+        days[ok_index], return_index=True, return_inverse=True
+    )
+    tai_minus_utc = np.array(
+        [
+            _tai_minus_utc(int(year[i]), int(month[i]), int(day[i]))
+            for i in ok_index[first_index]
+        ]
+    )[inverse.reshape(-1)]
+    whole_seconds = (
+        days[ok_index] * SECONDS_PER_DAY
+        + 3600 * hour[ok_index]
+        + 60 * minute[ok_index]
+        + second[ok_index]
+        + tai_minus_utc
+    )
+    tai_seconds.reshape(-1)[ok_index] = whole_seconds + fraction[ok_index]
+    parsed.reshape(-1)[ok_index] = True
+    return tai_seconds, parsed, out_of_range
+
+
+def _parse_times(columns):
+    """Convert ISO UTC timestamp columns to TAI, with NaN where invalid.
+
+    Only strings not in the form `_convert_iso_times` handles are passed
+    to `convert_time`; those with a field out of range stay invalid.
+    """
+    tai_seconds, parsed, out_of_range = _convert_iso_times(columns)
+    other = ~parsed & ~out_of_range
+    if np.any(other):
+        unique_times, inverse = np.unique(columns[other], return_inverse=True)
+        other_seconds = np.array([_parse_time(in_time) for in_time in unique_times])
+        tai_seconds[other] = other_seconds[inverse.reshape(-1)]
+    return tai_seconds
+
+
+def _parse_time(in_time):
+    try:
+        return convert_time(in_time.decode())
+    except ValueError:
+        return np.nan
+
+
+def _parse_values(columns):
+    """Convert measurement columns to floats, with NaN where invalid."""
+    try:
+        return columns.astype(np.float64)
+    except ValueError:
+        values = np.full(columns.shape, np.nan)
+        for index, value in np.ndenumerate(columns):
+            try:
+                values[index] = float(value)
+            except ValueError:
+                pass
+        return values
+
+
+def _split_columns(rows):
+    """Split DAT rows with the right number of columns.
+
+    Parameters
+    ----------
+    rows : `numpy.ndarray`
+        The rows, as `bytes` without line endings.
+
+    Returns
+    -------
+    time_columns : `numpy.ndarray`
+        The timestamp columns, as `bytes`.
+    values : `numpy.ndarray`
+        The measurement columns, with NaN where not a number.
+    """
+    num_times = len(DAT_TIME_COLUMNS)
+    if len(rows) == 0:
+        return np.empty((0, num_times), dtype=bytes), np.empty(
+            (0, len(DAT_VALUE_COLUMNS))
+        )
+    try:
+        table = np.loadtxt(
+            [row.decode() for row in rows.tolist()],
+            delimiter=",",
+            dtype=DAT_TEXT_DTYPE,
+            ndmin=1,
+        )
+    except ValueError:
+        # Some value is not a number, so find out which one by one.
+        columns = np.array(np.char.split(rows, b",").tolist(), dtype=bytes)
+        return columns[:, :num_times], _parse_values(columns[:, num_times:])
+    time_columns = np.stack([table[name] for name in DAT_TIME_COLUMNS], axis=1)
+    values = np.stack([table[name] for name in DAT_VALUE_COLUMNS], axis=1)
+    return time_columns, values
@@ -1,11 +1,27 @@
 import asyncio
+import csv
+import datetime
+import gzip
+import logging
 import os
+import pathlib
 import shutil
+import signal
+import tempfile
+import time
 import unittest
+from unittest import mock
 
 import numpy as np
+import yaml
 from lsst.ts import salobj, utils
-from lsst.ts.dsm import dsm_csc
+from lsst.ts.dsm import (
+    WATCHER_BACKENDS,
+    PushClient,
+    TelemetryReplay,
+    dsm_csc,
+    find_replay_files,
+)
 
 np.random.seed(47)
 
@@ -13,6 +29,16 @@ index_gen = utils.index_generator()
 
 STD_TIMEOUT = 5
 
+# Time of the first row of the test DAT files.
+ROW_START_TIME = datetime.datetime(2019, 8, 8, 22, 26, 52, 451723)
+
+
+def row_time(i):
+    """The ISO timestamp of row ``i`` of a test DAT file; rows are 10 ms
+    apart, as in real data.
+    """
+    return (ROW_START_TIME + datetime.timedelta(milliseconds=10 * i)).isoformat()
+
 
 class TestDSMCSC(salobj.BaseCscTestCase, unittest.IsolatedAsyncioTestCase):
     def setUp(self):
@@ -39,8 +65,16 @@ class TestDSMCSC(salobj.BaseCscTestCase, unittest.IsolatedAsyncioTestCase):
         """Test that the DSM through the standard lifecycle.
 
         The emphasis for this test is making sure the telemetry loop can be
-        started and stopped through the lifecycle commands.
+        started and stopped through the lifecycle commands. This is checked
+        with each telemetry watcher backend.
         """
+        for backend in WATCHER_BACKENDS:
+            with self.subTest(backend=backend), mock.patch.dict(
+                os.environ, DSM_WATCHER=backend
+            ):
+                await self.check_lifecycle_behavior()
+
+    async def check_lifecycle_behavior(self):
         async with self.make_csc(initial_state=salobj.State.STANDBY, simulation_mode=1):
             await self.assert_next_summary_state(
                 state=salobj.State.STANDBY,
@@ -76,11 +110,15 @@ class TestDSMCSC(salobj.BaseCscTestCase, unittest.IsolatedAsyncioTestCase):
             self.telemetry_directory = self.csc.telemetry_directory
             self.assertFalse(self.csc.simulated_telemetry_loop_task.done())
             # Now need to wait a bit to make sure the telemetry data file
-            # gets deleted
+            # gets deleted; the polling watcher takes a few poll intervals.
             await asyncio.sleep(self.csc.simulation_loop_time / 10)
+            for _ in range(10):
+                sim_files = len(list(os.listdir(self.csc.telemetry_directory)))
+                if sim_files == 1:
+                    break
+                await asyncio.sleep(self.csc.simulation_loop_time / 10)
             # Check that one file (its the configuration file) is there as
             # the telemetry data file has been deleted
-            sim_files = len(list(os.listdir(self.csc.telemetry_directory)))
             self.assertEqual(sim_files, 1)
 
             # Check that the telemetry loop is running
@@ -148,13 +186,744 @@ class TestDSMCSC(salobj.BaseCscTestCase, unittest.IsolatedAsyncioTestCase):
                 remote=self.remote,
             )
 
+    async def test_backlog(self):
+        """Test that files written before the CSC is enabled are published."""
+        async with self.make_csc(initial_state=salobj.State.STANDBY, simulation_mode=1):
+            self.telemetry_directory = self.csc.telemetry_directory
+            row = [
+                "2019-08-08T22:26:52.451723",
+                "2019-08-08T22:26:51.451723",
+                "2019-08-08T22:26:52.451723",
+                42.0,
+                42.0,
+                215.0,
+                321.0,
+                2050.0,
+                1050.0,
+                6.5,
+            ]
+            filename = os.path.join(self.telemetry_directory, "dsm_backlog.dat")
+            with open(filename, "w") as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(row)
+
+            await salobj.set_summary_state(self.remote, salobj.State.ENABLED)
+
+            num_backlog_samples = 0
+            for _ in range(3):
+                dome_seeing = await self.assert_next_sample(
+                    self.remote.tel_domeSeeing, dsmIndex=1
+                )
+                if dome_seeing.rmsX == 42:
+                    num_backlog_samples += 1
+            self.assertEqual(num_backlog_samples, 1)
+            self.assertFalse(os.path.exists(filename))
+
+    async def test_parallel_files(self):
+        """Test that a burst of files read ahead in parallel is published
+        in order.
+        """
+        self.telemetry_directory = tempfile.mkdtemp()
+        num_files = 8
+        rows_per_file = 20
+        mtime = time.time() - 60
+        for i in range(num_files):
+            filename = os.path.join(self.telemetry_directory, f"dsm_burst{i}.dat")
+            with open(filename, "w") as csv_file:
+                writer = csv.writer(csv_file)
+                for j in range(i * rows_per_file, (i + 1) * rows_per_file):
+                    writer.writerow(
+                        [
+                            row_time(j),
+                            "2019-08-08T22:26:51.451723",
+                            row_time(j),
+                            1000.0 + j,
+                            42.0,
+                            215.0,
+                            321.0,
+                            2050.0,
+                            1050.0,
+                            6.5,
+                        ]
+                    )
+            os.utime(filename, (mtime + i, mtime + i))
+
+        with mock.patch.dict(
+            os.environ,
+            DSM_TELEMETRY_DIR=self.telemetry_directory,
+            DSM_INGEST_JOURNAL=os.path.join(self.telemetry_directory, "journal"),
+            DSM_PARSE_WORKERS="4",
+        ):
+            async with self.make_csc(
+                initial_state=salobj.State.ENABLED, simulation_mode=0
+            ):
+                self.assertEqual(self.csc.num_parse_workers, 4)
+                values = []
+                for _ in range(num_files * rows_per_file):
+                    dome_seeing = await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1
+                    )
+                    values.append(dome_seeing.rmsX)
+                self.assertEqual(
+                    values, [1000.0 + j for j in range(num_files * rows_per_file)]
+                )
+
+    async def test_follow_mode(self):
+        """Test that rows are published as they are appended to a DAT file."""
+        self.telemetry_directory = tempfile.mkdtemp()
+
+        def make_row(value):
+            return (
+                "2019-08-08T22:26:52.451723,2019-08-08T22:26:51.451723,"
+                f"2019-08-08T22:26:52.451723,{value},{value},215.0,321.0,"
+                "2050.0,1050.0,6.5\n"
+            )
+
+        with mock.patch.dict(
+            os.environ,
+            DSM_TELEMETRY_DIR=self.telemetry_directory,
+            DSM_INGEST_JOURNAL=os.path.join(self.telemetry_directory, "journal"),
+            DSM_FOLLOW_MODE="1",
+        ):
+            async with self.make_csc(
+                initial_state=salobj.State.ENABLED, simulation_mode=0
+            ):
+                filename = os.path.join(self.telemetry_directory, "dsm_follow.dat")
+                with open(filename, "w") as ofile:
+                    ofile.write(make_row(1.0) + make_row(2.0))
+                    ofile.flush()
+                    for value in (1, 2):
+                        dome_seeing = await self.assert_next_sample(
+                            self.remote.tel_domeSeeing, dsmIndex=1
+                        )
+                        self.assertEqual(dome_seeing.rmsX, value)
+
+                    # A partial row is only published once it is complete.
+                    row = make_row(3.0)
+                    ofile.write(row[:50])
+                    ofile.flush()
+                    with self.assertRaises(asyncio.TimeoutError):
+                        await self.remote.tel_domeSeeing.next(flush=False, timeout=1)
+                    ofile.write(row[50:])
+                    ofile.flush()
+                    dome_seeing = await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1
+                    )
+                    self.assertEqual(dome_seeing.rmsX, 3)
+
+                    # The last row does not need a line ending.
+                    ofile.write(make_row(4.0).strip())
+
+                dome_seeing = await self.assert_next_sample(
+                    self.remote.tel_domeSeeing, dsmIndex=1
+                )
+                self.assertEqual(dome_seeing.rmsX, 4)
+                with self.assertRaises(asyncio.TimeoutError):
+                    await self.remote.tel_domeSeeing.next(flush=False, timeout=1)
+
+                # A file removed while it is being written is forgotten.
+                gone = os.path.join(self.telemetry_directory, "dsm_gone.dat")
+                with open(gone, "w") as ofile:
+                    ofile.write(make_row(5.0))
+                    ofile.flush()
+                    await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1
+                    )
+                    self.assertIn(pathlib.Path(gone), self.csc.files_being_written)
+                    os.remove(gone)
+                    await asyncio.sleep(1)
+                self.assertNotIn(pathlib.Path(gone), self.csc.files_being_written)
+
+    async def test_resume_after_crash(self):
+        """Test that a file interrupted by a crash is resumed from the first
+        unpublished row after a restart.
+        """
+        self.telemetry_directory = tempfile.mkdtemp()
+        telemetry_dir = os.path.join(self.telemetry_directory, "telemetry")
+        os.mkdir(telemetry_dir)
+        num_rows = 100
+        num_rows_before_crash = 30
+        filename = os.path.join(telemetry_dir, "dsm_resume.dat")
+        with open(filename, "w") as csv_file:
+            writer = csv.writer(csv_file)
+            for i in range(num_rows):
+                writer.writerow(
+                    [
+                        "2019-08-08T22:26:52.451723",
+                        "2019-08-08T22:26:51.451723",
+                        "2019-08-08T22:26:52.451723",
+                        float(i),
+                        float(i),
+                        215.0,
+                        321.0,
+                        2050.0,
+                        1050.0,
+                        6.5,
+                    ]
+                )
+
+        published_rows = []
+        num_writes = 0
+        with mock.patch.dict(os.environ, DSM_TELEMETRY_DIR=telemetry_dir):
+            async with self.make_csc(
+                initial_state=salobj.State.STANDBY, simulation_mode=0
+            ):
+                set_write = self.csc.tel_domeSeeing.set_write
+
+                async def crashing_set_write(**kwargs):
+                    # Count writes as they start, because several are in
+                    # flight at once.
+                    nonlocal num_writes
+                    num_writes += 1
+                    if num_writes > num_rows_before_crash:
+                        raise RuntimeError("Simulated crash")
+                    await set_write(**kwargs)
+                    published_rows.append(kwargs["rmsX"])
+
+                self.csc.tel_domeSeeing.set_write = crashing_set_write
+                await salobj.set_summary_state(self.remote, salobj.State.ENABLED)
+                for i in range(num_rows_before_crash):
+                    dome_seeing = await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1
+                    )
+                    self.assertEqual(dome_seeing.rmsX, i)
+                journal_file = self.csc.ingest_journal.filename
+
+            self.assertTrue(journal_file.startswith(self.telemetry_directory))
+            self.assertEqual(published_rows, list(range(num_rows_before_crash)))
+
+            async with self.make_csc(
+                initial_state=salobj.State.ENABLED, simulation_mode=0
+            ):
+                for i in range(num_rows_before_crash, num_rows):
+                    dome_seeing = await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1
+                    )
+                    self.assertEqual(dome_seeing.rmsX, i)
+                entry = self.csc.ingest_journal.get(filename)
+                self.assertTrue(entry.is_complete(os.stat(filename)))
+
+    async def test_duplicate_rows(self):
+        """Test that rows repeated in a later file are only published once."""
+        self.telemetry_directory = tempfile.mkdtemp()
+
+        def write_rows(name, rows):
+            filename = os.path.join(self.telemetry_directory, name)
+            with open(filename, "w") as csv_file:
+                writer = csv.writer(csv_file)
+                for i in rows:
+                    writer.writerow(
+                        [
+                            row_time(i),
+                            "2019-08-08T22:26:51.451723",
+                            row_time(i),
+                            float(i),
+                            float(i),
+                            215.0,
+                            321.0,
+                            2050.0,
+                            1050.0,
+                            6.5,
+                        ]
+                    )
+
+        with mock.patch.dict(
+            os.environ,
+            DSM_TELEMETRY_DIR=self.telemetry_directory,
+            DSM_INGEST_JOURNAL=os.path.join(self.telemetry_directory, "journal"),
+            DSM_DEDUP_WINDOW="60",
+        ):
+            async with self.make_csc(
+                initial_state=salobj.State.ENABLED, simulation_mode=0
+            ):
+                write_rows("dsm_1.dat", range(10))
+                # The second file repeats the last 5 rows of the first.
+                write_rows("dsm_2.dat", range(5, 15))
+                for i in range(15):
+                    dome_seeing = await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1
+                    )
+                    self.assertEqual(dome_seeing.rmsX, i)
+                with self.assertRaises(asyncio.TimeoutError):
+                    await self.remote.tel_domeSeeing.next(flush=False, timeout=1)
+                self.assertEqual(self.csc.dedup_index.num_duplicates, 5)
+
+    async def test_unchanged_config(self):
+        """Test that a UI configuration file rewritten with the same content
+        is not published again.
+        """
+        self.telemetry_directory = tempfile.mkdtemp()
+        filename = os.path.join(self.telemetry_directory, "dsm_ui_config.yaml")
+
+        def write_config(camera_fps):
+            content = dict(
+                timestamp="2019-08-08T22:26:52.451723",
+                ui_versions=dict(code="1.0.1", config="1.4.4", config_file="/a.yaml"),
+                camera=dict(name="Sim_Camera", fps=camera_fps),
+                data=dict(buffer_size=128, acquisition_time=1),
+            )
+            with open(filename, "w") as ofile:
+                yaml.safe_dump(content, ofile)
+
+        with mock.patch.dict(
+            os.environ,
+            DSM_TELEMETRY_DIR=self.telemetry_directory,
+            DSM_INGEST_JOURNAL=os.path.join(self.telemetry_directory, "journal"),
+        ):
+            async with self.make_csc(
+                initial_state=salobj.State.ENABLED, simulation_mode=0
+            ):
+                try:
+                    config_msg = self.remote.evt_configuration
+                except AttributeError:
+                    config_msg = self.remote.tel_configuration
+                write_config(40)
+                await self.assert_next_sample(config_msg, dsmIndex=1, cameraFps=40)
+                digest = self.csc.config_digest
+                write_config(40)
+                write_config(120)
+                # The rewrite of the same configuration is skipped.
+                await self.assert_next_sample(config_msg, dsmIndex=1, cameraFps=120)
+                self.assertNotEqual(self.csc.config_digest, digest)
+                with self.assertRaises(asyncio.TimeoutError):
+                    await config_msg.next(flush=False, timeout=1)
+
+    async def test_replay(self):
+        """Test that replayed files renamed into the telemetry directory
+        are published and their publication tracked.
+        """
+        self.telemetry_directory = tempfile.mkdtemp()
+        num_files = 3
+        num_rows = 4
+        with tempfile.TemporaryDirectory() as source:
+            rng = np.random.default_rng(5)
+            end_time = time.time() - 100
+            for i in range(num_files):
+                filename = dsm_csc.utils.create_telemetry_data(
+                    source, 1, num_rows, rng=rng, end_time=end_time + i
+                )
+                os.utime(filename, (end_time + i, end_time + i))
+            replay = TelemetryReplay(
+                find_replay_files(source), self.telemetry_directory, speed=20
+            )
+
+            with mock.patch.dict(
+                os.environ,
+                DSM_TELEMETRY_DIR=self.telemetry_directory,
+                DSM_INGEST_JOURNAL=os.path.join(self.telemetry_directory, "journal"),
+            ):
+                async with self.make_csc(
+                    initial_state=salobj.State.ENABLED, simulation_mode=0
+                ):
+                    await replay.run()
+                    for _ in range(num_files * num_rows):
+                        dome_seeing = await self.assert_next_sample(
+                            self.remote.tel_domeSeeing, dsmIndex=1
+                        )
+                        replay.record_published(dome_seeing.timestampCurrent)
+                    self.assertTrue(await replay.wait_published(timeout=0))
+                    summary = replay.summary()
+                    self.assertEqual(summary["num_published"], num_files)
+                    self.assertGreater(summary["publish_lag"]["median"], 0)
+
+    async def test_compressed_file(self):
+        """Test that the rows of a gzip-compressed DAT file are published."""
+        self.telemetry_directory = tempfile.mkdtemp()
+        num_rows = 50
+        filename = os.path.join(self.telemetry_directory, "dsm_compressed.dat.gz")
+        with gzip.open(filename, "wt") as ofile:
+            writer = csv.writer(ofile)
+            for i in range(num_rows):
+                writer.writerow(
+                    [
+                        "2019-08-08T22:26:52.451723",
+                        "2019-08-08T22:26:51.451723",
+                        "2019-08-08T22:26:52.451723",
+                        float(i),
+                        float(i),
+                        215.0,
+                        321.0,
+                        2050.0,
+                        1050.0,
+                        6.5,
+                    ]
+                )
+
+        with mock.patch.dict(
+            os.environ,
+            DSM_TELEMETRY_DIR=self.telemetry_directory,
+            DSM_INGEST_JOURNAL=os.path.join(self.telemetry_directory, "journal"),
+        ):
+            async with self.make_csc(
+                initial_state=salobj.State.ENABLED, simulation_mode=0
+            ):
+                for i in range(num_rows):
+                    dome_seeing = await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1
+                    )
+                    self.assertEqual(dome_seeing.rmsX, i)
+                entry = self.csc.ingest_journal.get(filename)
+                self.assertTrue(entry.is_complete(os.stat(filename)))
+                self.assertGreater(entry.data_offset, os.stat(filename).st_size)
+
+    async def test_binary_file(self):
+        """Test that the rows of a binary telemetry file are published."""
+        self.telemetry_directory = tempfile.mkdtemp()
+        num_rows = 20
+        records = np.zeros(num_rows, dtype=dsm_csc.utils.DOME_SEEING_DTYPE)
+        for name in ("timestampCurrent", "timestampFirstMeasurement"):
+            records[name] = 1565303249.451723 + np.arange(num_rows)
+        records["timestampLastMeasurement"] = records["timestampCurrent"]
+        records["rmsX"] = np.arange(num_rows)
+        records["flux"] = 2050
+        filename = os.path.join(self.telemetry_directory, "dsm_binary.dsmb")
+        dsm_csc.utils.write_binary_telemetry_data(filename, records)
+
+        with mock.patch.dict(
+            os.environ,
+            DSM_TELEMETRY_DIR=self.telemetry_directory,
+            DSM_INGEST_JOURNAL=os.path.join(self.telemetry_directory, "journal"),
+        ):
+            async with self.make_csc(
+                initial_state=salobj.State.ENABLED, simulation_mode=0
+            ):
+                for i in range(num_rows):
+                    dome_seeing = await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1
+                    )
+                    self.assertEqual(dome_seeing.rmsX, i)
+                    self.assertEqual(
+                        dome_seeing.timestampCurrent, records["timestampCurrent"][i]
+                    )
+                entry = self.csc.ingest_journal.get(filename)
+                self.assertTrue(entry.is_complete(os.stat(filename)))
+
+    async def test_push_socket(self):
+        """Test that rows pushed over the push socket are published, with
+        lower latency than rows written to a file.
+        """
+        self.telemetry_directory = tempfile.mkdtemp()
+        push_socket = os.path.join(self.telemetry_directory, "dsm{index}.sock")
+        num_rows = 20
+        records = np.zeros(1, dtype=dsm_csc.utils.DOME_SEEING_DTYPE)
+        for name in dsm_csc.utils.DAT_COLUMNS[:3]:
+            records[name] = 1565303249.451723
+        records["flux"] = 2050
+
+        with mock.patch.dict(
+            os.environ,
+            DSM_TELEMETRY_DIR=self.telemetry_directory,
+            DSM_INGEST_JOURNAL=os.path.join(self.telemetry_directory, "journal"),
+            DSM_PUSH_SOCKET=push_socket,
+        ):
+            async with self.make_csc(
+                initial_state=salobj.State.ENABLED, simulation_mode=0
+            ):
+                set_write = self.csc.tel_domeSeeing.set_write
+                write_times = []
+
+                async def timed_set_write(**kwargs):
+                    write_times.append(time.monotonic())
+                    await set_write(**kwargs)
+
+                self.csc.tel_domeSeeing.set_write = timed_set_write
+                client = await PushClient.connect(push_socket.format(index=1))
+                await client.send_config(
+                    dict(
+                        timestamp="2019-08-08T22:26:52.451723",
+                        ui_versions=dict(
+                            code="1.0.1", config="1.4.4", config_file="/dsm/a.yaml"
+                        ),
+                        camera=dict(name="Push_Camera", fps=120),
+                        data=dict(buffer_size=128, acquisition_time=1),
+                    )
+                )
+                try:
+                    config_msg = self.remote.evt_configuration
+                except AttributeError:
+                    config_msg = self.remote.tel_configuration
+                await self.assert_next_sample(
+                    config_msg, dsmIndex=1, cameraName="Push_Camera"
+                )
+
+                push_latencies = []
+                for i in range(num_rows):
+                    records["rmsX"] = i
+                    send_time = time.monotonic()
+                    await client.send_records(records)
+                    dome_seeing = await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1
+                    )
+                    self.assertEqual(dome_seeing.rmsX, i)
+                    push_latencies.append(write_times[-1] - send_time)
+                await client.close()
+
+                file_latencies = []
+                for i in range(num_rows):
+                    records["rmsX"] = i
+                    filename = os.path.join(self.telemetry_directory, f"dsm_{i}.dsmb")
+                    write_time = time.monotonic()
+                    dsm_csc.utils.write_binary_telemetry_data(filename, records)
+                    await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1, rmsX=i
+                    )
+                    file_latencies.append(write_times[-1] - write_time)
+
+                self.assertLess(np.median(push_latencies), np.median(file_latencies))
+                self.assertLess(np.median(push_latencies), 0.001)
+
+            self.assertFalse(os.path.exists(push_socket.format(index=1)))
+
+    async def test_high_rate_simulation(self):
+        """Test that high-rate simulation publishes whole camera buffers
+        at the advertised frame rate.
+        """
+        async with self.make_csc(initial_state=salobj.State.STANDBY, simulation_mode=3):
+            self.telemetry_directory = self.csc.telemetry_directory
+            await salobj.set_summary_state(self.remote, salobj.State.ENABLED)
+            try:
+                config_msg = self.remote.evt_configuration
+            except AttributeError:
+                config_msg = self.remote.tel_configuration
+            configuration = await self.assert_next_sample(config_msg, dsmIndex=1)
+            fps = configuration.cameraFps
+            buffer_size = configuration.dataBufferSize
+            self.assertEqual(fps, dsm_csc.HIGH_RATE_CAMERA_FPS)
+            self.assertEqual(buffer_size, dsm_csc.HIGH_RATE_BUFFER_SIZE)
+
+            timestamps = []
+            for _ in range(2 * buffer_size):
+                dome_seeing = await self.assert_next_sample(
+                    self.remote.tel_domeSeeing, dsmIndex=1
+                )
+                timestamps.append(dome_seeing.timestampCurrent)
+
+            # Consecutive buffers join up without gaps or overlaps.
+            np.testing.assert_allclose(np.diff(timestamps), 1 / fps, atol=1e-5)
+
+    async def test_pipeline_metrics(self):
+        """Test the latency and throughput instrumentation."""
+        async with self.make_csc(initial_state=salobj.State.STANDBY, simulation_mode=1):
+            self.assertIsNone(self.csc.get_pipeline_metrics())
+
+        with mock.patch.dict(os.environ, DSM_METRICS_INTERVAL="0.5"):
+            async with self.make_csc(
+                initial_state=salobj.State.STANDBY, simulation_mode=1
+            ):
+                with self.assertLogs(self.csc.log, level=logging.INFO) as logs:
+                    await salobj.set_summary_state(self.remote, salobj.State.ENABLED)
+                    for _ in range(3):
+                        await self.assert_next_sample(
+                            self.remote.tel_domeSeeing, dsmIndex=1
+                        )
+                    await asyncio.sleep(1)
+
+                summary = self.csc.get_pipeline_metrics()
+                self.assertGreaterEqual(summary["num_files"], 3)
+                self.assertGreater(summary["rows_per_second"], 0)
+                for stage in ("event", "queue", "parse", "convert_time", "write"):
+                    self.assertGreater(summary["stages"][stage]["count"], 0)
+                    self.assertGreaterEqual(summary["stages"][stage]["p50"], 0)
+                self.assertTrue(any("Pipeline:" in message for message in logs.output))
+                self.assertGreaterEqual(summary["ingest_queue"]["max_depth"], 1)
+                self.assertEqual(summary["ingest_queue"]["num_dropped"], 0)
+                self.assertTrue(
+                    any("Ingest queue:" in message for message in logs.output)
+                )
+
+                # A file that is gone before it is read leaves no receipt
+                # time behind.
+                missing = pathlib.Path(self.csc.telemetry_directory) / "dsm_gone.dat"
+                self.csc.event_receipt_times[missing] = time.time()
+                self.assertIsNone(await self.csc.read_file(missing))
+                self.assertNotIn(missing, self.csc.event_receipt_times)
+
+    async def test_profiling(self):
+        """Test that the signal turns profiling on and off during a burst
+        of high-rate telemetry.
+        """
+        async with self.make_csc(initial_state=salobj.State.STANDBY, simulation_mode=3):
+            self.assertIsNone(self.csc.profile_directory)
+
+        with tempfile.TemporaryDirectory() as profile_directory, mock.patch.dict(
+            os.environ, DSM_PROFILE_DIR=profile_directory, DSM_PROFILE_WINDOW="60"
+        ):
+            async with self.make_csc(
+                initial_state=salobj.State.STANDBY, simulation_mode=3
+            ):
+                self.telemetry_directory = self.csc.telemetry_directory
+                await salobj.set_summary_state(self.remote, salobj.State.ENABLED)
+                with self.assertLogs(self.csc.log, level=logging.INFO) as logs:
+                    os.kill(os.getpid(), signal.SIGUSR1)
+                    await asyncio.sleep(0)
+                    self.assertFalse(self.csc.profile_task.done())
+                    for _ in range(2 * dsm_csc.HIGH_RATE_BUFFER_SIZE):
+                        await self.assert_next_sample(
+                            self.remote.tel_domeSeeing, dsmIndex=1
+                        )
+                    # A second signal ends the profile early.
+                    os.kill(os.getpid(), signal.SIGUSR1)
+                    await asyncio.wait_for(
+                        asyncio.gather(self.csc.profile_task, return_exceptions=True),
+                        timeout=STD_TIMEOUT,
+                    )
+
+                self.assertEqual(
+                    os.path.dirname(self.csc.last_profile), profile_directory
+                )
+                with open(self.csc.last_profile) as infile:
+                    lines = infile.read().splitlines()
+                self.assertGreater(len(lines), 0)
+                for line in lines:
+                    stack, count = line.rsplit(" ", 1)
+                    self.assertGreater(int(count), 0)
+                # The rows were read in the parse workers and published in
+                # the event loop.
+                self.assertTrue(any(line.startswith("dsm_parse") for line in lines))
+                self.assertTrue(
+                    any(
+                        line.startswith("MainThread") and "dsm_csc.py" in line
+                        for line in lines
+                    )
+                )
+                self.assertTrue(
+                    any("top 15 functions" in message for message in logs.output)
+                )
+
+    async def test_seeing_statistics(self):
+        """Test the rolling seeing statistics."""
+        async with self.make_csc(initial_state=salobj.State.STANDBY, simulation_mode=1):
+            self.assertIsNone(self.csc.get_seeing_statistics())
+
+        with mock.patch.dict(
+            os.environ, DSM_STATISTICS_INTERVAL="0.5", DSM_STATISTICS_WINDOWS="2,60"
+        ):
+            async with self.make_csc(
+                initial_state=salobj.State.STANDBY, simulation_mode=1
+            ):
+                with self.assertLogs(self.csc.log, level=logging.INFO) as logs:
+                    await salobj.set_summary_state(self.remote, salobj.State.ENABLED)
+                    fwhm = []
+                    for _ in range(3):
+                        dome_seeing = await self.assert_next_sample(
+                            self.remote.tel_domeSeeing, dsmIndex=1
+                        )
+                        fwhm.append(dome_seeing.fwhm)
+                    await asyncio.sleep(1)
+
+                summary = self.csc.get_seeing_statistics()
+                self.assertGreaterEqual(summary["count"], 3)
+                self.assertEqual(set(summary["fwhm"]["windows"]), {2, 60})
+                window = summary["fwhm"]["windows"][60]
+                self.assertGreaterEqual(window["count"], 3)
+                self.assertLessEqual(window["min"], min(fwhm))
+                self.assertGreaterEqual(window["max"], max(fwhm))
+                self.assertIsNotNone(summary["fwhm"]["p90"])
+                self.assertTrue(
+                    any("Seeing over" in message for message in logs.output)
+                )
+
+    async def test_max_rows_per_second(self):
+        """Test that rows are published in order and no faster than
+        $DSM_MAX_ROWS_PER_SECOND.
+        """
+        num_rows = 20
+        max_rows_per_second = 20
+        with mock.patch.dict(
+            os.environ, DSM_MAX_ROWS_PER_SECOND=str(max_rows_per_second)
+        ):
+            async with self.make_csc(
+                initial_state=salobj.State.STANDBY, simulation_mode=1
+            ):
+                self.telemetry_directory = self.csc.telemetry_directory
+                filename = os.path.join(self.telemetry_directory, "dsm_rate.dat")
+                with open(filename, "w") as csv_file:
+                    writer = csv.writer(csv_file)
+                    for i in range(num_rows):
+                        writer.writerow(
+                            [
+                                "2019-08-08T22:26:52.451723",
+                                "2019-08-08T22:26:51.451723",
+                                "2019-08-08T22:26:52.451723",
+                                1000.0 + i,
+                                42.0,
+                                215.0,
+                                321.0,
+                                2050.0,
+                                1050.0,
+                                6.5,
+                            ]
+                        )
+
+                await salobj.set_summary_state(self.remote, salobj.State.ENABLED)
+                values = []
+                times = []
+                while len(values) < num_rows:
+                    dome_seeing = await self.assert_next_sample(
+                        self.remote.tel_domeSeeing, dsmIndex=1
+                    )
+                    if dome_seeing.rmsX >= 1000:
+                        values.append(dome_seeing.rmsX)
+                        times.append(dome_seeing.private_sndStamp)
+
+            self.assertEqual(values, [1000.0 + i for i in range(num_rows)])
+            self.assertGreaterEqual(
+                times[-1] - times[0], 0.9 * (num_rows - 1) / max_rows_per_second
+            )
+
+    async def test_responsive_during_large_file(self):
+        """Test that heartbeats and commands stay on time while a
+        multi-megabyte DAT file is ingested.
+        """
+        async with self.make_csc(initial_state=salobj.State.ENABLED, simulation_mode=1):
+            self.telemetry_directory = self.csc.telemetry_directory
+            await self.assert_next_sample(self.remote.tel_domeSeeing, dsmIndex=1)
+
+            row = [
+                "2019-08-08T22:26:52.451723",
+                "2019-08-08T22:26:51.451723",
+                "2019-08-08T22:26:52.451723",
+                0.5,
+                0.5,
+                215.0,
+                321.0,
+                2050.0,
+                1050.0,
+                6.5,
+            ]
+            filename = os.path.join(self.telemetry_directory, "dsm_large.dat")
+            with open(filename, "w") as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerows([row] * 30000)
+            self.assertGreater(os.path.getsize(filename), 3e6)
+
+            heartbeat_interval = self.csc.heartbeat_interval
+            heartbeat = await self.remote.evt_heartbeat.next(
+                flush=True, timeout=STD_TIMEOUT
+            )
+            for _ in range(3):
+                start = time.monotonic()
+                await self.remote.cmd_setLogLevel.set_start(
+                    level=logging.DEBUG, timeout=STD_TIMEOUT
+                )
+                self.assertLess(time.monotonic() - start, heartbeat_interval / 2)
+
+                previous_heartbeat = heartbeat
+                heartbeat = await self.remote.evt_heartbeat.next(
+                    flush=False, timeout=STD_TIMEOUT
+                )
+                self.assertLess(
+                    heartbeat.private_sndStamp - previous_heartbeat.private_sndStamp,
+                    heartbeat_interval * 1.5,
+                )
+
     def test_bad_simulation_mode(self):
         """Test to ensure bad simulation modes raise"""
         with self.assertRaises(ValueError):
             dsm_csc.DSMCSC(
                 index=1,
                 initial_state=salobj.State.STANDBY,
-                simulation_mode=3,
+                simulation_mode=4,
             )
 
     async def test_bin_script(self):
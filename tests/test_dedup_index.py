@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+from lsst.ts.dsm import TimestampIndex
+
+
+class TestTimestampIndex(unittest.TestCase):
+    def test_find_new(self):
+        index = TimestampIndex(max_size=100, max_age=10)
+        timestamps = np.array([1.0, 2.0, 2.0, 3.0])
+        # Repeats within one batch are not duplicates.
+        self.assertEqual(index.find_new(timestamps).tolist(), [True] * 4)
+        index.add(timestamps)
+        self.assertEqual(len(index), 3)
+        self.assertIn(2.0, index)
+
+        new = index.find_new(np.array([3.0, 4.0, 1.0, 4.0]))
+        self.assertEqual(new.tolist(), [False, True, False, True])
+        self.assertEqual(index.num_duplicates, 2)
+        self.assertEqual(len(index.find_new(np.empty(0))), 0)
+
+    def test_eviction(self):
+        index = TimestampIndex(max_size=100, max_age=10)
+        index.add(np.arange(20.0))
+        # Only timestamps up to 10 s older than the newest are kept.
+        self.assertEqual(len(index), 11)
+        self.assertNotIn(8.0, index)
+        self.assertIn(9.0, index)
+
+        index = TimestampIndex(max_size=5, max_age=1000)
+        index.add(np.arange(20.0))
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.find_new(np.array([14.0, 15.0])).tolist(), [True, False])
+
+        # The memory used is bounded at high rates.
+        index = TimestampIndex(max_size=1000, max_age=60)
+        for start in range(0, 10000, 128):
+            index.add(start / 120 + np.arange(128) / 120)
+            self.assertLessEqual(len(index), 1000)
+
+    def test_out_of_order(self):
+        index = TimestampIndex(max_size=5, max_age=10)
+        index.add([20.0, 1.0, 15.0, 12.0])
+        # The oldest timestamp is forgotten, not the first added.
+        self.assertEqual(len(index), 3)
+        self.assertNotIn(1.0, index)
+        self.assertIn(20.0, index)
+
+        index.add([11.0, 19.0, 18.0])
+        self.assertEqual(len(index), 5)
+        self.assertEqual(
+            index.find_new(np.array([11.0, 12.0, 15.0, 18.0, 19.0, 20.0])).tolist(),
+            [True, False, False, False, False, False],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import signal
+import tempfile
+import unittest
+from unittest import mock
+
+from lsst.ts import salobj
+from lsst.ts.dsm import DSMGroup
+
+STD_TIMEOUT = 15
+
+INDICES = [1, 2, 3]
+
+
+class TestDSMGroup(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        salobj.set_test_topic_subname()
+
+    def test_bad_indices(self):
+        for indices in ([], [1, 2, 1]):
+            with self.subTest(indices=indices):
+                with self.assertRaises(ValueError):
+                    DSMGroup(indices=indices)
+
+    async def test_group(self):
+        """Test that each CSC in a group publishes the telemetry of its own
+        directory.
+        """
+        async with DSMGroup(
+            indices=INDICES, initial_state=salobj.State.STANDBY, simulation_mode=1
+        ) as group, salobj.Domain() as domain:
+            watchers = {id(csc.telemetry_watcher) for csc in group.cscs}
+            self.assertEqual(len(watchers), 1)
+            directories = {csc.telemetry_directory for csc in group.cscs}
+            self.assertEqual(len(directories), len(INDICES))
+
+            remotes = [
+                salobj.Remote(domain=domain, name="DSM", index=index)
+                for index in INDICES
+            ]
+            for remote in remotes:
+                await remote.start_task
+                await salobj.set_summary_state(remote, salobj.State.ENABLED)
+
+            for index, remote in zip(INDICES, remotes):
+                for _ in range(2):
+                    dome_seeing = await remote.tel_domeSeeing.next(
+                        flush=False, timeout=STD_TIMEOUT
+                    )
+                    self.assertEqual(dome_seeing.dsmIndex, index)
+
+            # Disabling one CSC leaves the others running.
+            await salobj.set_summary_state(remotes[0], salobj.State.STANDBY)
+            self.assertIsNone(group.cscs[0].telemetry_watch)
+            remotes[1].tel_domeSeeing.flush()
+            dome_seeing = await remotes[1].tel_domeSeeing.next(
+                flush=False, timeout=STD_TIMEOUT
+            )
+            self.assertEqual(dome_seeing.dsmIndex, INDICES[1])
+
+            for remote in remotes:
+                await remote.close()
+
+    async def test_profiling(self):
+        """Test that only one CSC of a group handles the profiling signal
+        and profiles.
+        """
+        with tempfile.TemporaryDirectory() as profile_directory, mock.patch.dict(
+            os.environ,
+            DSM_PROFILE_DIR=profile_directory,
+            DSM_PROFILE_WINDOW="60",
+            DSM_PROFILE_ON_ENABLE="1",
+        ):
+            async with DSMGroup(
+                indices=INDICES[:2],
+                initial_state=salobj.State.ENABLED,
+                simulation_mode=1,
+            ) as group:
+                handlers = [csc for csc in group.cscs if csc.profile_signal_handled]
+                self.assertEqual(len(handlers), 1)
+                handler = handlers[0]
+                other = group.cscs[1 - group.cscs.index(handler)]
+                # Only one profile runs at a time.
+                await asyncio.sleep(0.1)
+                self.assertFalse(handler.profile_task.done())
+                self.assertTrue(other.profile_task.done())
+
+                # The signal stops the profile of the handling CSC.
+                os.kill(os.getpid(), signal.SIGUSR1)
+                await asyncio.wait_for(
+                    asyncio.gather(handler.profile_task, return_exceptions=True),
+                    timeout=STD_TIMEOUT,
+                )
+                self.assertEqual(
+                    os.path.dirname(handler.last_profile), profile_directory
+                )
+                self.assertIsNone(other.last_profile)
+
+                # Once the handling CSC closes another one can take over.
+                await handler.close()
+                self.assertFalse(handler.profile_signal_handled)
+                other.add_profile_signal_handler()
+                self.assertTrue(other.profile_signal_handled)
+            self.assertFalse(other.profile_signal_handled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import importlib
+import pkgutil
+import subprocess
+import sys
+import unittest
+
+from lsst.ts import dsm
+
+# Modules the shutdown_dsm command must not import before it has parsed its
+# arguments, and that no entry point may import unless a dependency does.
+HEAVY_MODULES = ("astropy", "asyncinotify", "lsst.ts.salobj", "numpy", "yaml")
+
+# The third-party modules the CSC needs anyway.
+RUN_DSM_DEPENDENCIES = (
+    "import asyncinotify, erfa, numpy, yaml; from lsst.ts import salobj, utils"
+)
+
+# The standard library modules the shutdown_dsm command needs anyway.
+SHUTDOWN_DSM_DEPENDENCIES = "import argparse, asyncio"
+
+# Import time budgets of the commands, beyond that of their dependencies
+# (seconds). They are generous, to allow for a loaded machine, but well
+# below the cost of importing astropy or salobj.
+SHUTDOWN_DSM_OWN_BUDGET = 0.25
+RUN_DSM_OWN_BUDGET = 0.25
+
+# Times each import is measured; the fastest is used, as the others were
+# slowed down by other processes.
+NUM_MEASUREMENTS = 3
+
+
+def get_import_times(statement):
+    """Run a statement in a new interpreter with ``-X importtime``.
+
+    Parameters
+    ----------
+    statement : `str`
+        The Python statement to run.
+
+    Returns
+    -------
+    import_times : `dict` [`str`, `float`]
+        The time spent importing each module imported by the interpreter,
+        excluding the modules it imports (seconds).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, _, name = line.removeprefix("import time:").split("|")
+        import_times[name.strip()] = int(self_time) / 1e6
+    return import_times
+
+
+def get_import_time(statement):
+    """Get the total time a statement spends importing modules, in the
+    fastest of `NUM_MEASUREMENTS` new interpreters (seconds).
+    """
+    return min(
+        sum(get_import_times(statement).values()) for _ in range(NUM_MEASUREMENTS)
+    )
+
+
+def is_heavy(name):
+    return any(name == heavy or name.startswith(heavy + ".") for heavy in HEAVY_MODULES)
+
+
+class TestImportTime(unittest.TestCase):
+    def test_exports(self):
+        """Test that the lazily imported names match the modules."""
+        module_names = {
+            info.name
+            for info in pkgutil.iter_modules(dsm.__path__)
+            if info.name not in ("shutdown_dsm", "version")
+        }
+        self.assertEqual(module_names, dsm._EXPORT_MODULES)
+        for module_name in sorted(module_names):
+            with self.subTest(module=module_name):
+                module = importlib.import_module(f"lsst.ts.dsm.{module_name}")
+                names = [
+                    name
+                    for name, exporter in dsm._EXPORTS.items()
+                    if exporter == module_name
+                ]
+                self.assertEqual(sorted(names), sorted(module.__all__))
+                for name in names:
+                    self.assertIs(getattr(dsm, name), getattr(module, name))
+        self.assertIs(dsm.utils, importlib.import_module("lsst.ts.dsm.utils"))
+        shutdown_module = sys.modules["lsst.ts.dsm.shutdown_dsm"]
+        self.assertEqual(
+            sorted(shutdown_module.__all__),
+            sorted(set(dsm.__all__) - set(dsm._EXPORTS)),
+        )
+        self.assertIs(dsm.shutdown_dsm, shutdown_module.shutdown_dsm)
+        with self.assertRaises(AttributeError):
+            dsm.no_such_name
+
+    def test_shutdown_dsm(self):
+        import_times = get_import_times("from lsst.ts.dsm import shutdown_dsm")
+        self.assertIn("lsst.ts.dsm.shutdown_dsm", import_times)
+        self.assertEqual([name for name in import_times if is_heavy(name)], [])
+        self.assertLess(
+            get_import_time("from lsst.ts.dsm import shutdown_dsm")
+            - get_import_time(SHUTDOWN_DSM_DEPENDENCIES),
+            SHUTDOWN_DSM_OWN_BUDGET,
+        )
+
+    def test_run_dsm(self):
+        import_times = get_import_times("from lsst.ts.dsm import run_dsm")
+        self.assertIn("lsst.ts.dsm.dsm_csc", import_times)
+        self.assertLess(
+            get_import_time("from lsst.ts.dsm import run_dsm")
+            - get_import_time(RUN_DSM_DEPENDENCIES),
+            RUN_DSM_OWN_BUDGET,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from lsst.ts.dsm import IngestJournal, ingest_journal
+
+
+class TestIngestJournal(unittest.TestCase):
+    def setUp(self):
+        self.journal_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.journal_dir.name, "journal.jsonl")
+        self.mtime_ns = time.time_ns()
+
+    def tearDown(self):
+        self.journal_dir.cleanup()
+
+    def test_memory_only(self):
+        journal = IngestJournal(None)
+        journal.record("/tmp/dsm_1.dat", 100, self.mtime_ns, 50)
+        self.assertEqual(journal.get("/tmp/dsm_1.dat").offset, 50)
+        journal.remove("/tmp/dsm_1.dat")
+        self.assertIsNone(journal.get("/tmp/dsm_1.dat"))
+        journal.close()
+
+    def test_persistence(self):
+        journal = IngestJournal(self.filename)
+        journal.record("/tmp/dsm_1.dat", 100, self.mtime_ns, 50)
+        journal.record("/tmp/dsm_1.dat", 100, self.mtime_ns, 100)
+        journal.record("/tmp/dsm_2.dat", 200, self.mtime_ns, 20)
+        journal.record("/tmp/dsm_3.dat", 300, self.mtime_ns, 300)
+        journal.remove("/tmp/dsm_3.dat")
+        # A crash in the middle of writing a line.
+        journal._file.write('{"name": "/tmp/dsm_4.dat", "si')
+        journal.close()
+
+        journal = IngestJournal(self.filename)
+        self.assertEqual(set(journal.entries), {"/tmp/dsm_1.dat", "/tmp/dsm_2.dat"})
+        entry = journal.get("/tmp/dsm_1.dat")
+        self.assertEqual(entry.offset, 100)
+        stat = os.stat_result((0, 0, 0, 0, 0, 0, 100, 0, 0, 0, 0, 0, 0, 0, 0, 0))
+        self.assertFalse(entry.matches(stat))
+        self.assertEqual(journal.get("/tmp/dsm_2.dat").offset, 20)
+        # Loading compacts the journal.
+        self.assertEqual(journal.num_lines, 2)
+        journal.close()
+
+    def test_data_offset(self):
+        journal = IngestJournal(self.filename)
+        journal.record("/tmp/dsm_1.dat.gz", 100, self.mtime_ns, 0, data_offset=2000)
+        journal.record("/tmp/dsm_2.dat", 100, self.mtime_ns, 50)
+        journal.close()
+
+        journal = IngestJournal(self.filename)
+        entry = journal.get("/tmp/dsm_1.dat.gz")
+        self.assertEqual(entry.offset, 0)
+        self.assertEqual(entry.data_offset, 2000)
+        self.assertIsNone(journal.get("/tmp/dsm_2.dat").data_offset)
+        journal.close()
+        with open(self.filename, "r") as infile:
+            self.assertNotIn("data_offset", infile.readlines()[-1])
+
+    def test_compaction(self):
+        journal = IngestJournal(self.filename, retention=3600)
+        old_mtime_ns = self.mtime_ns - int(7200e9)
+        journal.record("/tmp/old.dat", 100, old_mtime_ns, 100)
+        for offset in range(ingest_journal.MIN_COMPACT_LINES):
+            self.assertFalse(journal.needs_compaction)
+            journal.record("/tmp/dsm_1.dat", 10**6, self.mtime_ns, offset)
+        self.assertTrue(journal.needs_compaction)
+        journal.compact()
+        self.assertFalse(journal.needs_compaction)
+        self.assertLess(journal.num_lines, ingest_journal.MIN_COMPACT_LINES)
+        self.assertIsNone(journal.get("/tmp/old.dat"))
+        journal.close()
+
+        with open(self.filename, "r") as infile:
+            num_lines = len(infile.readlines())
+        self.assertEqual(num_lines, journal.num_lines)
+        journal = IngestJournal(self.filename, retention=3600)
+        self.assertEqual(
+            journal.get("/tmp/dsm_1.dat").offset, ingest_journal.MIN_COMPACT_LINES - 1
+        )
+        journal.close()
+
+    def test_compact_async(self):
+        async def compact():
+            journal = IngestJournal(self.filename)
+            for offset in range(ingest_journal.MIN_COMPACT_LINES + 1):
+                journal.record("/tmp/dsm_1.dat", 10**6, self.mtime_ns, offset)
+            self.assertTrue(journal.needs_compaction)
+            task = asyncio.create_task(journal.compact_async())
+            # Entries recorded while the file is rewritten are kept.
+            await asyncio.sleep(0)
+            self.assertFalse(journal.needs_compaction)
+            journal.record("/tmp/dsm_2.dat", 100, self.mtime_ns, 50)
+            await task
+            self.assertEqual(journal.num_lines, 2)
+            journal.close()
+
+        asyncio.run(compact())
+        with open(self.filename, "r") as infile:
+            self.assertEqual(len(infile.readlines()), 2)
+        journal = IngestJournal(self.filename)
+        self.assertEqual(
+            journal.get("/tmp/dsm_1.dat").offset, ingest_journal.MIN_COMPACT_LINES
+        )
+        self.assertEqual(journal.get("/tmp/dsm_2.dat").offset, 50)
+        journal.close()
+
+    def test_compact_failure(self):
+        async def compact():
+            journal = IngestJournal(self.filename)
+            for offset in range(ingest_journal.MIN_COMPACT_LINES + 1):
+                journal.record("/tmp/dsm_1.dat", 10**6, self.mtime_ns, offset)
+            with mock.patch.object(
+                ingest_journal.os, "replace", side_effect=PermissionError
+            ):
+                with self.assertRaises(PermissionError):
+                    await journal.compact_async()
+            # The old journal file is still recorded in.
+            journal.record("/tmp/dsm_2.dat", 100, self.mtime_ns, 50)
+            journal.close()
+
+        asyncio.run(compact())
+        with open(self.filename, "r") as infile:
+            self.assertEqual(
+                len(infile.readlines()), ingest_journal.MIN_COMPACT_LINES + 2
+            )
+        journal = IngestJournal(self.filename)
+        self.assertEqual(journal.get("/tmp/dsm_2.dat").offset, 50)
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
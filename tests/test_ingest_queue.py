@@ -0,0 +1,86 @@
+import asyncio
+import pathlib
+import unittest
+
+from lsst.ts.dsm import IngestQueue, OverflowPolicy
+
+STD_TIMEOUT = 5
+
+
+def make_paths(count):
+    return [pathlib.Path(f"/tmp/dsm_{i}.dat") for i in range(count)]
+
+
+class TestIngestQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_bad_maxsize(self):
+        with self.assertRaises(ValueError):
+            IngestQueue(maxsize=0)
+
+    async def test_block(self):
+        queue = IngestQueue(maxsize=2, policy="block")
+        paths = make_paths(3)
+        for path in paths[:2]:
+            self.assertIsNone(await queue.put(path))
+        self.assertEqual(queue.depth, 2)
+
+        put_task = asyncio.create_task(queue.put(paths[2]))
+        await asyncio.sleep(0.1)
+        self.assertFalse(put_task.done())
+        self.assertEqual(queue.num_blocked, 1)
+
+        self.assertEqual(await queue.get(), paths[0])
+        await asyncio.wait_for(put_task, timeout=STD_TIMEOUT)
+        self.assertEqual([await queue.get() for _ in range(2)], paths[1:])
+        self.assertEqual(queue.depth, 0)
+        self.assertEqual(queue.max_depth, 2)
+        self.assertEqual(queue.num_dropped, 0)
+
+    async def test_coalesce(self):
+        queue = IngestQueue(maxsize=2, policy=OverflowPolicy.COALESCE)
+        paths = make_paths(2)
+        await queue.put(paths[0])
+        await queue.put(paths[0])
+        self.assertEqual(queue.depth, 1)
+        self.assertEqual(queue.num_coalesced, 1)
+
+        # Once taken by a publisher the file can be queued again.
+        self.assertEqual(await queue.get(), paths[0])
+        await queue.put(paths[0])
+        await queue.put(paths[1])
+        # A full queue still coalesces duplicates without waiting.
+        await asyncio.wait_for(queue.put(paths[1]), timeout=STD_TIMEOUT)
+        self.assertEqual(queue.num_coalesced, 2)
+        self.assertEqual(queue.num_blocked, 0)
+        self.assertEqual([await queue.get() for _ in range(2)], paths)
+
+    async def test_drop_oldest(self):
+        queue = IngestQueue(maxsize=2, policy=OverflowPolicy.DROP_OLDEST)
+        paths = make_paths(4)
+        self.assertIsNone(await queue.put(paths[0]))
+        self.assertIsNone(await queue.put(paths[1]))
+        self.assertEqual(await queue.put(paths[2]), paths[0])
+        self.assertEqual(await queue.put(paths[3]), paths[1])
+        self.assertEqual(queue.num_dropped, 2)
+        self.assertEqual(
+            queue.summary(),
+            dict(depth=2, max_depth=2, num_blocked=0, num_coalesced=0, num_dropped=2),
+        )
+        self.assertIn("dropped=2", queue.format_summary())
+        self.assertEqual([await queue.get() for _ in range(2)], paths[2:])
+
+    async def test_get_waits(self):
+        queue = IngestQueue(maxsize=1)
+        path = make_paths(1)[0]
+        get_task = asyncio.create_task(queue.get())
+        await asyncio.sleep(0.1)
+        self.assertFalse(get_task.done())
+        await queue.put(path)
+        self.assertEqual(await asyncio.wait_for(get_task, timeout=STD_TIMEOUT), path)
+
+        await queue.put(path)
+        queue.clear()
+        self.assertEqual(queue.depth, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
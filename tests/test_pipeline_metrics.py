@@ -0,0 +1,62 @@
+import time
+import unittest
+
+import numpy as np
+from lsst.ts.dsm import PIPELINE_STAGES, PipelineMetrics
+
+
+class TestPipelineMetrics(unittest.TestCase):
+    def test_empty(self):
+        metrics = PipelineMetrics()
+        summary = metrics.summary()
+        self.assertEqual(set(summary["stages"]), set(PIPELINE_STAGES))
+        for stats in summary["stages"].values():
+            self.assertIsNone(stats)
+        self.assertEqual(summary["num_files"], 0)
+        self.assertEqual(summary["rows_per_second"], 0)
+        self.assertTrue(metrics.format_summary().startswith("Pipeline: 0.00 files/s"))
+
+    def test_percentiles(self):
+        window = 100
+        metrics = PipelineMetrics(window=window)
+        durations = np.random.default_rng(47).exponential(0.01, size=3 * window)
+        for duration in durations:
+            metrics.record("write", duration)
+        metrics.record("parse", 0.5)
+
+        summary = metrics.summary()
+        stats = summary["stages"]["write"]
+        self.assertEqual(stats["count"], window)
+        for p in (50, 95, 99):
+            self.assertAlmostEqual(
+                stats[f"p{p}"], np.percentile(durations[-window:], p)
+            )
+        self.assertEqual(summary["stages"]["parse"]["p99"], 0.5)
+        self.assertIsNone(summary["stages"]["event"])
+        self.assertIn("parse 500.0/500.0/500.0", metrics.format_summary())
+
+    def test_rates(self):
+        metrics = PipelineMetrics(rate_window=60)
+        # Pretend the metrics started 10 seconds ago.
+        metrics.start_time -= 10
+        for _ in range(5):
+            metrics.record_file(num_rows=100)
+        summary = metrics.summary()
+        self.assertEqual(summary["num_files"], 5)
+        self.assertEqual(summary["num_rows"], 500)
+        self.assertAlmostEqual(summary["files_per_second"], 0.5, places=2)
+        self.assertAlmostEqual(summary["rows_per_second"], 50, places=0)
+
+    def test_rate_window(self):
+        metrics = PipelineMetrics(rate_window=0.1)
+        metrics.record_file(num_rows=100)
+        self.assertGreater(metrics.summary()["rows_per_second"], 0)
+        # Files published longer than rate_window ago do not count.
+        time.sleep(0.2)
+        summary = metrics.summary()
+        self.assertEqual(summary["files_per_second"], 0)
+        self.assertEqual(summary["num_files"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import socket
+import tempfile
+import unittest
+
+import numpy as np
+from lsst.ts.dsm import PushClient, PushServer, push_server, utils
+
+STD_TIMEOUT = 5
+
+
+class TestPushServer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "dsm1.sock")
+        self.tables = []
+        self.configs = []
+        self.received = asyncio.Event()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    async def records_callback(self, table):
+        self.tables.append(table)
+        self.received.set()
+
+    async def config_callback(self, content):
+        self.configs.append(content)
+        self.received.set()
+
+    async def wait_received(self):
+        await asyncio.wait_for(self.received.wait(), timeout=STD_TIMEOUT)
+        self.received.clear()
+
+    def make_server(self):
+        return PushServer(
+            self.path,
+            records_callback=self.records_callback,
+            config_callback=self.config_callback,
+            log=logging.getLogger("test_push_server"),
+        )
+
+    async def test_frames(self):
+        records = np.zeros(3, dtype=utils.DOME_SEEING_DTYPE)
+        records["rmsX"] = [1, 2, 3]
+        # A stale socket file left by a crash is replaced.
+        stale = socket.socket(socket.AF_UNIX)
+        stale.bind(self.path)
+        stale.close()
+
+        server = self.make_server()
+        await server.start()
+        client = await PushClient.connect(self.path)
+        await client.send_config(dict(camera=dict(name="Sim_Camera")))
+        await self.wait_received()
+        await client.send_records(records)
+        await self.wait_received()
+        self.assertEqual(self.configs, [dict(camera=dict(name="Sim_Camera"))])
+        self.assertEqual(self.tables[0].dtype, utils.BINARY_DAT_DTYPE)
+        self.assertEqual(self.tables[0]["rmsX"].tolist(), [1, 2, 3])
+
+        # A frame that is not whole records is skipped.
+        await client._send(push_server.FRAME_RECORDS, b"x" * 10)
+        await client.send_records(records[:1])
+        await self.wait_received()
+        self.assertEqual(len(self.tables), 2)
+        self.assertEqual(server.num_frames, 4)
+
+        # An unknown frame disconnects the client.
+        await client._send(b"NOPE", b"")
+        self.assertEqual(
+            await asyncio.wait_for(client.reader.read(), timeout=STD_TIMEOUT), b""
+        )
+        await client.close()
+
+        await server.close()
+        self.assertFalse(os.path.exists(self.path))
+        with self.assertRaises(OSError):
+            await PushClient.connect(self.path)
+
+    async def test_close_with_client(self):
+        server = self.make_server()
+        await server.start()
+        client = await PushClient.connect(self.path)
+        await client.send_config(dict())
+        await self.wait_received()
+        await asyncio.wait_for(server.close(), timeout=STD_TIMEOUT)
+        self.assertEqual(
+            await asyncio.wait_for(client.reader.read(), timeout=STD_TIMEOUT), b""
+        )
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import asyncio
+import time
+import unittest
+
+from lsst.ts.dsm import RateLimiter
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_no_limit(self):
+        limiter = RateLimiter(rate=0)
+        t0 = time.monotonic()
+        for _ in range(1000):
+            await limiter.wait()
+        self.assertLess(time.monotonic() - t0, 0.5)
+
+    async def test_rate(self):
+        rate = 50
+        num_operations = 26
+        limiter = RateLimiter(rate=rate)
+        t0 = time.monotonic()
+        for _ in range(num_operations):
+            await limiter.wait()
+        duration = time.monotonic() - t0
+        self.assertGreaterEqual(duration, (num_operations - 1) / rate - 0.01)
+        self.assertLess(duration, 2 * num_operations / rate)
+
+    async def test_no_burst_after_idle(self):
+        rate = 20
+        limiter = RateLimiter(rate=rate)
+        await limiter.wait()
+        await asyncio.sleep(0.3)
+        t0 = time.monotonic()
+        for _ in range(3):
+            await limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - t0, 2 / rate - 0.01)
@@ -0,0 +1,154 @@
+import asyncio
+import math
+import os
+import pathlib
+import tempfile
+import time
+import unittest
+
+import numpy as np
+from lsst.ts.dsm import TelemetryReplay, find_replay_files, utils, write_atomically
+
+STD_TIMEOUT = 5
+
+# Seconds between the recorded data files.
+FILE_SPACING = 1
+
+
+def make_recording(directory, num_files=3, num_rows=5):
+    """Write a recording of a UI configuration file and ``num_files`` DAT
+    files, ``FILE_SPACING`` seconds apart.
+
+    Returns
+    -------
+    data_files : `list` [`str`]
+        The DAT files, oldest first.
+    """
+    rng = np.random.default_rng(11)
+    start = time.time() - 100
+    utils.create_telemetry_config(directory, 1)
+    config_file = os.path.join(directory, "dsm_ui_config.yaml")
+    os.utime(config_file, (start, start))
+    data_files = []
+    for i in range(num_files):
+        mtime = start + i * FILE_SPACING
+        filename = utils.create_telemetry_data(
+            directory, 1, num_rows, rng=rng, end_time=mtime
+        )
+        os.utime(filename, (mtime, mtime))
+        data_files.append(filename)
+    return data_files
+
+
+class TestReplay(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tempdir.name, "source")
+        self.target = os.path.join(self.tempdir.name, "target")
+        os.mkdir(self.source)
+        os.mkdir(self.target)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_find_replay_files(self):
+        data_files = make_recording(self.source)
+        files = find_replay_files(self.source)
+        self.assertEqual(
+            [file.source.name for file in files],
+            ["dsm_ui_config.yaml"] + [os.path.basename(name) for name in data_files],
+        )
+        for file, expected in zip(files, [0, 0, 1, 2]):
+            self.assertAlmostEqual(file.offset, expected * FILE_SPACING, places=3)
+        self.assertIsNone(files[0].last_timestamp)
+        for file in files[1:]:
+            records = utils.read_telemetry_data(file.source).records
+            self.assertEqual(file.last_timestamp, records["timestampCurrent"][-1])
+        self.assertEqual(find_replay_files(self.target), [])
+
+    def test_write_atomically(self):
+        source = pathlib.Path(self.source) / "dsm_1.dat"
+        source.write_text("line\n")
+        path = write_atomically(source, self.target)
+        self.assertEqual(path, pathlib.Path(self.target) / "dsm_1.dat")
+        self.assertEqual(path.read_text(), "line\n")
+        self.assertEqual(os.listdir(self.target), ["dsm_1.dat"])
+
+    async def test_replay(self):
+        speed = 10
+        make_recording(self.source)
+        files = find_replay_files(self.source)
+        with self.assertRaises(ValueError):
+            TelemetryReplay(files, self.target, speed=0)
+        replay = TelemetryReplay(files, self.target, speed=speed)
+        self.assertFalse(await replay.wait_published(timeout=0.01))
+
+        await asyncio.wait_for(replay.run(), timeout=STD_TIMEOUT)
+        self.assertEqual(
+            sorted(os.listdir(self.target)),
+            sorted(file.source.name for file in files),
+        )
+        for file in files:
+            copy = pathlib.Path(self.target) / file.source.name
+            self.assertEqual(copy.read_bytes(), file.source.read_bytes())
+            self.assertAlmostEqual(
+                file.scheduled - replay.start_time, file.offset / speed, places=6
+            )
+            self.assertGreaterEqual(file.written, file.scheduled)
+        # The original spacing is kept, sped up.
+        self.assertGreater(
+            files[-1].written - files[1].written, 0.9 * 2 * FILE_SPACING / speed
+        )
+
+        summary = replay.summary()
+        self.assertEqual(summary["num_files"], 4)
+        self.assertEqual(summary["num_data_files"], 3)
+        self.assertEqual(summary["num_published"], 0)
+        self.assertTrue(math.isnan(summary["publish_lag"]["max"]))
+        self.assertGreaterEqual(summary["write_lag"]["median"], 0)
+
+        replay.record_published(files[1].last_timestamp - 0.01)
+        for file in files[1:]:
+            replay.record_published(
+                file.last_timestamp, publish_time=file.scheduled + 0.5
+            )
+        self.assertTrue(await replay.wait_published(timeout=STD_TIMEOUT))
+        summary = replay.summary()
+        self.assertEqual(summary["num_published"], 3)
+        self.assertAlmostEqual(summary["publish_lag"]["median"], 0.5)
+        self.assertAlmostEqual(summary["publish_lag"]["max"], 0.5)
+        self.assertIn("3 of 3 data files", replay.format_summary())
+
+    async def test_same_last_timestamp(self):
+        data_files = make_recording(self.source, num_files=2)
+        # A file written twice, e.g. under another name.
+        copy = os.path.join(self.source, "dsm_copy.dat")
+        with open(data_files[1], "rb") as infile, open(copy, "wb") as ofile:
+            ofile.write(infile.read())
+        files = find_replay_files(self.source)
+        replay = TelemetryReplay(files, self.target)
+        ends = [
+            file for file in files if file.last_timestamp == files[-1].last_timestamp
+        ]
+        self.assertEqual(len(ends), 2)
+
+        for file in files[1:]:
+            replay.record_published(file.last_timestamp, publish_time=1)
+        self.assertTrue(await replay.wait_published(timeout=STD_TIMEOUT))
+        self.assertEqual(replay.summary()["num_published"], 3)
+        for file in ends:
+            self.assertEqual(file.published, 1)
+
+    async def test_max_speed(self):
+        make_recording(self.source, num_files=5)
+        replay = TelemetryReplay(
+            find_replay_files(self.source), self.target, speed=math.inf
+        )
+        start = time.monotonic()
+        await asyncio.wait_for(replay.run(), timeout=STD_TIMEOUT)
+        self.assertLess(time.monotonic() - start, FILE_SPACING)
+        self.assertEqual(len(os.listdir(self.target)), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import concurrent.futures
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+
+from lsst.ts.dsm import SamplingProfiler
+
+# Seconds the busy thread runs for.
+BUSY_TIME = 0.3
+
+
+def spin(duration):
+    end = time.monotonic() + duration
+    total = 0
+    while time.monotonic() < end:
+        total += 1
+    return total
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_busy_and_idle_threads(self):
+        idle_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="idle"
+        )
+        idle_executor.submit(lambda: None).result()
+        busy_thread = threading.Thread(target=spin, args=(BUSY_TIME,), name="busy")
+
+        profiler = SamplingProfiler(
+            thread_filter=lambda thread: thread is not None
+            and thread.name.startswith(("busy", "idle")),
+            interval=0.001,
+        )
+        profiler.start()
+        with self.assertRaises(RuntimeError):
+            profiler.start()
+        # Only one profiler can own the timer of the process.
+        with self.assertRaises(RuntimeError):
+            SamplingProfiler().start()
+        busy_thread.start()
+        # Wait as an event loop does; a blocking join would only run the
+        # signal handler once the thread is done.
+        while busy_thread.is_alive():
+            time.sleep(0.01)
+        profiler.stop()
+        idle_executor.shutdown()
+
+        self.assertGreater(profiler.num_idle, 0)
+        self.assertGreater(profiler.num_samples, profiler.num_idle)
+        self.assertEqual(
+            sum(profiler.stacks.values()), profiler.num_samples - profiler.num_idle
+        )
+        # The idle worker is only counted.
+        self.assertEqual({stack[0] for stack in profiler.stacks}, {"busy"})
+
+        lines = profiler.collapsed()
+        self.assertGreater(len(lines), 0)
+        for line in lines:
+            self.assertRegex(line, r"^busy;[^ ].*;\S+ \(\S+\.py:\d+\) \d+$")
+        self.assertTrue(
+            re.search(r";spin \(test_sampling_profiler\.py:\d+\) \d+$", lines[0])
+        )
+
+        (name, self_count, total_count), *_ = profiler.top_functions(3)
+        self.assertTrue(name.startswith("spin "))
+        self.assertGreater(self_count, 0)
+        self.assertGreaterEqual(total_count, self_count)
+        self.assertLessEqual(len(profiler.top_functions(3)), 3)
+        summary = profiler.format_top_functions(3).splitlines()
+        self.assertIn(f"Profile of {profiler.num_samples} samples", summary[0])
+        self.assertIn("spin", summary[1])
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "profile.folded")
+            profiler.write_collapsed(filename)
+            with open(filename) as infile:
+                self.assertEqual(infile.read().splitlines(), lines)
+
+    def test_not_started(self):
+        profiler = SamplingProfiler()
+        profiler.stop()
+        self.assertEqual(profiler.num_samples, 0)
+        self.assertEqual(profiler.collapsed(), [])
+        self.assertEqual(profiler.top_functions(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import math
+import tempfile
+import unittest
+
+import numpy as np
+from lsst.ts.dsm import (
+    SEEING_STATISTICS_FIELDS,
+    P2Quantile,
+    RollingWindow,
+    SeeingStatistics,
+    utils,
+)
+
+# 2019-08-09 00:00 UTC, during the night of 2019-08-08 (Unix seconds).
+NIGHT_START = 1565308800.0
+
+
+class TestSeeingStatistics(unittest.TestCase):
+    def read_data(self, num_rows, duration, rng):
+        with tempfile.TemporaryDirectory() as output_dir:
+            data_file = utils.create_telemetry_data(
+                output_dir,
+                duration,
+                num_rows,
+                rng=rng,
+                end_time=NIGHT_START + 3600,
+            )
+            data = utils.read_telemetry_data(data_file)
+        self.assertEqual(len(data.records), num_rows)
+        return data.records
+
+    def test_rolling_window(self):
+        rng = np.random.default_rng(19)
+        timestamps = np.cumsum(rng.uniform(0, 0.2, size=3000))
+        values = rng.lognormal(mean=-0.5, sigma=0.3, size=len(timestamps))
+        window = RollingWindow(duration=30)
+        for i, (timestamp, value) in enumerate(zip(timestamps, values)):
+            window.add(timestamp, value)
+            if i % 97 and i != len(timestamps) - 1:
+                continue
+            expected = values[: i + 1][timestamps[: i + 1] >= timestamp - 30]
+            self.assertEqual(len(window), len(expected))
+            self.assertAlmostEqual(window.mean, np.mean(expected), places=10)
+            if len(expected) > 1:
+                self.assertAlmostEqual(
+                    window.variance, np.var(expected, ddof=1), places=10
+                )
+            else:
+                self.assertTrue(math.isnan(window.variance))
+            self.assertEqual(window.min, np.min(expected))
+            self.assertEqual(window.max, np.max(expected))
+
+        empty = RollingWindow(duration=30)
+        self.assertEqual(len(empty), 0)
+        self.assertTrue(math.isnan(empty.min))
+        self.assertTrue(math.isnan(empty.max))
+
+    def test_p2_quantile(self):
+        rng = np.random.default_rng(20)
+        values = rng.lognormal(mean=-0.5, sigma=0.3, size=20000)
+        for p in (0.5, 0.9):
+            quantile = P2Quantile(p)
+            self.assertIsNone(quantile.value)
+            for value in values[:3]:
+                quantile.add(value)
+            self.assertIn(quantile.value, values[:3])
+            for value in values[3:]:
+                quantile.add(value)
+            self.assertEqual(quantile.count, len(values))
+            expected = np.percentile(values, 100 * p)
+            self.assertAlmostEqual(quantile.value, expected, delta=0.01 * expected)
+
+    def test_recorded_data(self):
+        """Compare with NumPy on the rows of a telemetry file."""
+        rng = np.random.default_rng(21)
+        records = self.read_data(num_rows=6000, duration=600, rng=rng)
+        statistics = SeeingStatistics(windows=[60, 600])
+        for row in records:
+            statistics.add(dict(zip(records.dtype.names, row.tolist())))
+
+        summary = statistics.summary()
+        self.assertEqual(summary["count"], len(records))
+        self.assertEqual(summary["night"], "20190808")
+        timestamps = records["timestampCurrent"]
+        for name in SEEING_STATISTICS_FIELDS:
+            values = records[name]
+            for duration in (60, 600):
+                expected = values[timestamps >= timestamps[-1] - duration]
+                stats = summary[name]["windows"][duration]
+                self.assertEqual(stats["count"], len(expected))
+                self.assertAlmostEqual(stats["mean"], np.mean(expected), places=10)
+                self.assertAlmostEqual(
+                    stats["std"], np.std(expected, ddof=1), places=10
+                )
+                self.assertEqual(stats["min"], np.min(expected))
+                self.assertEqual(stats["max"], np.max(expected))
+            spread = np.max(values) - np.min(values)
+            for p in (50, 90):
+                self.assertAlmostEqual(
+                    summary[name][f"p{p}"],
+                    np.percentile(values, p),
+                    delta=0.02 * spread,
+                )
+        message = statistics.format_summary()
+        self.assertIn("6000 rows of night 20190808", message)
+        self.assertIn("fwhm p50", message)
+
+    def test_new_night(self):
+        statistics = SeeingStatistics(windows=[60])
+        self.assertIn("no data", statistics.format_summary())
+        row = dict(fwhm=1.0, rmsX=2.0, rmsY=3.0)
+        for timestamp in (NIGHT_START, NIGHT_START + 1):
+            statistics.add(dict(row, timestampCurrent=timestamp))
+        self.assertEqual(statistics.summary()["count"], 2)
+
+        # The night changes at 12:00 UTC, which is 37 s later in TAI.
+        next_night = NIGHT_START + 12 * 3600 + 37
+        statistics.add(dict(row, fwhm=5.0, timestampCurrent=next_night - 1))
+        self.assertEqual(statistics.night, "20190808")
+        statistics.add(dict(row, fwhm=7.0, timestampCurrent=next_night))
+        summary = statistics.summary()
+        self.assertEqual(summary["night"], "20190809")
+        self.assertEqual(summary["count"], 1)
+        self.assertEqual(summary["fwhm"]["p50"], 7.0)
+        # The rolling windows carry on across the change.
+        self.assertEqual(summary["fwhm"]["windows"][60]["count"], 2)
+        self.assertEqual(summary["fwhm"]["windows"][60]["min"], 5.0)
+
+        # The night of the first row is found in UTC too.
+        statistics = SeeingStatistics(windows=[60])
+        statistics.add(dict(row, timestampCurrent=next_night - 30))
+        self.assertEqual(statistics.night, "20190808")
+        statistics.add(dict(row, timestampCurrent=next_night))
+        self.assertEqual(statistics.night, "20190809")
+
+
+if __name__ == "__main__":
+    unittest.main()
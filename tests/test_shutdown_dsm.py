@@ -0,0 +1,61 @@
+import time
+import unittest
+
+from lsst.ts import salobj
+from lsst.ts.dsm import DSMGroup, set_summary_states
+from lsst.ts.dsm.shutdown_dsm import format_report
+
+STD_TIMEOUT = 15
+
+INDICES = [1, 2, 3]
+
+
+class TestSetSummaryStates(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        salobj.set_test_topic_subname()
+
+    async def test_set_summary_states(self):
+        async with DSMGroup(
+            indices=INDICES, initial_state=salobj.State.ENABLED, simulation_mode=1
+        ) as group, salobj.Domain() as domain:
+            # A CSC that is not running fails without holding up the rest.
+            missing_timeout = 2
+            start = time.monotonic()
+            results = await set_summary_states(
+                salobj.State.STANDBY,
+                indices=[1, 2, 9],
+                timeout=missing_timeout,
+                domain=domain,
+            )
+            self.assertLess(time.monotonic() - start, missing_timeout + 1)
+            self.assertEqual(results[1], None)
+            self.assertEqual(results[2], None)
+            self.assertIn("no answer", results[9])
+            states = [csc.summary_state for csc in group.cscs]
+            self.assertEqual(
+                states,
+                [salobj.State.STANDBY, salobj.State.STANDBY, salobj.State.ENABLED],
+            )
+
+            # Every running CSC is found from its heartbeats.
+            results = await set_summary_states(
+                salobj.State.OFFLINE, timeout=STD_TIMEOUT, domain=domain
+            )
+            self.assertEqual(results, {index: None for index in INDICES})
+            for csc in group.cscs:
+                self.assertEqual(csc.summary_state, salobj.State.OFFLINE)
+
+    def test_format_report(self):
+        report = format_report({2: "no answer within 2 s", 1: None}, "STANDBY")
+        self.assertEqual(
+            report.splitlines(),
+            [
+                "DSM 1: STANDBY",
+                "DSM 2: no answer within 2 s",
+                "1 of 2 DSMs reached STANDBY.",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import unittest
+import zipfile
+
+from lsst.ts.dsm import (
+    BundleWriter,
+    TelemetryArchiver,
+    archive_files,
+    prune_archive,
+)
+
+STD_TIMEOUT = 5
+
+# 2019-08-09T03:00:00 UTC, during the night of 2019-08-08.
+NIGHT_TIME = 1565319600
+
+
+class TestTelemetryArchiver(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.telemetry_dir = os.path.join(self.tempdir.name, "telemetry")
+        self.archive_dir = os.path.join(self.tempdir.name, "archive")
+        os.mkdir(self.telemetry_dir)
+        os.mkdir(self.archive_dir)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def make_files(self, num_files, mtime):
+        filenames = []
+        for i in range(num_files):
+            filename = os.path.join(self.telemetry_dir, f"dsm_{mtime}_{i}.dat")
+            with open(filename, "w") as ofile:
+                ofile.write(f"row {i}\n")
+            os.utime(filename, (mtime, mtime))
+            filenames.append(filename)
+        return filenames
+
+    def test_archive_files(self):
+        night1 = self.make_files(3, NIGHT_TIME)
+        night2 = self.make_files(2, NIGHT_TIME + 86400)
+        missing = os.path.join(self.telemetry_dir, "dsm_missing.dat")
+        archived, errors = archive_files(
+            self.archive_dir, "dsm1", night1 + night2 + [missing]
+        )
+        self.assertEqual(sorted(archived), sorted(night1 + night2 + [missing]))
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.telemetry_dir), [])
+        self.assertEqual(
+            sorted(os.listdir(self.archive_dir)),
+            ["dsm1_20190808.zip", "dsm1_20190809.zip"],
+        )
+        with zipfile.ZipFile(os.path.join(self.archive_dir, "dsm1_20190808.zip")) as zf:
+            self.assertEqual(
+                sorted(zf.namelist()), sorted(os.path.basename(f) for f in night1)
+            )
+            self.assertEqual(zf.read(os.path.basename(night1[1])), b"row 1\n")
+
+        # Adding to an existing bundle, including a file already in it.
+        more = self.make_files(4, NIGHT_TIME)
+        archive_files(self.archive_dir, "dsm1", more)
+        with zipfile.ZipFile(os.path.join(self.archive_dir, "dsm1_20190808.zip")) as zf:
+            self.assertEqual(len(zf.namelist()), 4)
+
+    def test_bundle_writer(self):
+        writer = BundleWriter(self.archive_dir, "dsm1")
+        night1 = self.make_files(3, NIGHT_TIME)
+        for filename in night1:
+            self.assertEqual(writer.add([filename]), ([], []))
+        # The bundle stays open and the files stay until it is closed.
+        self.assertEqual(writer.night, "20190808")
+        self.assertEqual(writer.added, night1)
+        self.assertEqual(len(os.listdir(self.telemetry_dir)), 3)
+
+        # A file of the next night closes the bundle of the previous one.
+        night2 = self.make_files(1, NIGHT_TIME + 86400)
+        archived, errors = writer.add(night2)
+        self.assertEqual(archived, night1)
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.telemetry_dir), [os.path.basename(night2[0])])
+        with zipfile.ZipFile(os.path.join(self.archive_dir, "dsm1_20190808.zip")) as zf:
+            self.assertEqual(len(zf.namelist()), 3)
+
+        self.assertEqual(writer.close(), night2)
+        self.assertIsNone(writer.night)
+        self.assertEqual(os.listdir(self.telemetry_dir), [])
+        self.assertEqual(writer.close(), [])
+
+    def test_corrupt_bundle(self):
+        bundle = os.path.join(self.archive_dir, "dsm1_20190808.zip")
+        with open(bundle, "wb") as ofile:
+            ofile.write(b"PK\x03\x04 truncated")
+        filenames = self.make_files(1, NIGHT_TIME)
+        archived, errors = archive_files(self.archive_dir, "dsm1", filenames)
+        self.assertEqual(archived, filenames)
+        with zipfile.ZipFile(bundle) as zf:
+            self.assertEqual(len(zf.namelist()), 1)
+        names = os.listdir(self.archive_dir)
+        self.assertEqual(len(names), 2)
+        self.assertTrue(any(".corrupt." in name for name in names))
+
+    def test_damaged_directory(self):
+        """Test a bundle whose end record is intact but whose directory is
+        not, as a crash while appending can leave it.
+        """
+        bundle = os.path.join(self.archive_dir, "dsm1_20190808.zip")
+        archive_files(self.archive_dir, "dsm1", self.make_files(2, NIGHT_TIME))
+        with open(bundle, "r+b") as ofile:
+            content = ofile.read()
+            ofile.seek(content.index(b"PK\x01\x02"))
+            ofile.write(b"XXXX")
+        self.assertTrue(zipfile.is_zipfile(bundle))
+
+        filenames = self.make_files(1, NIGHT_TIME + 1)
+        archived, errors = archive_files(self.archive_dir, "dsm1", filenames)
+        self.assertEqual(archived, filenames)
+        self.assertEqual(errors, [])
+        with zipfile.ZipFile(bundle) as zf:
+            self.assertEqual(len(zf.namelist()), 1)
+        self.assertEqual(len(os.listdir(self.archive_dir)), 2)
+
+    def test_prune_archive(self):
+        for night in ("20190801", "20190807", "20190808"):
+            for prefix in ("dsm1", "dsm2"):
+                open(
+                    os.path.join(self.archive_dir, f"{prefix}_{night}.zip"), "w"
+                ).close()
+        removed = prune_archive(
+            self.archive_dir, "dsm1", retention=86400, now=NIGHT_TIME + 86400
+        )
+        self.assertEqual(
+            [os.path.basename(path) for path in removed],
+            ["dsm1_20190801.zip", "dsm1_20190807.zip"],
+        )
+        self.assertEqual(len(os.listdir(self.archive_dir)), 4)
+
+    async def test_archiver(self):
+        archived = []
+        archiver = TelemetryArchiver(
+            self.archive_dir,
+            "dsm1",
+            log=logging.getLogger(),
+            retention=30 * 86400,
+            archived_callback=archived.append,
+        )
+        filenames = self.make_files(10, time.time())
+        try:
+            for filename in filenames:
+                archiver.add(filename)
+            await self.wait_archived(archived, len(filenames))
+            self.assertEqual(sorted(archived), sorted(filenames))
+            self.assertEqual(archiver.num_archived, len(filenames))
+            self.assertEqual(os.listdir(self.telemetry_dir), [])
+            self.assertEqual(len(os.listdir(self.archive_dir)), 1)
+
+            # A batch that fails is tried again with the next one.
+            archived.clear()
+            archive_dir = f"{self.archive_dir}.moved"
+            os.rename(self.archive_dir, archive_dir)
+            failed = self.make_files(1, time.time())
+            with self.assertLogs(level=logging.ERROR) as logs:
+                archiver.add(failed[0])
+                end = time.monotonic() + STD_TIMEOUT
+                while not logs.records and time.monotonic() < end:
+                    await asyncio.sleep(0.05)
+            self.assertEqual(list(archiver.pending), failed)
+            os.rename(archive_dir, self.archive_dir)
+            more = self.make_files(1, time.time() + 1)
+            archiver.add(more[0])
+            await self.wait_archived(archived, 2)
+            self.assertEqual(sorted(archived), sorted(failed + more))
+            self.assertEqual(archiver.pending, dict())
+        finally:
+            await archiver.close()
+
+    async def wait_archived(self, archived, num_files):
+        end = time.monotonic() + STD_TIMEOUT
+        while len(archived) < num_files and time.monotonic() < end:
+            await asyncio.sleep(0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
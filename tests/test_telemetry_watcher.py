@@ -0,0 +1,160 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import asyncinotify
+from lsst.ts.dsm import (
+    PollingTelemetryWatcher,
+    TelemetryWatcher,
+    make_telemetry_watcher,
+    telemetry_watcher,
+)
+
+STD_TIMEOUT = 5
+
+MIN_INTERVAL = 0.01
+
+QUIET_TIME = 0.05
+
+
+class TestPollingTelemetryWatcher(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.directory = self.tempdir.name
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def write(self, name, content="row\n", mode="w"):
+        with open(os.path.join(self.directory, name), mode) as ofile:
+            ofile.write(content)
+
+    async def next_event(self, events):
+        return await asyncio.wait_for(events.get(), timeout=STD_TIMEOUT)
+
+    async def test_events(self):
+        self.write("old.dat")
+        watcher = PollingTelemetryWatcher(
+            min_interval=MIN_INTERVAL, max_interval=0.1, quiet_time=QUIET_TIME
+        )
+        watch, events = await watcher.add_watch(
+            self.directory, asyncinotify.Mask.CLOSE_WRITE
+        )
+        with self.assertRaises(ValueError):
+            await watcher.add_watch(self.directory, asyncinotify.Mask.CLOSE_WRITE)
+        try:
+            self.write("new.dat")
+            os.mkdir(os.path.join(self.directory, "subdir"))
+            event = await self.next_event(events)
+            self.assertEqual(event.mask, asyncinotify.Mask.CLOSE_WRITE)
+            self.assertEqual(event.name.name, "new.dat")
+            self.assertEqual(event.path, watch.path / "new.dat")
+            self.assertIs(event.watch, watch)
+
+            # A file that changes again is reported again.
+            self.write("new.dat", "more\n", mode="a")
+            event = await self.next_event(events)
+            self.assertEqual(event.name.name, "new.dat")
+            await asyncio.sleep(0.3)
+            self.assertTrue(events.empty())
+        finally:
+            watcher.close()
+        self.assertEqual(watcher.event_queues, dict())
+
+    async def test_modify(self):
+        watcher = PollingTelemetryWatcher(
+            min_interval=MIN_INTERVAL, quiet_time=QUIET_TIME
+        )
+        _, events = await watcher.add_watch(
+            self.directory,
+            asyncinotify.Mask.CLOSE_WRITE | asyncinotify.Mask.MODIFY,
+        )
+        try:
+            self.write("follow.dat")
+            event = await self.next_event(events)
+            self.assertEqual(event.mask, asyncinotify.Mask.MODIFY)
+            event = await self.next_event(events)
+            self.assertEqual(event.mask, asyncinotify.Mask.CLOSE_WRITE)
+        finally:
+            watcher.close()
+
+    async def test_delete(self):
+        self.write("old.dat")
+        watcher = PollingTelemetryWatcher(
+            min_interval=MIN_INTERVAL, quiet_time=QUIET_TIME
+        )
+        _, events = await watcher.add_watch(
+            self.directory,
+            asyncinotify.Mask.CLOSE_WRITE | asyncinotify.Mask.DELETE,
+        )
+        try:
+            os.remove(os.path.join(self.directory, "old.dat"))
+            event = await self.next_event(events)
+            self.assertEqual(event.mask, asyncinotify.Mask.DELETE)
+            self.assertEqual(event.name.name, "old.dat")
+        finally:
+            watcher.close()
+
+    def test_scan_cost(self):
+        """Test that a pass only stats new and recently changed files."""
+        num_files = 2000
+        for i in range(num_files):
+            self.write(f"dsm_{i}.dat")
+        watch = telemetry_watcher.PollingWatch(
+            self.directory, asyncinotify.Mask.CLOSE_WRITE, quiet_time=0
+        )
+        watch.seed()
+        self.write("dsm_new.dat")
+        self.assertEqual(watch.scan(), [])
+        self.assertEqual(watch.num_stats, 1)
+        events = watch.scan()
+        self.assertEqual([event.name.name for event in events], ["dsm_new.dat"])
+        self.assertEqual(watch.num_stats, 2)
+        self.assertFalse(watch.has_pending)
+
+        # A full scan looks at every file.
+        self.assertEqual(watch.scan(full=True), [])
+        self.assertEqual(watch.num_stats, 2 + num_files + 1)
+
+    def test_quiet_time(self):
+        """Test that a file is only finished once it has not changed for
+        the quiet time.
+        """
+        watch = telemetry_watcher.PollingWatch(
+            self.directory, asyncinotify.Mask.CLOSE_WRITE, quiet_time=0.2
+        )
+        watch.seed()
+        self.write("dsm_new.dat")
+        self.assertEqual(watch.scan(), [])
+        self.assertEqual(watch.scan(), [])
+        self.assertTrue(watch.has_pending)
+        time.sleep(0.1)
+        self.write("dsm_new.dat", "more\n", mode="a")
+        self.assertEqual(watch.scan(), [])
+        time.sleep(0.15)
+        # Changed less than the quiet time ago.
+        self.assertEqual(watch.scan(), [])
+        time.sleep(0.1)
+        events = watch.scan()
+        self.assertEqual([event.name.name for event in events], ["dsm_new.dat"])
+        self.assertFalse(watch.has_pending)
+
+    async def test_make_telemetry_watcher(self):
+        watcher = make_telemetry_watcher("polling")
+        self.assertIsInstance(watcher, PollingTelemetryWatcher)
+        self.assertEqual(watcher.quiet_time, telemetry_watcher.DEFAULT_POLL_QUIET_TIME)
+        with mock.patch.dict(os.environ, DSM_POLL_QUIET_TIME="5"):
+            self.assertEqual(make_telemetry_watcher("polling").quiet_time, 5)
+        with mock.patch.dict(os.environ, DSM_WATCHER="inotify"):
+            watcher = make_telemetry_watcher()
+        self.assertIsInstance(watcher, TelemetryWatcher)
+        watcher.close()
+        with self.assertRaises(ValueError):
+            make_telemetry_watcher("fanotify")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,22 @@
+import calendar
+import gzip
+import os
+import pathlib
+import tempfile
+import time
 import unittest
 
+import numpy as np
 from lsst.ts.dsm import utils
 
+# UTC time strings around the 2016-12-31 leap second and their TAI timestamps.
+LEAP_SECOND_CASES = [
+    ("2019-08-08T22:26:52.451723", 1565303249.451723),
+    ("2016-12-31T23:59:59.951723", 1483228835.951723),
+    ("2016-12-31T23:59:60.351723", 1483228836.351723),
+    ("2017-01-01T00:00:00.151723", 1483228837.151723),
+]
+
 
 class TestUtils(unittest.TestCase):
     def test_convert_time(self):
@@ -31,6 +46,497 @@ class TestUtils(unittest.TestCase):
             utils.convert_time(time_string), tai_time_stamp, places=places
         )
 
+    def test_convert_time_fallback(self):
+        # Strings the fast path does not handle go through astropy.
+        self.assertAlmostEqual(
+            utils.convert_time("2017:001:00:00:00.151723"),
+            utils.convert_time("2017-01-01T00:00:00.151723"),
+            places=6,
+        )
+        self.assertAlmostEqual(
+            utils.convert_time("2019-08-08T22:26:52."),
+            utils.convert_time("2019-08-08T22:26:52"),
+            places=6,
+        )
+
+    def test_convert_time_invalid(self):
+        # Fields out of range are not converted by the fast path.
+        for time_string in (
+            "2019-08-08T25:26:52.451723",
+            "2019-08-08T22:61:52",
+            "2019-02-30T22:26:52",
+            "2019-13-08T22:26:52",
+        ):
+            with self.subTest(time_string=time_string):
+                with self.assertRaises(ValueError):
+                    utils.convert_time(time_string)
+                with self.assertRaises(ValueError):
+                    utils.convert_times([time_string])
+
+        # A second of 60 outside a leap second is left to astropy, which
+        # carries it into the next minute.
+        for time_string, next_minute in (
+            ("2019-08-08T22:26:60.5", "2019-08-08T22:27:00.5"),
+            ("2019-08-08T23:59:60.5", "2019-08-09T00:00:00.5"),
+        ):
+            with self.subTest(time_string=time_string):
+                tai_time = utils.convert_time(next_minute)
+                self.assertAlmostEqual(
+                    utils.convert_time(time_string), tai_time, places=6
+                )
+                self.assertAlmostEqual(
+                    utils.convert_times([time_string])[0], tai_time, places=6
+                )
+
+    def test_convert_times(self):
+        time_strings = [case[0] for case in LEAP_SECOND_CASES]
+        tai_time_stamps = np.array([case[1] for case in LEAP_SECOND_CASES])
+
+        tai_times = utils.convert_times(time_strings)
+        self.assertEqual(tai_times.shape, (len(time_strings),))
+        np.testing.assert_allclose(tai_times, tai_time_stamps, rtol=0, atol=1e-6)
+
+        # Repeated values map back onto the right positions.
+        tai_times = utils.convert_times(time_strings[::-1] + time_strings)
+        np.testing.assert_allclose(
+            tai_times,
+            np.concatenate([tai_time_stamps[::-1], tai_time_stamps]),
+            rtol=0,
+            atol=1e-6,
+        )
+
+        # Scalar and vectorized conversions agree.
+        for time_string, tai_time in zip(time_strings, tai_time_stamps):
+            self.assertAlmostEqual(utils.convert_time(time_string), tai_time, places=6)
+
+        self.assertEqual(utils.convert_times([]).size, 0)
+
+    def test_tai_utc_unix(self):
+        for time_string, tai_time in LEAP_SECOND_CASES:
+            with self.subTest(time_string=time_string):
+                # A second of 60 gives the Unix time of the second after.
+                utc_time = calendar.timegm(
+                    time.strptime(time_string[:19], "%Y-%m-%dT%H:%M:%S")
+                ) + float(time_string[19:])
+                self.assertAlmostEqual(
+                    utils.utc_from_tai_unix(tai_time), utc_time, places=6
+                )
+                if not time_string.endswith(":60.351723"):
+                    self.assertAlmostEqual(
+                        utils.tai_from_utc_unix(utc_time), tai_time, places=6
+                    )
+
+    def test_get_night(self):
+        # 2019-08-09T03:00:00 UTC, during the night of 2019-08-08.
+        utc_time = 1565319600
+        self.assertEqual(utils.get_night(utc_time), "20190808")
+        self.assertEqual(utils.get_night(utc_time + 9 * 3600 - 1), "20190808")
+        self.assertEqual(utils.get_night(utc_time + 9 * 3600), "20190809")
+        # 2019-08-09T12:00:00 UTC.
+        self.assertEqual(utils.get_night_end(utc_time), 1565352000)
+        self.assertEqual(utils.get_night_end(1565352000 - 0.5), 1565352000)
+        self.assertEqual(utils.get_night_end(1565352000), 1565352000 + 86400)
+
+    def test_validate_telemetry_config(self):
+        content = dict(
+            timestamp="2019-08-08T22:26:52.451723",
+            ui_versions=dict(code="1.0.1", config="1.4.4", config_file="/a.yaml"),
+            camera=dict(name="Sim_Camera", fps=40),
+            data=dict(buffer_size=1024, acquisition_time=1),
+        )
+        utils.validate_telemetry_config(content)
+
+        del content["timestamp"]
+        del content["camera"]["fps"]
+        del content["data"]["buffer_size"]
+        with self.assertRaisesRegex(
+            ValueError, "lacks timestamp, camera.fps, data.buffer_size"
+        ):
+            utils.parse_telemetry_config(content)
+        content["camera"] = "Sim_Camera"
+        with self.assertRaisesRegex(ValueError, "camera is not a mapping"):
+            utils.validate_telemetry_config(content)
+        with self.assertRaisesRegex(ValueError, "list, not a mapping"):
+            utils.validate_telemetry_config([])
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            config_file = os.path.join(output_dir, "dsm_ui_config.yaml")
+            with open(config_file, "w") as ofile:
+                ofile.write("camera: [")
+            with self.assertRaisesRegex(ValueError, "not valid YAML"):
+                utils.read_telemetry_config(config_file)
+
+    def test_read_telemetry_files(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            utils.create_telemetry_config(output_dir, 1)
+            config = utils.read_telemetry_config(
+                os.path.join(output_dir, "dsm_ui_config.yaml")
+            )
+            self.assertEqual(
+                config["uiConfigFile"], "file:///dsm/ui_dsm_config/default.yaml"
+            )
+            self.assertEqual(config["cameraFps"], 120)
+            self.assertEqual(config["dataBufferSize"], 128)
+            self.assertGreater(config["timestampConfigStart"], 0)
+
+            config_file = os.path.join(output_dir, "dsm_ui_config.yaml")
+            digest, changed_config = utils.read_changed_telemetry_config(config_file)
+            self.assertEqual(changed_config, config)
+            self.assertEqual(
+                utils.read_changed_telemetry_config(config_file, digest),
+                (digest, None),
+            )
+
+            utils.create_telemetry_data(output_dir, 1)
+            (data_file,) = [f for f in os.listdir(output_dir) if f.endswith(".dat")]
+            data_file = os.path.join(output_dir, data_file)
+            with open(data_file, "a") as ofile:
+                ofile.write("2019-08-08T22:26:52.451723,2019-08-08T22:26:51.451723\n")
+            data = utils.read_telemetry_data(data_file)
+            self.assertEqual(len(data.records), 1)
+            self.assertEqual(len(data.rejected), 1)
+            self.assertEqual(data.records[0]["rmsX"], data.records[0]["rmsY"])
+            self.assertEqual(
+                data.records[0]["timestampCurrent"],
+                data.records[0]["timestampLastMeasurement"],
+            )
+            self.assertEqual(data.end_offset, os.path.getsize(data_file))
+            self.assertEqual(data.size, os.path.getsize(data_file))
+
+            # Reading from the end of the first row only finds the bad row.
+            data = utils.read_telemetry_data(data_file, offset=data.offsets[0])
+            self.assertEqual(len(data.records), 0)
+            self.assertEqual(len(data.rejected), 1)
+
+    def test_read_unquoted_timestamp(self):
+        # YAML decodes an unquoted timestamp to a datetime.
+        with tempfile.TemporaryDirectory() as output_dir:
+            config_file = os.path.join(output_dir, "dsm_ui_config.yaml")
+            with open(config_file, "w") as ofile:
+                ofile.write(
+                    "timestamp: 2019-08-08T22:26:52.451723\n"
+                    "ui_versions: {code: 1.0.1, config: 1.4.4, config_file: /a.yaml}\n"
+                    "camera: {name: Sim_Camera, fps: 40}\n"
+                    "data: {buffer_size: 128, acquisition_time: 1}\n"
+                )
+            config = utils.read_telemetry_config(config_file)
+        self.assertAlmostEqual(
+            config["timestampConfigStart"], LEAP_SECOND_CASES[0][1], places=6
+        )
+
+    def test_create_telemetry_data(self):
+        num_rows = 200
+        rng = np.random.default_rng(47)
+        with tempfile.TemporaryDirectory() as output_dir:
+            data_file = utils.create_telemetry_data(output_dir, 2, num_rows, rng=rng)
+            data = utils.read_telemetry_data(data_file)
+            self.assertEqual(len(data.records), num_rows)
+            self.assertEqual(len(data.rejected), 0)
+            current = data.records["timestampCurrent"]
+            np.testing.assert_allclose(np.diff(current), 2 / num_rows, atol=2e-6)
+            np.testing.assert_allclose(
+                current - data.records["timestampFirstMeasurement"],
+                2 / num_rows,
+                atol=2e-6,
+            )
+
+            data_file = utils.create_telemetry_data(
+                output_dir, 2, num_rows, bad_fraction=0.25, rng=rng
+            )
+            data = utils.read_telemetry_data(data_file)
+            self.assertEqual(len(data.records) + len(data.rejected), num_rows)
+            self.assertGreater(len(data.rejected), num_rows * 0.1)
+            self.assertLess(len(data.rejected), num_rows * 0.4)
+            self.assertEqual(len(os.listdir(output_dir)), 2)
+
+    def test_read_telemetry_data_partial_line(self):
+        row = (
+            "2019-08-08T22:26:52.451723,2019-08-08T22:26:51.451723,"
+            "2019-08-08T22:26:52.451723,0.5,0.5,215.0,321.0,2050.0,1050.0,6.5"
+        )
+        with tempfile.TemporaryDirectory() as output_dir:
+            data_file = os.path.join(output_dir, "dsm_partial.dat")
+            with open(data_file, "w") as ofile:
+                ofile.write(f"{row}\n{row[:40]}")
+
+            data = utils.read_telemetry_data(data_file, final=False)
+            self.assertEqual(len(data.records), 1)
+            self.assertEqual(data.end_offset, len(row) + 1)
+            self.assertEqual(data.offsets.tolist(), [data.end_offset])
+
+            with open(data_file, "a") as ofile:
+                ofile.write(f"{row[40:]}\n")
+            data = utils.read_telemetry_data(data_file, offset=data.end_offset)
+            self.assertEqual(len(data.records), 1)
+            self.assertEqual(len(data.rejected), 0)
+            self.assertEqual(data.end_offset, 2 * (len(row) + 1))
+            self.assertEqual(data.durations, dict())
+
+            data = utils.read_telemetry_data(data_file, timed=True)
+            self.assertEqual(len(data.records), 2)
+            self.assertEqual(set(data.durations), {"parse", "convert_time"})
+            for duration in data.durations.values():
+                self.assertGreaterEqual(duration, 0)
+
+    def test_binary_telemetry_data(self):
+        num_rows = 50
+        rng = np.random.default_rng(47)
+        with tempfile.TemporaryDirectory() as output_dir:
+            data_file = utils.create_telemetry_data(output_dir, 2, num_rows, rng=rng)
+            text_data = utils.read_telemetry_data(data_file)
+            binary_file = os.path.join(output_dir, "dsm_binary.dsmb")
+            utils.write_binary_telemetry_data(binary_file, text_data.records[:30])
+
+            data = utils.read_binary_telemetry_data(binary_file, final=False)
+            self.assertEqual(data.records.dtype, utils.DOME_SEEING_DTYPE)
+            np.testing.assert_array_equal(data.records, text_data.records[:30])
+            record_size = utils.BINARY_DAT_DTYPE.itemsize
+            self.assertEqual(data.end_offset, os.path.getsize(binary_file))
+            self.assertEqual(
+                data.offsets.tolist(),
+                (data.end_offset - record_size * np.arange(29, -1, -1)).tolist(),
+            )
+            # Valid rows are a view of the file, not a copy.
+            self.assertFalse(data.records.flags.owndata)
+
+            # Append the rest, a bad row and part of a record.
+            bad_record = text_data.records[:1].copy()
+            bad_record["flux"] = -1
+            utils.write_binary_telemetry_data(binary_file, text_data.records[30:])
+            utils.write_binary_telemetry_data(binary_file, bad_record)
+            with open(binary_file, "ab") as ofile:
+                ofile.write(text_data.records[:1].tobytes()[:20])
+            size = os.path.getsize(binary_file)
+
+            resumed = utils.read_binary_telemetry_data(
+                binary_file, offset=data.end_offset, final=False, timed=True
+            )
+            np.testing.assert_array_equal(resumed.records, text_data.records[30:])
+            self.assertEqual(resumed.rejected, [(size - 20, "invalid value")])
+            self.assertEqual(resumed.end_offset, size - 20)
+            self.assertEqual(set(resumed.durations), {"parse", "convert_time"})
+
+            final = utils.read_binary_telemetry_data(
+                binary_file, offset=resumed.end_offset
+            )
+            self.assertEqual(len(final.records), 0)
+            self.assertEqual(final.rejected, [(size, "incomplete record")])
+            self.assertEqual(final.end_offset, size)
+
+            data_file = utils.create_telemetry_data(
+                output_dir, 2, num_rows, bad_fraction=0.25, rng=rng, binary=True
+            )
+            self.assertTrue(utils.is_binary_data_file(data_file))
+            self.assertTrue(utils.is_data_file(data_file))
+            data = utils.read_binary_telemetry_data(data_file)
+            self.assertEqual(len(data.records) + len(data.rejected), num_rows)
+            self.assertGreater(len(data.rejected), 0)
+            np.testing.assert_allclose(
+                data.records["timestampCurrent"]
+                - data.records["timestampFirstMeasurement"],
+                2 / num_rows,
+                atol=2e-6,
+            )
+
+            with open(data_file, "r+b") as ofile:
+                ofile.write(b"CSV!")
+            with self.assertRaisesRegex(ValueError, "not a binary telemetry file"):
+                utils.read_binary_telemetry_data(data_file)
+            empty_file = os.path.join(output_dir, "dsm_empty.dsmb")
+            with open(empty_file, "wb"):
+                pass
+            data = utils.read_binary_telemetry_data(empty_file, final=False)
+            self.assertEqual(data.end_offset, 0)
+            with self.assertRaises(ValueError):
+                utils.read_binary_telemetry_data(empty_file)
+
+    def test_parse_telemetry_lines(self):
+        good_row = (
+            "2016-12-31T23:59:60.351723,2016-12-31T23:59:59.951723,"
+            "2016-12-31T23:59:60.351723,0.5,0.6,215.0,-321.0,2050.0,1050.0,6.5"
+        )
+        lines = [
+            good_row + "\r\n",
+            "\n",
+            good_row.rsplit(",", 1)[0] + "\n",
+            good_row.replace("0.6", "abc") + "\n",
+            good_row.replace("0.6", "nan") + "\n",
+            good_row.replace("6.5", "-6.5") + "\n",
+            good_row.replace("2016-12-31T23:59:59.951723", "yesterday") + "\n",
+            # Out of range times are rejected, even those astropy accepts.
+            good_row.replace("2016-12-31T23:59:59.951723", "2016-12-31T25:26:52.451723")
+            + "\n",
+            good_row.replace("2016-12-31T23:59:59.951723", "2016-12-31T22:26:60.451723")
+            + "\n",
+            good_row + "\n",
+        ]
+        line_ends = np.cumsum([len(line) for line in lines]) + 100
+        records, offsets, rejected = utils.parse_telemetry_lines(
+            [line.encode() for line in lines], offset=100
+        )
+
+        self.assertEqual(records.dtype, utils.DOME_SEEING_DTYPE)
+        self.assertEqual(len(records), 2)
+        self.assertEqual(offsets.tolist(), [line_ends[0], line_ends[-1]])
+        for record in records:
+            self.assertAlmostEqual(
+                record["timestampCurrent"], 1483228836.351723, places=6
+            )
+            self.assertAlmostEqual(
+                record["timestampFirstMeasurement"], 1483228835.951723, places=6
+            )
+            self.assertEqual(record["rmsY"], 0.6)
+            self.assertEqual(record["centroidY"], -321.0)
+        self.assertEqual(
+            rejected,
+            [
+                (line_ends[2], "wrong number of columns"),
+                (line_ends[3], "invalid value"),
+                (line_ends[4], "invalid value"),
+                (line_ends[5], "invalid value"),
+                (line_ends[6], "invalid timestamp"),
+                (line_ends[7], "invalid timestamp"),
+                (line_ends[8], "invalid timestamp"),
+            ],
+        )
+
+        records, offsets, rejected = utils.parse_telemetry_lines([])
+        self.assertEqual(len(records), 0)
+        self.assertEqual(len(offsets), 0)
+        self.assertEqual(rejected, [])
+
+    def test_scan_telemetry_directory(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            names = [
+                "dsm_b.dat",
+                "old.yaml",
+                "dsm_a.dat",
+                "dsm_c.dat.gz",
+                "new.yaml",
+                "dsm_d.dat.zst",
+                "dsm_e.dsmb",
+            ]
+            for mtime, name in enumerate(names, start=1000):
+                filename = os.path.join(output_dir, name)
+                with open(filename, "w"):
+                    pass
+                os.utime(filename, (mtime, mtime))
+            os.mkdir(os.path.join(output_dir, "subdir.dat"))
+            with open(os.path.join(output_dir, "notes.txt"), "w"):
+                pass
+
+            config_files, data_files = utils.scan_telemetry_directory(output_dir)
+            self.assertEqual([f.name for f in config_files], ["old.yaml", "new.yaml"])
+            self.assertEqual(
+                [f.name for f in data_files],
+                [
+                    "dsm_b.dat",
+                    "dsm_a.dat",
+                    "dsm_c.dat.gz",
+                    "dsm_d.dat.zst",
+                    "dsm_e.dsmb",
+                ],
+            )
+            self.assertEqual(data_files[0], pathlib.Path(output_dir, "dsm_b.dat"))
+
+            config_files, data_files = utils.scan_telemetry_directory(
+                output_dir, min_mtime=1001, max_mtime=1003
+            )
+            self.assertEqual([f.name for f in config_files], ["old.yaml"])
+            self.assertEqual([f.name for f in data_files], ["dsm_a.dat"])
+
+    def write_compressed(self, filename, content):
+        if filename.endswith(".gz"):
+            with gzip.open(filename, "wb") as ofile:
+                ofile.write(content)
+        else:
+            # Two frames, as a writer that flushes between buffers makes.
+            compressor = utils.zstandard.ZstdCompressor()
+            half = len(content) // 2
+            with open(filename, "wb") as ofile:
+                ofile.write(compressor.compress(content[:half]))
+                ofile.write(compressor.compress(content[half:]))
+
+    def check_compressed(self, suffix):
+        num_rows = 500
+        rng = np.random.default_rng(47)
+        with tempfile.TemporaryDirectory() as output_dir:
+            plain_file = utils.create_telemetry_data(
+                output_dir, 5, num_rows, bad_fraction=0.1, rng=rng
+            )
+            with open(plain_file, "rb") as infile:
+                content = infile.read()
+            expected = utils.read_telemetry_data(plain_file)
+
+            filename = os.path.join(output_dir, f"dsm_compressed{suffix}")
+            self.write_compressed(filename, content)
+            self.assertTrue(utils.is_compressed_data_file(filename))
+            chunks = list(
+                utils.iter_compressed_telemetry_data(filename, chunk_size=4096)
+            )
+            self.assertGreater(len(chunks), 5)
+            for chunk in chunks:
+                self.assertTrue(chunk.compressed)
+                self.assertEqual(chunk.size, os.path.getsize(filename))
+            np.testing.assert_array_equal(
+                np.concatenate([chunk.records for chunk in chunks]), expected.records
+            )
+            np.testing.assert_array_equal(
+                np.concatenate([chunk.offsets for chunk in chunks]), expected.offsets
+            )
+            self.assertEqual(
+                sum((chunk.rejected for chunk in chunks), []), expected.rejected
+            )
+            self.assertEqual(chunks[-1].end_offset, len(content))
+
+            # Resume after the 100th row.
+            offset = int(expected.offsets[99])
+            chunks = list(
+                utils.iter_compressed_telemetry_data(filename, offset, chunk_size=4096)
+            )
+            np.testing.assert_array_equal(
+                np.concatenate([chunk.records for chunk in chunks]),
+                expected.records[100:],
+            )
+
+            # A truncated file yields the rows before the cut, then raises.
+            with open(filename, "rb") as infile:
+                compressed = infile.read()
+            truncated_file = os.path.join(output_dir, f"dsm_truncated{suffix}")
+            with open(truncated_file, "wb") as ofile:
+                ofile.write(compressed[: len(compressed) * 3 // 4])
+            chunks = []
+            with self.assertRaisesRegex(ValueError, "truncated or corrupt"):
+                for chunk in utils.iter_compressed_telemetry_data(
+                    truncated_file, chunk_size=4096
+                ):
+                    chunks.append(chunk)
+            self.assertGreater(len(chunks), 0)
+            num_published = sum(len(chunk.records) for chunk in chunks)
+            np.testing.assert_array_equal(
+                np.concatenate([chunk.records for chunk in chunks]),
+                expected.records[:num_published],
+            )
+
+            # Corrupt data.
+            corrupt_file = os.path.join(output_dir, f"dsm_corrupt{suffix}")
+            with open(corrupt_file, "wb") as ofile:
+                ofile.write(compressed[:20] + bytes(64) + compressed[84:])
+            with self.assertRaisesRegex(ValueError, "truncated or corrupt"):
+                list(utils.iter_compressed_telemetry_data(corrupt_file))
+
+            # A file that is gone is not reported as corrupt.
+            os.remove(corrupt_file)
+            with self.assertRaises(FileNotFoundError):
+                list(utils.iter_compressed_telemetry_data(corrupt_file))
+
+    def test_gzip_telemetry_data(self):
+        self.check_compressed(".dat.gz")
+
+    @unittest.skipIf(utils.zstandard is None, "zstandard is not installed")
+    def test_zstd_telemetry_data(self):
+        self.check_compressed(".dat.zst")
+
 
 if __name__ == "__main__":
     unittest.main()